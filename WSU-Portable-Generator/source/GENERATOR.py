@@ -20,12 +20,15 @@
 # **  Contact: Diane J. Cook (djcook@wsu.edu)                                                   ** #
 # ************************************************************************************************ #
 
+import collections
 import configparser
 import datetime
 import copy
+import functools
 import json
 import logging
 import logging.handlers
+import multiprocessing
 import optparse
 import pytz
 import queue
@@ -35,13 +38,15 @@ import threading
 import time
 import uuid
 
+from objects import objects
 from objects.GENERATOR_logic import GeneratorLogic
 from env_generator.test_handler import TestHandler
 
 
 class ThreadedTestHandler(threading.Thread):
     def __init__(self, domain: str, novelty: int, difficulty: str, seed: int, trial_novelty: int,
-                 day_offset: int, response_queue: queue.Queue, use_image: bool):
+                 day_offset: int, response_queue: queue.Queue, use_image: bool,
+                 test_handler: TestHandler = None):
         threading.Thread.__init__(self)
         self.domain = domain
         self.novelty = novelty
@@ -51,19 +56,31 @@ class ThreadedTestHandler(threading.Thread):
         self.day_offset = day_offset
         self.response_queue = response_queue
         self.use_image = use_image
+        # A warm TestHandler from the pool to reset instead of building a new one.
+        self.test_handler = test_handler
+        self.duration = None
 
         self.is_done = False
         return
 
     def run(self):
-        # Initialize GENERATOR here with novelty, difficulty, and seed.
-        self.response_queue.put(TestHandler(domain=self.domain,
+        start_time = time.time()
+        if self.test_handler is None:
+            # Initialize GENERATOR here with novelty, difficulty, and seed.
+            self.test_handler = TestHandler(domain=self.domain,
                                             novelty=self.novelty,
                                             difficulty=self.difficulty,
                                             seed=self.seed,
                                             trial_novelty=self.trial_novelty,
                                             day_offset=self.day_offset,
-                                            use_img=self.use_image))
+                                            use_img=self.use_image)
+        else:
+            # Reset and reseed the warm GENERATOR for the new episode.
+            self.test_handler.restart(seed=self.seed,
+                                      trial_novelty=self.trial_novelty,
+                                      day_offset=self.day_offset)
+        self.duration = time.time() - start_time
+        self.response_queue.put(self.test_handler)
         while not self.is_done:
             time.sleep(0.1)
         return
@@ -88,6 +105,53 @@ class GeneratorAgent(GeneratorLogic):
         self.episode_data_count = None
         self.last_label = dict()
         self.episode_score = list()
+
+        # Ready environments kept between episodes, keyed by
+        # (domain, novelty, difficulty, use_image), least recently used first.
+        self.env_pool = collections.OrderedDict()
+        self.env_pool_size = self.config.getint('generator', 'env_pool_size')
+        self.env_key = None
+        # Number of and total seconds spent on environment inits and resets.
+        self.env_timing = {'init': [0, 0.0], 'reset': [0, 0.0]}
+        return
+
+    @staticmethod
+    def _build_config_parser():
+        config = GeneratorLogic._build_config_parser()
+        # Options for the generator itself.
+        config.add_section('generator')
+        config.set('generator', 'env_pool_size', '4')
+        config.set('generator', 'workers', '0')
+        return config
+
+    def release_generator(self):
+        # Put the current GENERATOR back in the pool so the next episode can reset it.
+        if self.GENERATOR is None:
+            return
+        if self.env_pool_size > 0 and self.env_key[0] in ['cartpole', 'vizdoom']:
+            old_generator = self.env_pool.pop(self.env_key, None)
+            if old_generator is not None:
+                old_generator.close()
+            self.env_pool[self.env_key] = self.GENERATOR
+            while len(self.env_pool) > self.env_pool_size:
+                old_key, old_generator = self.env_pool.popitem(last=False)
+                self.log.debug('Closing pooled environment {}'.format(old_key))
+                old_generator.close()
+        else:
+            self.GENERATOR.close()
+        self.GENERATOR = None
+        self.env_key = None
+        return
+
+    def close_env_pool(self):
+        while len(self.env_pool) > 0:
+            old_key, old_generator = self.env_pool.popitem(last=False)
+            old_generator.close()
+        return
+
+    def stop(self):
+        self.close_env_pool()
+        super().stop()
         return
 
     def get_novelty_description(self, domain: str, novelty: int, difficulty: str) -> dict:
@@ -96,11 +160,13 @@ class GeneratorAgent(GeneratorLogic):
 
     def initilize_generator(self, domain: str, novelty: int, difficulty: str, seed: int,
                             trial_novelty: int, day_offset: int, use_image: bool):
-        del self.GENERATOR
+        self.release_generator()
         # Set variable is_episode_done to False.
         self.is_episode_done = False
 
         self.GENERATOR = None
+        self.env_key = (domain, novelty, difficulty, use_image)
+        pooled_generator = self.env_pool.pop(self.env_key, None)
         response_queue = queue.Queue()
         # Initialize GENERATOR here with novelty, difficulty, and seed.
         threaded_gen = ThreadedTestHandler(domain=domain,
@@ -110,7 +176,8 @@ class GeneratorAgent(GeneratorLogic):
                                            trial_novelty=trial_novelty,
                                            day_offset=day_offset,
                                            response_queue=response_queue,
-                                           use_image=use_image)
+                                           use_image=use_image,
+                                           test_handler=pooled_generator)
         threaded_gen.start()
         while self.GENERATOR is None:
             try:
@@ -124,6 +191,19 @@ class GeneratorAgent(GeneratorLogic):
 
         threaded_gen.stop()
         threaded_gen.join()
+
+        timing_type = 'init'
+        if pooled_generator is not None:
+            timing_type = 'reset'
+        self.env_timing[timing_type][0] += 1
+        self.env_timing[timing_type][1] += threaded_gen.duration
+        init_count, init_total = self.env_timing['init']
+        reset_count, reset_total = self.env_timing['reset']
+        self.log.info('Environment {} {} took {:.3f}s (init avg {:.3f}s over {}, '
+                      'reset avg {:.3f}s over {})'.format(
+                          self.env_key, timing_type, threaded_gen.duration,
+                          init_total / max(init_count, 1), init_count,
+                          reset_total / max(reset_count, 1), reset_count))
         return
 
     def get_feature_vector(self) -> (dict, dict):
@@ -163,8 +243,268 @@ class GeneratorAgent(GeneratorLogic):
         else:
             self.log.debug('Server comms cut')
 
-        del self.GENERATOR
-        self.GENERATOR = None
+        # Keep the environment warm for the next episode instead of deleting it.
+        self.release_generator()
+        return
+
+
+class GeneratorWorker(GeneratorAgent):
+    def __init__(self, options, worker_id: int, control_queue: str,
+                 status_queue: multiprocessing.Queue):
+        # Workers take StartGenerator requests from their own control queue, which the
+        # GeneratorFarm only forwards to while the worker is idle.
+        self.worker_id = worker_id
+        self.control_queue = control_queue
+        self.status_queue = status_queue
+        super().__init__(options)
+        self.log = self.log.getChild('Worker{}'.format(self.worker_id))
+        self.amqp.set_on_connect_callback(self.on_connect)
+        return
+
+    def on_connect(self):
+        # The control queue is declared now, the farm can start sending us work.
+        self.status_queue.put((self.worker_id, 'idle'))
+        return
+
+    def _subscribe_generator_queue(self):
+        self.log.debug('_subscribe_generator_queue()')
+        self.amqp.setup_subscribe_to_queue(
+            queue_name=self.control_queue,
+            queue_durable=False,
+            queue_exclusive=True,
+            queue_auto_delete=False,
+            casas_events=True,
+            callback_function=self.on_generator_request,
+            auto_ack=False,
+            callback_full_params=True)
+        return
+
+    def _unsubscribe_generator_queue(self):
+        self.log.debug('_unsubscribe_generator_queue()')
+        self.amqp.remove_subscribe_to_queue(queue_name=self.control_queue)
+        return
+
+    def _reset_system(self):
+        super()._reset_system()
+        self.status_queue.put((self.worker_id, 'idle'))
+        return
+
+
+def run_generator_worker(options, worker_id: int, control_queue: str,
+                         status_queue: multiprocessing.Queue):
+    # Entry point of each GeneratorFarm worker process.
+    if options.logfile is not None:
+        options.logfile = '{}.worker{}'.format(options.logfile, worker_id)
+    agent = GeneratorWorker(options=options,
+                            worker_id=worker_id,
+                            control_queue=control_queue,
+                            status_queue=status_queue)
+    agent.run()
+    agent.stop()
+    return
+
+
+class WorkerStatusThread(threading.Thread):
+    def __init__(self, status_queue: multiprocessing.Queue, amqp, callback, check_callback, log,
+                 check_seconds: float = 2.0):
+        threading.Thread.__init__(self, daemon=True)
+        self.name = 'WorkerStatus'
+        self.log = log.getChild(self.name)
+        self.status_queue = status_queue
+        self.amqp = amqp
+        self.callback = callback
+        # Called every check_seconds so the farm can notice workers that died, busy or not.
+        self.check_callback = check_callback
+        self.check_seconds = check_seconds
+
+        self.is_done = False
+        self.log.debug('Initialized')
+        return
+
+    def run(self):
+        next_check = time.time() + self.check_seconds
+        while not self.is_done:
+            try:
+                worker_id, status = self.status_queue.get(block=True, timeout=0.5)
+            except queue.Empty:
+                worker_id, status = None, None
+
+            # Hand everything to the connection thread, it owns the AMQP channel and the
+            # worker bookkeeping.
+            if worker_id is not None:
+                while not self.amqp.is_open and not self.is_done:
+                    time.sleep(0.1)
+                if not self.is_done:
+                    self.amqp.call_later_threadsafe(
+                        functools.partial(self.callback, worker_id, status))
+            if time.time() >= next_check:
+                next_check = time.time() + self.check_seconds
+                if self.amqp.is_open and not self.is_done:
+                    self.amqp.call_later_threadsafe(self.check_callback)
+        return
+
+    def stop(self):
+        self.is_done = True
+        return
+
+
+class GeneratorFarm(GeneratorLogic):
+    def __init__(self, options):
+        # Only consume the live generator queue while a worker is idle, start with none.
+        self.is_consuming_requests = False
+        super().__init__(config_file=options.config,
+                         printout=options.printout,
+                         debug=options.debug,
+                         fulldebug=options.fulldebug,
+                         logfile=options.logfile,
+                         domain=options.domain)
+
+        self.options = options
+        self.workers = dict()
+        self.idle_workers = list()
+
+        # Workers are spawned rather than forked so they start without our logging handlers,
+        # AMQP connection or physics clients.
+        self.mp_context = multiprocessing.get_context('spawn')
+        self.status_queue = self.mp_context.Queue()
+        for worker_id in range(options.workers):
+            self._start_worker(worker_id=worker_id)
+
+        self.status_thread = WorkerStatusThread(status_queue=self.status_queue,
+                                                amqp=self.amqp,
+                                                callback=self.on_worker_status,
+                                                check_callback=self.check_workers,
+                                                log=self.log)
+        return
+
+    @staticmethod
+    def _build_config_parser():
+        return GeneratorAgent._build_config_parser()
+
+    def _start_worker(self, worker_id: int):
+        control_queue = '{}.worker.{}'.format(objects.GENERATOR_RPC_QUEUE, str(uuid.uuid4().hex))
+        process = self.mp_context.Process(target=run_generator_worker,
+                                          args=(self.options, worker_id, control_queue,
+                                                self.status_queue),
+                                          daemon=True)
+        process.start()
+        self.workers[worker_id] = {'process': process, 'control_queue': control_queue}
+        self.log.info('Started generator worker {} (pid {})'.format(worker_id, process.pid))
+        return
+
+    def _subscribe_generator_queue(self):
+        # The farm always answers novelty descriptions, the live generator queue is handled by
+        # _update_generator_subscription() as workers come and go.
+        self.log.debug('_subscribe_generator_queue()')
+        self.amqp.setup_subscribe_to_queue(
+            queue_name=objects.NOVELTY_DESC_RPC_QUEUE,
+            queue_durable=True,
+            queue_exclusive=False,
+            queue_auto_delete=False,
+            casas_events=True,
+            callback_function=self.on_novelty_description_request,
+            auto_ack=False,
+            callback_full_params=True,
+            prefetch_count=self.novelty_prefetch_count,
+            ack_batch_size=self.ack_batch_size)
+        return
+
+    def _update_generator_subscription(self):
+        if len(self.idle_workers) > 0 and not self.is_consuming_requests:
+            self.log.debug('Consuming generator requests')
+            self.amqp.setup_subscribe_to_queue(
+                queue_name=objects.LIVE_GENERATOR_QUEUES[self.domain],
+                queue_durable=True,
+                queue_exclusive=False,
+                queue_auto_delete=False,
+                casas_events=True,
+                callback_function=self.on_generator_request,
+                auto_ack=False,
+                callback_full_params=True,
+                prefetch_count=1)
+            self.is_consuming_requests = True
+        elif len(self.idle_workers) == 0 and self.is_consuming_requests:
+            # Leave requests on the queue for other generators until a worker frees up.
+            self.log.debug('All workers busy, pausing generator requests')
+            self.amqp.remove_subscribe_to_queue(
+                queue_name=objects.LIVE_GENERATOR_QUEUES[self.domain])
+            self.is_consuming_requests = False
+        return
+
+    def _reset_timeout(self):
+        # Episode timeouts belong to the workers.
+        return
+
+    def on_worker_status(self, worker_id: int, status: str):
+        self.log.debug('on_worker_status( {}, {} )'.format(worker_id, status))
+        if status == 'idle' and worker_id not in self.idle_workers:
+            self.idle_workers.append(worker_id)
+        self._update_generator_subscription()
+        return
+
+    def check_workers(self):
+        # Restart every worker process that has exited, including one that died in the middle
+        # of an episode and so will never report itself idle again.
+        restarted = False
+        for worker_id in list(self.workers):
+            process = self.workers[worker_id]['process']
+            if not process.is_alive():
+                self.log.error('Generator worker {} (pid {}) exited with code {}, restarting '
+                               'it'.format(worker_id, process.pid, process.exitcode))
+                # The new worker listens on a new control queue, it reports idle once that exists.
+                if worker_id in self.idle_workers:
+                    self.idle_workers.remove(worker_id)
+                self._start_worker(worker_id=worker_id)
+                restarted = True
+        if restarted:
+            self._update_generator_subscription()
+        return
+
+    def on_generator_request(self, ch, method, props, body, request):
+        self.log.info('on_generator_request( {} )'.format(str(request)))
+
+        if isinstance(request, objects.StartGenerator):
+            worker_id = None
+            while worker_id is None and len(self.idle_workers) > 0:
+                worker_id = self.idle_workers.pop(0)
+                if not self.workers[worker_id]['process'].is_alive():
+                    self.log.error('Generator worker {} died, restarting it'.format(worker_id))
+                    self._start_worker(worker_id=worker_id)
+                    worker_id = None
+
+            if worker_id is None:
+                # Nobody can take it right now, put it back for whoever frees up first.
+                self.log.warning('No idle generator worker, requeueing request')
+                self.amqp.publish_to_queue(queue_name=objects.LIVE_GENERATOR_QUEUES[self.domain],
+                                           casas_object=request,
+                                           correlation_id=props.correlation_id,
+                                           reply_to=props.reply_to)
+            else:
+                # The worker answers the TA1 itself and serves the episode from its own queue.
+                self.log.debug('Sending request to generator worker {}'.format(worker_id))
+                self.amqp.publish_to_queue(queue_name=self.workers[worker_id]['control_queue'],
+                                           casas_object=request,
+                                           correlation_id=props.correlation_id,
+                                           reply_to=props.reply_to)
+            self._update_generator_subscription()
+        return
+
+    def get_novelty_description(self, domain: str, novelty: int, difficulty: str) -> dict:
+        novelty_description = dict()
+        return novelty_description
+
+    def run(self):
+        self.status_thread.start()
+        super().run()
+        return
+
+    def stop(self):
+        self.status_thread.stop()
+        super().stop()
+        for worker_id in self.workers:
+            self.workers[worker_id]['process'].terminate()
+        for worker_id in self.workers:
+            self.workers[worker_id]['process'].join()
         return
 
 
@@ -195,9 +535,21 @@ if __name__ == "__main__":
                       action="store_true",
                       help="Print output to the screen at given logging level.",
                       default=False)
+    parser.add_option("--workers",
+                      dest="workers",
+                      type="int",
+                      help="Number of worker processes serving episodes at the same time, "
+                           "overrides [generator].workers in the config file.")
     (options, args) = parser.parse_args()
     if options.fulldebug:
         options.debug = True
-    agent = GeneratorAgent(options)
+    if options.workers is None:
+        config = GeneratorAgent._build_config_parser()
+        config.read(options.config)
+        options.workers = config.getint('generator', 'workers')
+    if options.workers > 0:
+        agent = GeneratorFarm(options)
+    else:
+        agent = GeneratorAgent(options)
     agent.run()
     agent.stop()
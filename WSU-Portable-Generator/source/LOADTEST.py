@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# Load test for the RabbitMQ consumer settings, run it next to the rabbit container with the
+# generator config:
+#     python3 LOADTEST.py --config=generator.config --prefetch=1,5,20,50 --ack-batch=1,10
+#
+# For every prefetch / ack batch combination it starts the given number of servers answering
+# novelty description requests on a private queue, the way the generator does, then keeps
+# --outstanding requests in flight from one client Connection and prints the requests/second.
+import configparser
+import logging
+import optparse
+import threading
+import time
+import uuid
+
+from objects import rabbitmq
+from objects import objects
+
+
+def build_config_parser():
+    config = configparser.ConfigParser()
+    config.add_section('amqp')
+    config.set("amqp", "user", "username")
+    config.set("amqp", "pass", "password")
+    config.set("amqp", "host", "hostname")
+    config.set("amqp", "vhost", "/")
+    config.set("amqp", "port", "5671")
+    config.set("amqp", "ssl", "True")
+    return config
+
+
+def build_connection(config: configparser.ConfigParser, name: str) -> rabbitmq.Connection:
+    return rabbitmq.Connection(agent_name=name,
+                               amqp_user=config.get("amqp", "user"),
+                               amqp_pass=config.get("amqp", "pass"),
+                               amqp_host=config.get("amqp", "host"),
+                               amqp_port=config.getint("amqp", "port"),
+                               amqp_vhost=config.get("amqp", "vhost"),
+                               amqp_ssl=config.getboolean("amqp", "ssl"))
+
+
+class LoadTestServer(threading.Thread):
+    def __init__(self, config: configparser.ConfigParser, queue_name: str, prefetch_count: int,
+                 ack_batch_size: int, work_seconds: float):
+        threading.Thread.__init__(self)
+        self.name = 'LoadTestServer'
+        self.daemon = True
+        self.work_seconds = work_seconds
+        self.handled = 0
+        self.ready = threading.Event()
+
+        self.amqp = build_connection(config=config, name=self.name)
+        # Called once the queue is declared and we are subscribed to it.
+        self.amqp.set_on_connect_callback(self.ready.set)
+        self.amqp.setup_subscribe_to_queue(queue_name=queue_name,
+                                           queue_durable=False,
+                                           queue_exclusive=False,
+                                           queue_auto_delete=True,
+                                           casas_events=True,
+                                           callback_function=self.on_request,
+                                           auto_ack=False,
+                                           callback_full_params=True,
+                                           prefetch_count=prefetch_count,
+                                           ack_batch_size=ack_batch_size)
+        return
+
+    def on_request(self, ch, method, props, body, request):
+        if self.work_seconds > 0:
+            time.sleep(self.work_seconds)
+        response = objects.NoveltyDescription(novelty_description=dict())
+        self.amqp.publish_to_queue(queue_name=props.reply_to,
+                                   casas_object=response,
+                                   correlation_id=props.correlation_id)
+        self.handled += 1
+        return
+
+    def run(self):
+        self.amqp.run()
+        self.amqp.start_consuming()
+        self.amqp.stop()
+        return
+
+    def stop(self):
+        self.amqp.call_later_threadsafe(self.amqp.stop_consuming)
+        return
+
+
+def measure(config: configparser.ConfigParser, queue_name: str, nb_requests: int,
+            outstanding: int) -> float:
+    amqp = build_connection(config=config, name='LoadTestClient')
+    amqp.run()
+
+    pending = list()
+    sent = 0
+    start = time.time()
+    while sent < nb_requests or len(pending) > 0:
+        while sent < nb_requests and len(pending) < outstanding:
+            request = objects.RequestNoveltyDescription(r_domain=objects.DOMAIN_CARTPOLE,
+                                                        novelty=objects.NOVELTY_200,
+                                                        difficulty=objects.DIFFICULTY_EASY)
+            pending.append(amqp.send_request(casas_object=request,
+                                             queue_name=queue_name,
+                                             declare_server_queue=False))
+            sent += 1
+        # Wait on the oldest, and drop everything else that came back meanwhile.
+        pending[0].result()
+        pending = [x for x in pending if not x.done()]
+    duration = time.time() - start
+
+    amqp.stop()
+    return nb_requests / duration
+
+
+def run_combination(config: configparser.ConfigParser, nb_servers: int, prefetch_count: int,
+                    ack_batch_size: int, work_seconds: float, nb_requests: int,
+                    outstanding: int) -> float:
+    queue_name = 'rpc.loadtest.{}'.format(str(uuid.uuid4().hex))
+    servers = list()
+    for i in range(nb_servers):
+        server = LoadTestServer(config=config,
+                                queue_name=queue_name,
+                                prefetch_count=prefetch_count,
+                                ack_batch_size=ack_batch_size,
+                                work_seconds=work_seconds)
+        server.start()
+        server.ready.wait()
+        servers.append(server)
+
+    rate = measure(config=config,
+                   queue_name=queue_name,
+                   nb_requests=nb_requests,
+                   outstanding=outstanding)
+
+    for server in servers:
+        server.stop()
+    for server in servers:
+        server.join()
+    return rate
+
+
+if __name__ == "__main__":
+    parser = optparse.OptionParser(usage="usage: %prog [options]")
+    parser.add_option("--config",
+                      dest="config",
+                      help="Config file with the [amqp] section to use.",
+                      default="generator.config")
+    parser.add_option("--prefetch",
+                      dest="prefetch",
+                      help="Comma separated prefetch counts to try.",
+                      default="1,2,5,10,20,50")
+    parser.add_option("--ack-batch",
+                      dest="ack_batch",
+                      help="Comma separated ack batch sizes to try.",
+                      default="1,10")
+    parser.add_option("--servers",
+                      dest="servers",
+                      type="int",
+                      help="Number of servers consuming the queue.",
+                      default=1)
+    parser.add_option("--requests",
+                      dest="requests",
+                      type="int",
+                      help="Number of requests to time for each combination.",
+                      default=2000)
+    parser.add_option("--outstanding",
+                      dest="outstanding",
+                      type="int",
+                      help="Number of requests the client keeps in flight.",
+                      default=50)
+    parser.add_option("--work-ms",
+                      dest="work_ms",
+                      type="float",
+                      help="Milliseconds each server spends on a request.",
+                      default=0.0)
+    (options, args) = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    config = build_config_parser()
+    config.read(options.config)
+
+    print('{:>8} {:>9} {:>12}'.format('prefetch', 'ack_batch', 'requests/s'))
+    for prefetch_count in [int(x) for x in options.prefetch.split(',')]:
+        for ack_batch_size in [int(x) for x in options.ack_batch.split(',')]:
+            rate = run_combination(config=config,
+                                   nb_servers=options.servers,
+                                   prefetch_count=prefetch_count,
+                                   ack_batch_size=ack_batch_size,
+                                   work_seconds=options.work_ms / 1000.0,
+                                   nb_requests=options.requests,
+                                   outstanding=options.outstanding)
+            print('{:>8} {:>9} {:>12.1f}'.format(prefetch_count, ack_batch_size, rate))
@@ -38,168 +38,478 @@ import sys
 import threading
 import time
 import uuid
-from psycopg2.extras import Json
+from psycopg2.extras import Json, execute_batch, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
 from objects import rabbitmq
 from objects import objects
 
 
-class LiveGeneratorThread(threading.Thread):
-    def __init__(self, log: logging.Logger, amqp_user: str, amqp_pass: str, amqp_host: str,
-                 amqp_port: str, amqp_vhost: str, amqp_ssl: bool, ta2_response_queue: queue.Queue,
-                 live_output_queue: queue.Queue, domain: str, novelty: int, difficulty: str,
-                 seed: int, trial_novelty: int, day_offset: int, request_timeout: int,
-                 use_image: bool):
-        threading.Thread.__init__(self)
-        self.name = 'LiveGeneratorThread'
-        self.log = log.getChild(self.name)
-        self.amqp_user = amqp_user
-        self.amqp_pass = amqp_pass
-        self.amqp_host = amqp_host
-        self.amqp_port = amqp_port
-        self.amqp_vhost = amqp_vhost
-        self.amqp_ssl = amqp_ssl
-        self.request_timeout = abs(request_timeout - 5)
-        self.ta2_response_queue = ta2_response_queue
-        self.live_output_queue = live_output_queue
-        self.domain = domain
-        self.novelty = novelty
-        self.difficulty = difficulty
-        self.seed = seed
-        self.trial_novelty = trial_novelty
-        self.day_offset = day_offset
-        self.use_image = use_image
-        self.done = False
+class LatencyHistogram:
+    # Upper bounds of the buckets in milliseconds, the last bucket catches everything slower.
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
 
-        if self.domain not in objects.VALID_DOMAINS:
-            raise objects.AiqDataException(value='INVALID DOMAIN!')
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+        return
+
+    def add(self, seconds: float):
+        millis = seconds * 1000.0
+        index = 0
+        while index < len(self.BUCKETS_MS) and millis > self.BUCKETS_MS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total += millis
+        self.count += 1
+        self.max = max(self.max, millis)
+        return
+
+    def __str__(self):
+        if self.count == 0:
+            return 'no samples'
+        buckets = list()
+        lower = 0
+        for index, count in enumerate(self.counts):
+            if count > 0:
+                if index < len(self.BUCKETS_MS):
+                    buckets.append('{}-{}ms: {}'.format(lower, self.BUCKETS_MS[index], count))
+                else:
+                    buckets.append('>{}ms: {}'.format(lower, count))
+            if index < len(self.BUCKETS_MS):
+                lower = self.BUCKETS_MS[index]
+        return '{} samples, mean {:.2f}ms, max {:.2f}ms [{}]'.format(
+            self.count, self.total / self.count, self.max, ', '.join(buckets))
+
+
+class LiveGeneratorSession:
+    """Talks to the generators for the live episodes.  This is driven straight from the TA1 thread
+    with its own connection, so each tick is a single RPC to the generator with no hand off
+    between threads.  The connection and its reply queue stay open from one episode to the next,
+    starting an episode only sends the StartGenerator request.  Neither connection can dispatch
+    while the other is blocked on it, so each one gets a timer that services the other and keeps
+    its heartbeats going.
+    """
+    _KEEPALIVE_SECONDS = 5
+
+    def __init__(self, log: logging.Logger, main_amqp: rabbitmq.Connection, amqp_user: str,
+                 amqp_pass: str, amqp_host: str, amqp_port: str, amqp_vhost: str, amqp_ssl: bool,
+                 amqp_multipart: bool = False):
+        self.name = 'LiveGeneratorSession'
+        self.log = log.getChild(self.name)
+        self.main_amqp = main_amqp
+        self.request_timeout = None
+        self.latency = LatencyHistogram()
+        self.episodes = 0
+        self.connects = 0
+        self._main_timer_id = None
+        self._live_timer_id = None
 
         self.amqp = rabbitmq.Connection(agent_name=self.name,
-                                        amqp_user=self.amqp_user,
-                                        amqp_pass=self.amqp_pass,
-                                        amqp_host=self.amqp_host,
-                                        amqp_port=self.amqp_port,
-                                        amqp_vhost=self.amqp_vhost,
-                                        amqp_ssl=self.amqp_ssl,
-                                        request_timeout=self.request_timeout)
+                                        amqp_user=amqp_user,
+                                        amqp_pass=amqp_pass,
+                                        amqp_host=amqp_host,
+                                        amqp_port=amqp_port,
+                                        amqp_vhost=amqp_vhost,
+                                        amqp_ssl=amqp_ssl,
+                                        multipart=amqp_multipart)
         self.log.debug('Initialized')
         return
 
-    def run(self):
-        self.log.debug('run()')
-        # Start the connection.
+    def connect(self):
+        if self.amqp.is_open:
+            return
+        self.log.debug('connect()')
+        if self.connects > 0:
+            # The connection went away since the last episode, clear it out before starting over.
+            self.amqp.stop()
         self.amqp.run()
+        self.connects += 1
+        # The old timer went with the old connection.
+        self._main_timer_id = None
+        self._keep_main_alive()
+        if self._live_timer_id is None:
+            self._keep_live_alive()
+        return
+
+    def start_episode(self, domain: str, novelty: int, difficulty: str, seed: int,
+                      trial_novelty: int, day_offset: int, request_timeout: int, use_image: bool):
+        self.log.debug('start_episode(domain={}, novelty={}, difficulty={}, seed={})'.format(
+            domain, novelty, difficulty, seed))
+        if domain not in objects.VALID_DOMAINS:
+            raise objects.AiqDataException(value='INVALID DOMAIN!')
+
+        self.connect()
+        self.set_request_timeout(request_timeout=request_timeout)
+        self.latency = LatencyHistogram()
+        self.episodes += 1
 
         # Establish connection to a generator.
-        self.amqp.start_generator(domain=self.domain,
-                                  novelty=self.novelty,
-                                  difficulty=self.difficulty,
-                                  seed=self.seed,
-                                  trial_novelty=self.trial_novelty,
-                                  day_offset=self.day_offset,
+        self.amqp.start_generator(domain=domain,
+                                  novelty=novelty,
+                                  difficulty=difficulty,
+                                  seed=seed,
+                                  trial_novelty=trial_novelty,
+                                  day_offset=day_offset,
                                   request_timeout=self.request_timeout,
-                                  use_image=self.use_image)
+                                  use_image=use_image)
+        return
 
-        # Begin our loop.
-        while not self.done:
-            try:
-                # Try getting a message to send.
-                message = self.ta2_response_queue.get(block=True, timeout=0.2)
-                self.log.debug('message: {}'.format(str(message)))
+    def set_request_timeout(self, request_timeout: int):
+        self.request_timeout = abs(request_timeout - 5)
+        self.amqp.set_request_timeout(request_timeout=self.request_timeout)
+        return
 
-                response = None
-                try:
-                    # If we have a message, we can send it to the generator.
-                    response = self.amqp.send_generator_data(data_request=message)
-                    self.log.debug('response: {}'.format(str(response)))
-                except objects.AiqExperimentException:
-                    self.log.warning('Generator took too long to respond.')
-                    response = objects.ExperimentException(
-                        message=('The generator took more than {} seconds to respond.  '
-                                 'Please restart your experiment.'.format(self.request_timeout)))
-
-                # Put the response in the outgoing queue.
-                self.live_output_queue.put(response)
+    def request_novelty_description(self, domain: str, novelty: int, difficulty: str,
+                                    request_timeout: int) -> rabbitmq.RequestFuture:
+        self.log.debug('request_novelty_description(domain={}, novelty={}, difficulty={})'.format(
+            domain, novelty, difficulty))
+        self.connect()
+        self.set_request_timeout(request_timeout=request_timeout)
+        return self.amqp.request_novelty_description(domain=domain,
+                                                     novelty=novelty,
+                                                     difficulty=difficulty)
+
+    def request(self, message: objects.AiqObject) -> objects.AiqObject:
+        self.log.debug('request({})'.format(str(message)))
+        start = time.time()
+        try:
+            response = self.amqp.send_generator_data(data_request=message)
+        except objects.AiqExperimentException:
+            self.log.warning('Generator took too long to respond.')
+            response = objects.ExperimentException(
+                message=('The generator took more than {} seconds to respond.  '
+                         'Please restart your experiment.'.format(self.request_timeout)))
+        self.latency.add(time.time() - start)
+        self.log.debug('response: {}'.format(str(response)))
+        return response
 
-            except queue.Empty:
-                # If the queue was empty then let amqp do a little work before trying again.
-                self.amqp.process_data_events()
+    def has_step_rpc(self) -> bool:
+        return self.amqp.has_step_rpc()
 
-        # Stop the connection as we exit.
-        self.amqp.stop()
-        self.log.debug('exiting')
+    def end_episode(self):
+        self.log.debug('end_episode()')
+        self.log.info('Live tick latency: {} (episode {}, {} connections)'.format(
+            str(self.latency), self.episodes, self.connects))
+        return
+
+    def _keep_main_alive(self):
+        # Fires while we wait on the generator, the TA1 connection is inside a callback then.
+        if self._main_timer_id is not None:
+            self.main_amqp.process_data_events()
+        self._main_timer_id = self.amqp.call_later(self._KEEPALIVE_SECONDS,
+                                                   self._keep_main_alive)
+        return
+
+    def _keep_live_alive(self):
+        # Fires while TA1 waits on the TA2 or between episodes, our connection is not used then.
+        if self._live_timer_id is not None and self.amqp.is_open:
+            try:
+                self.amqp.process_data_events()
+            except pika.exceptions.AMQPError:
+                # The next episode reconnects, no reason to take the TA1 connection down.
+                self.log.warning('Generator connection failed while idle.')
+        self._live_timer_id = self.main_amqp.call_later(self._KEEPALIVE_SECONDS,
+                                                        self._keep_live_alive)
         return
 
     def stop(self):
         self.log.debug('stop()')
-        self.done = True
+        if self._live_timer_id is not None:
+            self.main_amqp.cancel_call_later(timeout_id=self._live_timer_id)
+            self._live_timer_id = None
+        self._main_timer_id = None
+        # Stop the connection, this drops its timer as well.
+        if self.connects > 0:
+            self.amqp.stop()
+        return
+
+
+class LogMessage:
+    def __init__(self, model_experiment_id: int, action: str, message: str = None,
+                 data_object: dict = None, experiment_trial_id: int = None):
+        self.model_experiment_id = model_experiment_id
+        self.experiment_trial_id = experiment_trial_id
+        self.action = action
+        self.message = message
+        # Serialize now, it is cheaper than a deep copy and the caller may change data_object
+        # before the row is written.
+        self.data_object = None
+        if data_object is not None:
+            self.data_object = objects.json_dumps(data_object)
+        # Keep the time this happened, the row may be written a little later.
+        self.utc_stamp = datetime.datetime.now(tz=pytz.utc)
         return
 
 
-class NoveltyDescriptionThread(threading.Thread):
-    def __init__(self, log: logging.Logger, amqp_user: str, amqp_pass: str, amqp_host: str,
-                 amqp_port: str, amqp_vhost: str, amqp_ssl: bool, response_queue: queue.Queue,
-                 domain: str, novelty: int, difficulty: str, request_timeout: int):
+class ExperimentLogThread(threading.Thread):
+    def __init__(self, log: logging.Logger, db_pool: ThreadedConnectionPool, queue_size: int,
+                 batch_size: int):
         threading.Thread.__init__(self)
-        self.name = 'LiveGeneratorThread'
+        self.name = 'ExperimentLogThread'
+        # Never keep the process alive on our own, TA1.start() flushes us on the way out.
+        self.daemon = True
         self.log = log.getChild(self.name)
-        self.amqp_user = amqp_user
-        self.amqp_pass = amqp_pass
-        self.amqp_host = amqp_host
-        self.amqp_port = amqp_port
-        self.amqp_vhost = amqp_vhost
-        self.amqp_ssl = amqp_ssl
-        self.request_timeout = abs(request_timeout - 5)
-        self.response_queue = response_queue
-        self.domain = domain
-        self.novelty = novelty
-        self.difficulty = difficulty
+        self.db_pool = db_pool
+        self.db_conn = None
+        self.batch_size = max(1, batch_size)
+        self.log_queue = queue.Queue(maxsize=max(1, queue_size))
+        self.stats_lock = threading.Lock()
+        self.stats = dict({'queued': 0,
+                           'written': 0,
+                           'dropped': 0,
+                           'blocked': 0,
+                           'max_depth': 0})
+        self.done = False
+        self.log.debug('Initialized')
+        return
 
-        if self.domain not in objects.VALID_DOMAINS:
-            raise objects.AiqDataException(value='INVALID DOMAIN!')
+    def put(self, msg: LogMessage):
+        """Queues msg to be written, blocking the caller while the queue is full so a slow
+        database pushes back on the experiment instead of growing memory without bounds.
+        """
+        try:
+            self.log_queue.put(msg, block=False)
+        except queue.Full:
+            with self.stats_lock:
+                self.stats['blocked'] += 1
+            self.log.warning('experiment_log queue is full ({} messages), waiting on the '
+                             'database.'.format(self.log_queue.maxsize))
+            self.log_queue.put(msg, block=True)
+        with self.stats_lock:
+            self.stats['queued'] += 1
+            self.stats['max_depth'] = max(self.stats['max_depth'], self.log_queue.qsize())
+        return
 
-        self.amqp = rabbitmq.Connection(agent_name=self.name,
-                                        amqp_user=self.amqp_user,
-                                        amqp_pass=self.amqp_pass,
-                                        amqp_host=self.amqp_host,
-                                        amqp_port=self.amqp_port,
-                                        amqp_vhost=self.amqp_vhost,
-                                        amqp_ssl=self.amqp_ssl,
-                                        request_timeout=self.request_timeout)
-        self.log.debug('Initialized')
+    def get_stats(self) -> dict:
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats['depth'] = self.log_queue.qsize()
+        return stats
+
+    def connect_db(self):
+        while self.db_conn is None or self.db_conn.closed != 0:
+            if self.db_conn is not None:
+                self.db_pool.putconn(self.db_conn, close=True)
+                self.db_conn = None
+            try:
+                self.db_conn = self.db_pool.getconn()
+            except psycopg2.Error as e:
+                self.log.error("Error trying to connect to the database: " + str(e))
+                time.sleep(1)
         return
 
+    @staticmethod
+    def build_row(msg: LogMessage) -> tuple:
+        data_object = None
+        if msg.data_object is not None:
+            # LogMessage already holds the JSON text.
+            data_object = Json(msg.data_object, dumps=lambda json_str: json_str)
+        return (msg.model_experiment_id,
+                msg.utc_stamp,
+                msg.action,
+                msg.message,
+                data_object,
+                msg.experiment_trial_id,)
+
+    def insert_rows(self, rows: list):
+        with self.db_conn:
+            with self.db_conn.cursor() as cr:
+                sql = ('INSERT INTO experiment_log (model_experiment_id, utc_stamp, action, '
+                       'message, object, experiment_trial_id) VALUES %s;')
+                execute_values(cr, sql, rows)
+                self.db_conn.commit()
+        return
+
+    def write_batch(self, batch: list) -> bool:
+        """Writes batch in one INSERT, returns False if it should be retried.
+
+        When the database rejects the rows themselves the batch is written again one row at a
+        time, so a single bad row only loses itself.
+        """
+        try:
+            self.connect_db()
+            self.insert_rows(rows=[self.build_row(msg=msg) for msg in batch])
+            with self.stats_lock:
+                self.stats['written'] += len(batch)
+        except (psycopg2.InterfaceError, psycopg2.OperationalError) as e:
+            self.log.error("{}: {}".format(type(e).__name__, str(e.pgerror)))
+            return False
+        except psycopg2.DatabaseError as e:
+            self.log.error("psycopg2.DatabaseError: " + str(e.pgerror))
+            return self.write_rows(batch=batch)
+        return True
+
+    def write_rows(self, batch: list) -> bool:
+        """Writes batch one INSERT per row, dropping the rows the database rejects. Returns False
+        if the connection was lost and the rest of the batch should be retried.
+        """
+        while len(batch) > 0:
+            msg = batch[0]
+            try:
+                self.connect_db()
+                self.insert_rows(rows=[self.build_row(msg=msg)])
+                with self.stats_lock:
+                    self.stats['written'] += 1
+            except (psycopg2.InterfaceError, psycopg2.OperationalError) as e:
+                self.log.error("{}: {}".format(type(e).__name__, str(e.pgerror)))
+                return False
+            except psycopg2.DatabaseError as e:
+                self.log.error('Dropping the experiment_log row (model_experiment_id={}, '
+                               'action={}): {}'.format(msg.model_experiment_id,
+                                                       msg.action,
+                                                       str(e.pgerror)))
+                with self.stats_lock:
+                    self.stats['dropped'] += 1
+            # Only drop it from the batch once it is handled, so a retry picks up from here.
+            del batch[0]
+        return True
+
     def run(self):
         self.log.debug('run()')
-        # Start the connection.
-        self.amqp.run()
+        batch = list()
+        while not self.done or not self.log_queue.empty() or len(batch) > 0:
+            if len(batch) == 0:
+                try:
+                    batch.append(self.log_queue.get(block=True, timeout=0.2))
+                except queue.Empty:
+                    continue
+            # Grab whatever else is already waiting so it goes out in the same INSERT.
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.log_queue.get(block=False))
+                except queue.Empty:
+                    break
+            if self.write_batch(batch=batch):
+                batch = list()
+                self.log.debug('stats: {}'.format(str(self.get_stats())))
+            else:
+                # Give the database a moment before trying the same batch again.
+                time.sleep(1)
+
+        if self.db_conn is not None:
+            self.db_pool.putconn(self.db_conn)
+            self.db_conn = None
+        self.log.debug('exiting, stats: {}'.format(str(self.get_stats())))
+        return
+
+    def stop(self):
+        """Writes everything still queued and then exits the thread.
+        """
+        self.log.debug('stop()')
+        self.done = True
+        return
 
-        # Make the novelty description request.
-        novelty_description = self.amqp.get_novelty_description(domain=self.domain,
-                                                                novelty=self.novelty,
-                                                                difficulty=self.difficulty)
-        self.response_queue.put(novelty_description)
 
-        # Stop the connection as we exit.
-        self.amqp.stop()
+class DataPrefetchThread(threading.Thread):
+    def __init__(self, log: logging.Logger, db_pool: ThreadedConnectionPool, itersize: int):
+        threading.Thread.__init__(self)
+        self.name = 'DataPrefetchThread'
+        self.daemon = True
+        self.log = log.getChild(self.name)
+        self.db_pool = db_pool
+        self.db_conn = None
+        self.itersize = itersize
+        # Items are (episode_id, from_data_index, to_data_index).
+        self.request_queue = queue.Queue()
+        # Items are (episode_id, dict([data_index] = dict( data stuff ))).
+        self.result_queue = queue.Queue()
+        self.done = False
+        self.log.debug('Initialized')
+        return
+
+    def request(self, episode_id: int, from_data_index: int, to_data_index: int):
+        """Asks for the data rows from_data_index up to (not including) to_data_index, exactly
+        one result is put in result_queue for every request.
+        """
+        self.request_queue.put((episode_id, from_data_index, to_data_index))
+        return
+
+    def connect_db(self):
+        while self.db_conn is None or self.db_conn.closed != 0:
+            if self.db_conn is not None:
+                self.db_pool.putconn(self.db_conn, close=True)
+                self.db_conn = None
+            try:
+                self.db_conn = self.db_pool.getconn()
+            except psycopg2.Error as e:
+                self.log.error("Error trying to connect to the database: " + str(e))
+                time.sleep(1)
+        return
+
+    def load_rows(self, episode_id: int, from_data_index: int, to_data_index: int) -> dict:
+        rows = dict()
+        try:
+            self.connect_db()
+            for row in TA1.stream_data_rows(db_conn=self.db_conn,
+                                            episode_id=episode_id,
+                                            from_data_index=from_data_index,
+                                            to_data_index=to_data_index,
+                                            itersize=self.itersize):
+                rows[row['data_index']] = row
+        except psycopg2.Error as e:
+            # The TA1 loads anything we could not provide itself.
+            self.log.error("psycopg2.Error: " + str(e))
+        return rows
+
+    def run(self):
+        self.log.debug('run()')
+        while not self.done:
+            try:
+                episode_id, from_data_index, to_data_index \
+                    = self.request_queue.get(block=True, timeout=0.2)
+            except queue.Empty:
+                continue
+            rows = self.load_rows(episode_id=episode_id,
+                                  from_data_index=from_data_index,
+                                  to_data_index=to_data_index)
+            self.result_queue.put((episode_id, rows))
+
+        if self.db_conn is not None:
+            self.db_pool.putconn(self.db_conn)
+            self.db_conn = None
         self.log.debug('exiting')
         return
 
     def stop(self):
         self.log.debug('stop()')
+        self.done = True
         return
 
 
-class LogMessage:
-    def __init__(self, model_experiment_id: int, action: str, message: str = None,
-                 data_object: dict = None, experiment_trial_id: int = None):
-        self.model_experiment_id = model_experiment_id
-        self.experiment_trial_id = experiment_trial_id
-        self.action = action
-        self.message = message
-        self.data_object = copy.deepcopy(data_object)
+class EpisodeCatalog:
+    """Flat indexes over the dataset_cache and episode_cache, so finding the dataset of an
+    episode does not have to walk the nested dicts.  Dataset and episode ids never move between
+    datasets, so entries stay valid when the caches are rebuilt.
+    """
+    def __init__(self):
+        # [(domain_id, data_type, novelty, difficulty, trial_novelty)] = dataset_id
+        self.dataset_ids = dict()
+        # [episode_id] = dataset_id
+        self.episode_datasets = dict()
+        return
+
+    def add_dataset(self, domain_id: int, data_type: str, novelty: int, difficulty: str,
+                    trial_novelty: int, dataset_id: int):
+        self.dataset_ids[(domain_id, data_type, novelty, difficulty, trial_novelty)] = dataset_id
+        return
+
+    def get_dataset_id(self, domain_id: int, episode: objects.Episode) -> int:
+        return self.dataset_ids.get((domain_id,
+                                     episode.data_type,
+                                     episode.novelty,
+                                     episode.difficulty,
+                                     episode.trial_novelty))
+
+    def add_episode(self, episode_id: int, dataset_id: int):
+        self.episode_datasets[episode_id] = dataset_id
         return
 
+    def get_episode_dataset_id(self, episode_id: int) -> int:
+        return self.episode_datasets.get(episode_id, -1)
+
 
 class TA1:
     def __init__(self, options):
@@ -305,12 +615,24 @@ class TA1:
         self.db_name = objects.DATABASE_PATTERN.format(config.get('postgresql', 'database'))
         self.log.warning('database: {}'.format(self.db_name))
         self.db_conn = None
+        self.db_pool = None
+        self._db_pool_min = max(1, config.getint("postgresql", "pool_min"))
+        self._db_pool_max = max(self._db_pool_min, config.getint("postgresql", "pool_max"))
+        self._db_reconnect_max_seconds = config.getfloat("postgresql", "reconnect_max_seconds")
+        # Rows written while an episode is running are buffered and flushed in batches of
+        # this many steps, at the end of the episode, or when the experiment is ended.
+        self._DB_WRITE_BUFFER_SIZE = max(1, config.getint("postgresql", "write_buffer_size"))
+        self._log_queue_size = config.getint("postgresql", "log_queue_size")
+        self._log_batch_size = config.getint("postgresql", "log_batch_size")
+        self._DATA_PREFETCH_WINDOW = max(2, config.getint("postgresql", "prefetch_window"))
+        self._DB_ITERSIZE = max(1, config.getint("postgresql", "itersize"))
         self.amqp_user = config.get("amqp", "user")
         self.amqp_pass = config.get("amqp", "pass")
         self.amqp_host = config.get("amqp", "host")
         self.amqp_vhost = config.get("amqp", "vhost")
         self.amqp_port = config.getint("amqp", "port")
         self.amqp_ssl = config.getboolean("amqp", "ssl")
+        self.amqp_multipart = config.getboolean("amqp", "multipart")
         self._AMQP_EXPERIMENT_TIMEOUT = config.getint('sail-on', 'normal_timeout_seconds')
         self._AMQP_EXPERIMENT_TIMEOUT -= 5
         if self.is_testing and not self.is_demo:
@@ -392,10 +714,25 @@ class TA1:
         self.episode_cache = dict()
         # [episode_id] = episode_index
         self.episode_index_cache = dict()
+        # O(1) dataset_id lookups for episodes, see get_episode_handle().
+        self.episode_catalog = EpisodeCatalog()
+        # The episode_cache entry of the episode being played, and that objects.Episode.
+        self._episode_handle = None
+        self._episode_handle_episode = None
         # [domain_id][data_type][novelty][difficulty][trial_novelty] = dict(various dataset things)
         self.dataset_cache = dict()
         # [episode_id][data_index] = dict( data stuff )
         self.data_cache = dict()
+        # Pending writes for the current episode, see flush_db_write_buffer().
+        self._db_write_buffer = None
+        self.clear_db_write_buffer()
+        # [episode_id] = dict( next_index, pending ) for the recorded data being prefetched
+        self._prefetch = dict()
+        # [sequence] = list( reserved ids not yet used )
+        self._db_id_pool = dict({'data_data_id_seq': list(),
+                                 'test_instance_test_instance_id_seq': list()})
+        # [(trial_episode_id, data_id)] = test_instance_id
+        self._test_instance_ids = dict()
         self.domain_cache = list()
         self.domain_ids = dict()
         self.domain_names = dict()
@@ -443,13 +780,13 @@ class TA1:
         self._TEST_WINDOW_PROGRESS = 0
         self._DATA_CACHE_SIZE = 100
         self._DATA_CACHE_RELOAD = 2
+        self._LOG_FLUSH_TIMEOUT = 30
         self._VALID_DATA_TYPES = list(['train', 'test'])
         self._TorN = 0
         self._TorN_OPTIONS = list([0, 0])
         self._SAIL_ON_VISIBILITY = list([0, 1])
-        self._live_thread = None
-        self._ta2_response = queue.Queue()
-        self._live_output = queue.Queue()
+        self._live_episode = False
+        self._live_step_data = None
         self._experiment = None
         self._exper_train_index = None
         self._exper_novelty_index = None
@@ -471,12 +808,33 @@ class TA1:
                                         amqp_ssl=self.amqp_ssl,
                                         request_timeout=self._AMQP_EXPERIMENT_TIMEOUT)
 
+        # Live episodes share one generator connection, it connects on the first one.
+        self._live_generator = LiveGeneratorSession(log=self.log,
+                                                    main_amqp=self.amqp,
+                                                    amqp_user=self.amqp_user,
+                                                    amqp_pass=self.amqp_pass,
+                                                    amqp_host=self.amqp_host,
+                                                    amqp_port=self.amqp_port,
+                                                    amqp_vhost=self.amqp_vhost,
+                                                    amqp_ssl=self.amqp_ssl,
+                                                    amqp_multipart=self.amqp_multipart)
+
         self.subscribe_experiment_queue()
         self.subscribe_sota_queue()
         self.setup_publish_analysis_queue()
 
         self.connect_db()
         self.reconnect_db()
+        # experiment_log rows are written by their own thread and database connection.
+        self._log_thread = ExperimentLogThread(log=self.log,
+                                               db_pool=self.db_pool,
+                                               queue_size=self._log_queue_size,
+                                               batch_size=self._log_batch_size)
+        self._log_thread.start()
+        self._prefetch_thread = DataPrefetchThread(log=self.log,
+                                                   db_pool=self.db_pool,
+                                                   itersize=self._DB_ITERSIZE)
+        self._prefetch_thread.start()
         random.seed(time.time())
         return
 
@@ -489,6 +847,14 @@ class TA1:
         config.set("postgresql", "host", "hostname")
         config.set("postgresql", "port", "port")
         config.set("postgresql", "database", "database")
+        config.set("postgresql", "write_buffer_size", "1000")
+        config.set("postgresql", "log_queue_size", "10000")
+        config.set("postgresql", "log_batch_size", "500")
+        config.set("postgresql", "prefetch_window", "200")
+        config.set("postgresql", "itersize", "100")
+        config.set("postgresql", "pool_min", "1")
+        config.set("postgresql", "pool_max", "4")
+        config.set("postgresql", "reconnect_max_seconds", "30")
         config.add_section("amqp")
         config.set("amqp", "user", "username")
         config.set("amqp", "pass", "password")
@@ -496,6 +862,7 @@ class TA1:
         config.set("amqp", "vhost", "/")
         config.set("amqp", "port", "5671")
         config.set("amqp", "ssl", "True")
+        config.set("amqp", "multipart", "False")
         # For SOTA, we will only accept a connection that can provide a pre-shared
         # username and secret, defined in the config file.
         config.add_section('sota')
@@ -582,88 +949,79 @@ class TA1:
         self.log.debug("start()")
 
         x = True
-        while x:
-            try:
-                self.amqp.run()
-                self.amqp.start_consuming()
-                x = False
-            except KeyboardInterrupt:
-                break
+        try:
+            while x:
+                try:
+                    self.amqp.run()
+                    self.amqp.start_consuming()
+                    x = False
+                except KeyboardInterrupt:
+                    # Do not lose the steps buffered for the running episode.
+                    self.flush_db_write_buffer(errormsgs=list())
+                    break
+        finally:
+            self._live_generator.stop()
+            self._prefetch_thread.stop()
+            # Make sure every queued experiment_log row reaches the database before we exit.
+            self._log_thread.stop()
+            self._log_thread.join(timeout=self._LOG_FLUSH_TIMEOUT)
+            if self._log_thread.is_alive():
+                self.log.error('Gave up writing experiment_log rows, stats: {}'.format(
+                    str(self._log_thread.get_stats())))
+            else:
+                self.db_pool.closeall()
         return
 
-    def connect_db(self):
-        """Creates the psycopg2 connection to the postgres database.
+    def connect_db(self) -> bool:
+        """Takes a working connection to the postgres database from the connection pool, creating
+        the pool first if needed.  Returns False if the database could not be reached.
         """
         self.log.debug("connect_db()")
         try:
-            self.db_conn = psycopg2.connect(database=self.db_name,
-                                            host=self.db_host,
-                                            port=self.db_port,
-                                            user=self.db_user,
-                                            password=self.db_pass)
+            if self.db_pool is None:
+                self.db_pool = ThreadedConnectionPool(minconn=self._db_pool_min,
+                                                      maxconn=self._db_pool_max,
+                                                      database=self.db_name,
+                                                      host=self.db_host,
+                                                      port=self.db_port,
+                                                      user=self.db_user,
+                                                      password=self.db_pass)
+            if self.db_conn is not None:
+                # Our connection went away, let the pool throw it out.
+                self.db_pool.putconn(self.db_conn, close=True)
+                self.db_conn = None
+            # Idle connections in the pool may have died along with ours, so skip those.
+            for _ in range(self._db_pool_max):
+                self.db_conn = self.db_pool.getconn()
+                if self.db_conn.closed == 0:
+                    break
+                self.db_pool.putconn(self.db_conn, close=True)
+                self.db_conn = None
         except psycopg2.Error as e:
-            self.log.error("Error trying to connect to the database: " + str(e.pgerror))
-            time.sleep(1)
-        return
+            self.log.error("Error trying to connect to the database: " + str(e))
+        return self.db_conn is not None and self.db_conn.closed == 0
 
     def reconnect_db(self):
         """This is called when the connection is disconnected while working, only returns once the
-        connection is valid again.
+        connection is valid again.  The wait between attempts backs off exponentially, and the
+        AMQP connection is serviced meanwhile so its heartbeats do not time out.
         """
         self.log.debug("reconnect_db()")
-        while self.db_conn is None:
-            self.connect_db()
-        while self.db_conn.closed != 0:
-            self.connect_db()
+        delay = 0.5
+        while self.db_conn is None or self.db_conn.closed != 0:
+            if self.connect_db():
+                break
+            self.log.warning('Database unavailable, trying again in {} seconds.'.format(delay))
+            if self.amqp.is_open:
+                self.amqp.sleep(duration=delay)
+            else:
+                time.sleep(delay)
+            delay = min(delay * 2, self._db_reconnect_max_seconds)
         return
 
     def log_message(self, msg: LogMessage):
-        try:
-            with self.db_conn:
-                with self.db_conn.cursor() as cr:
-                    self.log.debug('{}   {}   {}'.format(msg.action, msg.message, msg.data_object))
-                    if msg.message is None and msg.data_object is None:
-                        sql = ('INSERT INTO experiment_log (model_experiment_id, action) '
-                               'VALUES (%s, %s) RETURNING experiment_log_id;')
-                        data = (msg.model_experiment_id,
-                                msg.action,)
-                    elif msg.message is not None and msg.data_object is None:
-                        sql = ('INSERT INTO experiment_log (model_experiment_id, action, message) '
-                               'VALUES (%s, %s, %s) RETURNING experiment_log_id;')
-                        data = (msg.model_experiment_id,
-                                msg.action,
-                                msg.message,)
-                    elif msg.message is None and msg.data_object is not None:
-                        sql = ('INSERT INTO experiment_log (model_experiment_id, action, object) '
-                               'VALUES (%s, %s, %s) RETURNING experiment_log_id;')
-                        data = (msg.model_experiment_id,
-                                msg.action,
-                                Json(msg.data_object),)
-                    else:
-                        sql = ('INSERT INTO experiment_log (model_experiment_id, action, message, '
-                               'object) VALUES (%s, %s, %s, %s) RETURNING experiment_log_id;')
-                        data = (msg.model_experiment_id,
-                                msg.action,
-                                msg.message,
-                                Json(msg.data_object),)
-                    self.log.debug(cr.mogrify(sql, data))
-                    cr.execute(sql, data)
-                    self.db_conn.commit()
-                    if msg.experiment_trial_id is not None:
-                        row = cr.fetchone()
-                        if row is not None:
-                            experiment_log_id = row[0]
-                            sql = ('UPDATE experiment_log SET experiment_trial_id=%s '
-                                   'WHERE experiment_log_id=%s;')
-                            data = (msg.experiment_trial_id,
-                                    experiment_log_id)
-                            cr.execute(sql, data)
-                            self.db_conn.commit()
-        except psycopg2.InterfaceError as e:
-            self.log.error("psycopg2.InterfaceError: " + str(e.pgerror))
-            self.reconnect_db()
-        except psycopg2.DatabaseError as e:
-            self.log.error("psycopg2.DatabaseError: " + str(e.pgerror))
+        self.log.debug('{}   {}   {}'.format(msg.action, msg.message, msg.data_object))
+        self._log_thread.put(msg=msg)
         return
 
     def handle_user(self, aiq_username: str, aiq_secret: str, errormsgs: list):
@@ -1087,6 +1445,16 @@ class TA1:
     def add_all_experiment_trials(self, model_experiment_id: int, experiment: objects.Experiment,
                                   errormsgs: list):
         self.log.debug('add_all_experiment_trials()')
+        # Ask for every novelty description up front so the generator works on them together.
+        trial_keys = list()
+        for novelty_group in experiment.novelty_groups:
+            for trial in novelty_group.trials:
+                domain = None
+                if len(trial.episodes) > 0:
+                    domain = trial.episodes[0].domain
+                trial_keys.append((domain, trial.novelty, trial.difficulty))
+        descriptions = self.get_novelty_descriptions(trial_keys=trial_keys)
+
         for novelty_group in experiment.novelty_groups:
             for i, trial in enumerate(novelty_group.trials):
                 # Refresh any needed AMQP heartbeats.
@@ -1095,9 +1463,7 @@ class TA1:
                 domain = None
                 if len(trial.episodes) > 0:
                     domain = trial.episodes[0].domain
-                description = self.get_novelty_description(domain=domain,
-                                                           novelty=trial.novelty,
-                                                           difficulty=trial.difficulty)
+                description = descriptions[(domain, trial.novelty, trial.difficulty)]
                 experiment_trial_id = self.handle_experiment_trial(
                     model_experiment_id=model_experiment_id,
                     novelty_description=description.novelty_description,
@@ -1396,6 +1762,15 @@ class TA1:
                         data = (budget_active,
                                 trial_episode_id,)
                         cr.execute(sql, data)
+                        # Remember any test_instance rows this episode already has, so the
+                        # buffered writes reuse them instead of looking each one up.
+                        self._test_instance_ids = dict()
+                        sql = ('SELECT data_id, test_instance_id FROM test_instance '
+                               'WHERE trial_episode_id=%s;')
+                        data = (trial_episode_id,)
+                        cr.execute(sql, data)
+                        for row in cr.fetchall():
+                            self._test_instance_ids[(trial_episode_id, row[0])] = row[1]
                     self.db_conn.commit()
         except psycopg2.InterfaceError as e:
             self.log.error("psycopg2.InterfaceError: " + str(e.pgerror))
@@ -1408,6 +1783,7 @@ class TA1:
 
     def stop_trial_episode(self, trial_episode_id: int, errormsgs: list):
         self.log.debug('stop_trial_episode(trial_episode_id={})'.format(trial_episode_id))
+        self.flush_db_write_buffer(errormsgs=errormsgs)
         try:
             with self.db_conn:
                 with self.db_conn.cursor() as cr:
@@ -1642,6 +2018,12 @@ class TA1:
                                        ''.format(row[0], row[2], row[1], row[3]))
                         self.dataset_cache[d_id][d_type][novel][d_diff][t_nov][
                             'dataset_id'] = row[0]
+                        self.episode_catalog.add_dataset(domain_id=d_id,
+                                                         data_type=d_type,
+                                                         novelty=novel,
+                                                         difficulty=d_diff,
+                                                         trial_novelty=t_nov,
+                                                         dataset_id=row[0])
                         self.dataset_cache[d_id][d_type][novel][d_diff][t_nov]['episodes'] = row[1]
                         self.dataset_cache[d_id][d_type][novel][d_diff][t_nov]['name'] = row[2]
                         self.dataset_cache[d_id][d_type][novel][d_diff][t_nov]['version'] = row[3]
@@ -2015,6 +2397,8 @@ class TA1:
                         episode_id = row[0]
                         self.episode_cache[dataset_id][episode_index]['episode_id'] = episode_id
                         self.episode_cache[dataset_id][episode_index]['size'] = 0
+                        self.episode_catalog.add_episode(episode_id=episode_id,
+                                                         dataset_id=dataset_id)
 
             # Update the dataset with new episodes value.
             self.update_dataset_episodes(dataset_id=dataset_id,
@@ -2050,6 +2434,8 @@ class TA1:
                     if row is not None:
                         self.episode_cache[dataset_id][episode_index]['episode_id'] = row[0]
                         self.episode_cache[dataset_id][episode_index]['size'] = row[1]
+                        self.episode_catalog.add_episode(episode_id=row[0],
+                                                         dataset_id=dataset_id)
         except psycopg2.InterfaceError as e:
             self.log.error("psycopg2.InterfaceError: " + str(e.pgerror))
             errormsgs.append("Database connection unavailable, please try again in a few minutes")
@@ -2059,30 +2445,45 @@ class TA1:
             errormsgs.append("There were errors gathering the episode IDs.")
         return
 
+    @staticmethod
+    def stream_data_rows(db_conn, episode_id: int, from_data_index: int, to_data_index: int,
+                         itersize: int):
+        """Yields the data rows of episode_id from from_data_index up to (not including)
+        to_data_index in order.  A server side cursor hands them over itersize rows at a time,
+        so long episodes never sit in memory all at once.  psycopg2 parses every JSONB value
+        into a new object, so the rows can be used without copying them.
+        """
+        with db_conn:
+            with db_conn.cursor(name='data_rows_{}'.format(uuid.uuid4().hex)) as cr:
+                cr.itersize = itersize
+                sql = ('SELECT data_index, feature_vector, label, data_id FROM data WHERE '
+                       'episode_id=%s AND data_index>=%s AND data_index<%s '
+                       'ORDER BY data_index;')
+                data = (episode_id,
+                        from_data_index,
+                        to_data_index,)
+                cr.execute(sql, data)
+                for row in cr:
+                    yield dict({'data_index': row[0],
+                                'feature_vector': row[1],
+                                'label': row[2],
+                                'data_id': row[3]})
+
     def load_data_to_cache(self, episode_id: int, at_data_index: int, errormsgs: list):
         self.log.debug('load_data_to_cache( episode_id={}, at_data_index={} )'.format(
             episode_id,
             at_data_index))
         try:
-            with self.db_conn:
-                with self.db_conn.cursor() as cr:
-                    sql = ('SELECT data_index, feature_vector, label, data_id FROM data WHERE '
-                           'episode_id=%s AND data_index BETWEEN %s AND %s '
-                           'ORDER BY data_index;')
-                    data = (episode_id,
-                            at_data_index,
-                            at_data_index + self._DATA_CACHE_SIZE,)
-                    cr.execute(sql, data)
-                    row = cr.fetchone()
-                    if episode_id not in self.data_cache:
-                        self.data_cache[episode_id] = dict()
-                    while row is not None:
-                        self.data_cache[episode_id][row[0]] = dict({
-                            'data_index': row[0],
-                            'feature_vector': copy.deepcopy(row[1]),
-                            'label': copy.deepcopy(row[2]),
-                            'data_id': row[3]})
-                        row = cr.fetchone()
+            if episode_id not in self.data_cache:
+                self.data_cache[episode_id] = dict()
+            # Load _DATA_CACHE_SIZE rows past at_data_index as well.
+            to_data_index = at_data_index + self._DATA_CACHE_SIZE + 1
+            for row in self.stream_data_rows(db_conn=self.db_conn,
+                                             episode_id=episode_id,
+                                             from_data_index=at_data_index,
+                                             to_data_index=to_data_index,
+                                             itersize=self._DB_ITERSIZE):
+                self.data_cache[episode_id][row['data_index']] = row
         except psycopg2.InterfaceError as e:
             self.log.error("psycopg2.InterfaceError: " + str(e.pgerror))
             errormsgs.append("Database connection unavailable, please try again in a few minutes")
@@ -2092,58 +2493,77 @@ class TA1:
             errormsgs.append("There were errors loading data to the cache.")
         return
 
-    def update_episode_size(self, episode_id: int, size: int, errormsgs: list):
-        self.log.debug('update_episode_size(episode_id={}, size={})'.format(episode_id, size))
-        try:
-            with self.db_conn:
-                with self.db_conn.cursor() as cr:
-                    sql = 'UPDATE episode SET size=%s WHERE episode_id=%s'
-                    data = (size,
-                            episode_id,)
-                    cr.execute(sql, data)
-                    self.db_conn.commit()
-        except psycopg2.InterfaceError as e:
-            self.log.error("psycopg2.InterfaceError: " + str(e.pgerror))
-            errormsgs.append("Database connection unavailable, please try again in a few minutes")
-            self.reconnect_db()
-        except psycopg2.DatabaseError as e:
-            self.log.error("psycopg2.DatabaseError: " + str(e.pgerror))
-            errormsgs.append("There were errors updating the episode size..")
+    def prefetch_data(self, episode_id: int, at_data_index: int):
+        """Keeps the next _DATA_PREFETCH_WINDOW rows from at_data_index on loading in the
+        background, asking for more once less than half of the window is left.
+        """
+        if episode_id not in self._prefetch:
+            self._prefetch[episode_id] = dict({'next_index': at_data_index, 'pending': 0})
+        prefetch = self._prefetch[episode_id]
+        if prefetch['next_index'] - at_data_index >= int(self._DATA_PREFETCH_WINDOW / 2):
+            return
+        from_data_index = max(prefetch['next_index'], at_data_index)
+        to_data_index = at_data_index + self._DATA_PREFETCH_WINDOW
+        self.log.debug('prefetch_data( episode_id={}, from={}, to={} )'.format(episode_id,
+                                                                             from_data_index,
+                                                                             to_data_index))
+        self._prefetch_thread.request(episode_id=episode_id,
+                                      from_data_index=from_data_index,
+                                      to_data_index=to_data_index)
+        prefetch['next_index'] = to_data_index
+        prefetch['pending'] += 1
         return
 
-    def create_data_instance(self, episode_id: int, feature_vector: dict, label: dict,
-                             data_index: int, errormsgs: list) -> int:
-        self.log.debug('create_data_instance( episode_id={}, feature_vector={}, label={}, '
-                       'data_index={} )'.format(episode_id,
-                                                str(feature_vector),
-                                                str(label),
-                                                data_index))
-        data_id = -1
-        try:
-            with self.db_conn:
-                with self.db_conn.cursor() as cr:
-                    tmp_fv = copy.deepcopy(feature_vector)
-                    if 'image' in tmp_fv:
-                        del tmp_fv['image']
-                    sql = ('INSERT INTO data (episode_id, feature_vector, label, data_index) '
-                           'VALUES (%s, %s, %s, %s) RETURNING data_id;')
-                    data = (episode_id,
-                            Json(tmp_fv),
-                            Json(label),
-                            data_index,)
-                    # self.log.debug(cr.mogrify(sql, data))
-                    cr.execute(sql, data)
-                    row = cr.fetchone()
-                    if row is not None:
-                        data_id = row[0]
-        except psycopg2.InterfaceError as e:
-            self.log.error("psycopg2.InterfaceError: " + str(e.pgerror))
-            errormsgs.append("Database connection unavailable, please try again in a few minutes")
-            self.reconnect_db()
-        except psycopg2.DatabaseError as e:
-            self.log.error("psycopg2.DatabaseError: " + str(e.pgerror))
-            errormsgs.append("There were errors inserting the data instance.")
-        return data_id
+    def merge_prefetched_data(self, timeout: float = None):
+        """Moves the rows the prefetch thread has loaded into the data_cache, waiting up to
+        timeout seconds for the first result when timeout is given.
+        """
+        block = timeout is not None
+        while True:
+            try:
+                episode_id, rows = self._prefetch_thread.result_queue.get(block=block,
+                                                                          timeout=timeout)
+            except queue.Empty:
+                break
+            block = False
+            if episode_id not in self._prefetch:
+                # The episode finished while this was loading.
+                continue
+            self._prefetch[episode_id]['pending'] -= 1
+            if episode_id not in self.data_cache:
+                self.data_cache[episode_id] = dict()
+            self.data_cache[episode_id].update(rows)
+        return
+
+    def ensure_data_in_cache(self, episode_id: int, data_index: int, errormsgs: list):
+        """Makes sure data_index is in the data_cache, waiting on the prefetch thread if it is
+        still loading the row and reading it from the database ourselves otherwise.
+        """
+        self.merge_prefetched_data()
+        start = time.time()
+        while data_index not in self.data_cache.get(episode_id, dict()) \
+                and episode_id in self._prefetch and self._prefetch[episode_id]['pending'] > 0 \
+                and abs(time.time() - start) < self._AMQP_EXPERIMENT_TIMEOUT:
+            self.merge_prefetched_data(timeout=0.2)
+            self.amqp.process_data_events()
+        if data_index not in self.data_cache.get(episode_id, dict()):
+            self.log.warning('Data for episode_id={} data_index={} was not prefetched.'.format(
+                episode_id, data_index))
+            self.load_data_to_cache(episode_id=episode_id,
+                                    at_data_index=data_index,
+                                    errormsgs=errormsgs)
+            if episode_id in self._prefetch:
+                self._prefetch[episode_id]['next_index'] = max(
+                    self._prefetch[episode_id]['next_index'],
+                    data_index + self._DATA_CACHE_SIZE + 1)
+        return
+
+    def release_episode_data(self, episode_id: int):
+        """Forgets the cached and prefetched rows of a finished episode.
+        """
+        self._prefetch.pop(episode_id, None)
+        self.data_cache.pop(episode_id, None)
+        return
 
     def create_test_instance(self, data_id: int, trial_episode_id: int, errormsgs: list):
         self.log.debug('create_test_instance( data_id={}, trial_episode_id={} )'.format(
@@ -2242,6 +2662,198 @@ class TA1:
             errormsgs.append("There were errors inserting the test_label.")
         return
 
+    def reserve_sequence_ids(self, sequence: str, errormsgs: list) -> list:
+        self.log.debug('reserve_sequence_ids(sequence={})'.format(sequence))
+        ids = list()
+        try:
+            with self.db_conn:
+                with self.db_conn.cursor() as cr:
+                    # Sequences are not transactional, so these ids stay ours even if the rows
+                    # using them are written much later (or never).
+                    sql = 'SELECT nextval(%s) FROM generate_series(1, %s);'
+                    data = (sequence,
+                            self._DB_WRITE_BUFFER_SIZE,)
+                    cr.execute(sql, data)
+                    ids = [row[0] for row in cr.fetchall()]
+        except psycopg2.InterfaceError as e:
+            self.log.error("psycopg2.InterfaceError: " + str(e.pgerror))
+            errormsgs.append("Database connection unavailable, please try again in a few minutes")
+            self.reconnect_db()
+        except psycopg2.DatabaseError as e:
+            self.log.error("psycopg2.DatabaseError: " + str(e.pgerror))
+            errormsgs.append("There were errors reserving ids from {}.".format(sequence))
+        return ids
+
+    def next_sequence_id(self, sequence: str, errormsgs: list):
+        if len(self._db_id_pool[sequence]) == 0:
+            self._db_id_pool[sequence] = self.reserve_sequence_ids(sequence=sequence,
+                                                                   errormsgs=errormsgs)
+            # Hand them out in the order the sequence gave them to us.
+            self._db_id_pool[sequence].reverse()
+        if len(self._db_id_pool[sequence]) == 0:
+            return None
+        return self._db_id_pool[sequence].pop()
+
+    def buffer_data_instance(self, episode_id: int, feature_vector: dict, label: dict,
+                             data_index: int, errormsgs: list) -> int:
+        self.log.debug('buffer_data_instance( episode_id={}, data_index={} )'.format(episode_id,
+                                                                                      data_index))
+        data_id = self.next_sequence_id(sequence='data_data_id_seq',
+                                        errormsgs=errormsgs)
+        if data_id is None:
+            return None
+        tmp_fv = dict(feature_vector)
+        if 'image' in tmp_fv:
+            del tmp_fv['image']
+        self._db_write_buffer['data'].append((data_id,
+                                              episode_id,
+                                              Json(tmp_fv),
+                                              Json(label),
+                                              data_index,))
+        return data_id
+
+    def buffer_episode_size(self, episode_id: int, size: int):
+        self._db_write_buffer['episode_size'][episode_id] = size
+        return
+
+    def buffer_test_instance(self, data_id: int, trial_episode_id: int, errormsgs: list):
+        self.log.debug('buffer_test_instance( data_id={}, trial_episode_id={} )'.format(
+            data_id, trial_episode_id))
+        key = (trial_episode_id, data_id)
+        if key in self._test_instance_ids:
+            return self._test_instance_ids[key]
+        test_instance_id = self.next_sequence_id(sequence='test_instance_test_instance_id_seq',
+                                                 errormsgs=errormsgs)
+        if test_instance_id is None:
+            return None
+        self._test_instance_ids[key] = test_instance_id
+        self._db_write_buffer['test_instance'][test_instance_id] = dict({
+            'trial_episode_id': trial_episode_id,
+            'data_id': data_id,
+            'utc_stamp_sent': datetime.datetime.now(tz=pytz.utc),
+            'utc_stamp_received': None,
+            'utc_remote_stamp_arrived': None,
+            'utc_remote_stamp_replied': None})
+        return test_instance_id
+
+    def buffer_test_instance_stamps(self, test_instance_id: int,
+                                    remote_stamp_arrived: datetime.datetime,
+                                    remote_stamp_delivered: datetime.datetime):
+        stamp_received = datetime.datetime.now(tz=pytz.utc)
+        if test_instance_id in self._db_write_buffer['test_instance']:
+            row = self._db_write_buffer['test_instance'][test_instance_id]
+            row['utc_stamp_received'] = stamp_received
+            row['utc_remote_stamp_arrived'] = remote_stamp_arrived
+            row['utc_remote_stamp_replied'] = remote_stamp_delivered
+        elif test_instance_id is not None:
+            # The row was already flushed, so update it with the next flush instead.
+            self._db_write_buffer['test_instance_stamps'].append((stamp_received,
+                                                                  remote_stamp_arrived,
+                                                                  remote_stamp_delivered,
+                                                                  test_instance_id,))
+        return
+
+    def buffer_test_label(self, test_instance_id: int, label_prediction: dict,
+                          performance: float, feedback: dict = None):
+        if test_instance_id is None:
+            # We could not reserve the test_instance row, so there is nothing to label.
+            return
+        if feedback is not None:
+            feedback = Json(feedback)
+        self._db_write_buffer['test_label'].append((test_instance_id,
+                                                    Json(label_prediction),
+                                                    performance,
+                                                    feedback,))
+        return
+
+    def flush_db_write_buffer(self, errormsgs: list):
+        buffer = self._db_write_buffer
+        self.log.debug('flush_db_write_buffer(data={}, test_instance={}, test_label={})'
+                       .format(len(buffer['data']),
+                               len(buffer['test_instance']),
+                               len(buffer['test_label'])))
+        if len(buffer['data']) == 0 and len(buffer['test_instance']) == 0 \
+                and len(buffer['test_label']) == 0 and len(buffer['test_instance_stamps']) == 0 \
+                and len(buffer['episode_size']) == 0:
+            return
+        # A lost connection is retried once we are reconnected, the rows stay buffered meanwhile.
+        retries = 1
+        while True:
+            try:
+                with self.db_conn:
+                    with self.db_conn.cursor() as cr:
+                        if len(buffer['data']) > 0:
+                            sql = ('INSERT INTO data (data_id, episode_id, feature_vector, label, '
+                                   'data_index) VALUES %s;')
+                            execute_values(cr, sql, buffer['data'])
+                        if len(buffer['test_instance']) > 0:
+                            sql = ('INSERT INTO test_instance (test_instance_id, trial_episode_id, '
+                                   'data_id, utc_stamp_sent, utc_stamp_received, '
+                                   'utc_remote_stamp_arrived, utc_remote_stamp_replied) VALUES %s;')
+                            data = list()
+                            for test_instance_id, row in buffer['test_instance'].items():
+                                data.append((test_instance_id,
+                                             row['trial_episode_id'],
+                                             row['data_id'],
+                                             row['utc_stamp_sent'],
+                                             row['utc_stamp_received'],
+                                             row['utc_remote_stamp_arrived'],
+                                             row['utc_remote_stamp_replied'],))
+                            execute_values(cr, sql, data)
+                        if len(buffer['test_instance_stamps']) > 0:
+                            sql = ('UPDATE test_instance SET utc_stamp_received=%s, '
+                                   'utc_remote_stamp_arrived=%s, utc_remote_stamp_replied=%s '
+                                   'WHERE test_instance_id=%s;')
+                            execute_batch(cr, sql, buffer['test_instance_stamps'])
+                        if len(buffer['test_label']) > 0:
+                            sql = ('INSERT INTO test_label (test_instance_id, label_prediction, '
+                                   'performance, feedback) VALUES %s;')
+                            execute_values(cr, sql, buffer['test_label'])
+                        if len(buffer['episode_size']) > 0:
+                            sql = 'UPDATE episode SET size=%s WHERE episode_id=%s;'
+                            data = [(size, episode_id)
+                                    for episode_id, size in buffer['episode_size'].items()]
+                            execute_batch(cr, sql, data)
+                        self.db_conn.commit()
+                self.clear_db_write_buffer()
+                break
+            except (psycopg2.InterfaceError, psycopg2.OperationalError) as e:
+                self.log.error("{}: {}".format(type(e).__name__, str(e.pgerror)))
+                self.reconnect_db()
+                if retries == 0:
+                    # Keep the rows so the next flush can write them.
+                    errormsgs.append("Database connection unavailable, please try again in a "
+                                     "few minutes")
+                    break
+                retries -= 1
+            except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                # Writing the same rows again will fail the same way, so drop them.
+                self.log.error("{}: {}".format(type(e).__name__, str(e.pgerror)))
+                self.log.error('Dropping the buffered rows: data_ids={}, test_instance_ids={}, '
+                               '{} test_instance stamps, {} test_labels, episode sizes={}'
+                               .format([row[0] for row in buffer['data']],
+                                       list(buffer['test_instance']),
+                                       len(buffer['test_instance_stamps']),
+                                       len(buffer['test_label']),
+                                       buffer['episode_size']))
+                errormsgs.append("There were errors writing the buffered episode data.")
+                self.clear_db_write_buffer()
+                break
+            except psycopg2.DatabaseError as e:
+                # Not the rows themselves, keep them for the next flush.
+                self.log.error("psycopg2.DatabaseError: " + str(e.pgerror))
+                errormsgs.append("There were errors writing the buffered episode data.")
+                break
+        return
+
+    def clear_db_write_buffer(self):
+        self._db_write_buffer = dict({'data': list(),
+                                      'test_instance': dict(),
+                                      'test_instance_stamps': list(),
+                                      'test_label': list(),
+                                      'episode_size': dict()})
+        return
+
     def insert_sota_experiment(self, domain_id: int, model_experiment_id: int,
                                experiment: objects.Experiment, vhost: str, errormsgs: list):
         self.log.debug('insert_sota_experiment(domain_id={}, model_experiment_id={}, vhost={}, '
@@ -2352,15 +2964,23 @@ class TA1:
             score = float(sum(self.rolling_score)) / float(self.episode_data_total)
         return score
 
-    def get_episode_dataset_id(self, episode_id: int, episode_index: int):
-        self.log.debug('get_episode_dataset_id({}, {})'.format(episode_id, episode_index))
-        dataset_id = -1
-        for d_id_key in list(self.episode_cache.keys()):
-            if episode_index in self.episode_cache[d_id_key]:
-                if self.episode_cache[d_id_key][episode_index]['episode_id'] == episode_id:
-                    dataset_id = d_id_key
-                    break
-        return dataset_id
+    def get_episode_dataset_id(self, episode_id: int):
+        self.log.debug('get_episode_dataset_id({})'.format(episode_id))
+        return self.episode_catalog.get_episode_dataset_id(episode_id=episode_id)
+
+    def get_episode_handle(self, episode: objects.Episode) -> dict:
+        """Returns the episode_cache entry for episode, holding its episode_id, size, data_index
+        and test_instance_id.  It is looked up once and then reused for the rest of the episode.
+        """
+        if self._episode_handle_episode is not episode:
+            dataset_id = self.episode_catalog.get_dataset_id(
+                domain_id=self.domain_ids[episode.domain],
+                episode=episode)
+            self.add_episode_to_cache(dataset_id=dataset_id,
+                                      episode_index=episode.episode_index)
+            self._episode_handle = self.episode_cache[dataset_id][episode.episode_index]
+            self._episode_handle_episode = episode
+        return self._episode_handle
 
     def calculate_episode_numbers_for_domain(self, domain_id: int, data_type: str, novelty: int,
                                              difficulty: str, trial_novelty: int, novelty_p: float,
@@ -3046,6 +3666,7 @@ class TA1:
             # listening to the other "general" queues.
             self.private_queue = objects.SERVER_RPC_QUEUE + '.{}'.format(uuid.uuid4().hex)
             experiment_response.server_rpc_queue = self.private_queue
+            experiment_response.step_rpc = True
             self.amqp.setup_subscribe_to_queue(
                 queue_name=self.private_queue,
                 queue_exclusive=True,
@@ -3268,7 +3889,8 @@ class TA1:
                     server_rpc_queue=self.private_queue,
                     experiment_secret=request.experiment_secret,
                     model_experiment_id=self.model_experiment_id,
-                    experiment_timeout=self._AMQP_EXPERIMENT_TIMEOUT)
+                    experiment_timeout=self._AMQP_EXPERIMENT_TIMEOUT,
+                    step_rpc=True)
         else:
             errormsgs.append('This queue is only for requesting to start an experiment.')
 
@@ -3490,6 +4112,7 @@ class TA1:
                         self.private_queue = objects.SERVER_RPC_QUEUE + '.{}'.format(
                             uuid.uuid4().hex)
                         response.server_rpc_queue = self.private_queue
+                        response.step_rpc = True
                         self.amqp.setup_subscribe_to_queue(
                             queue_name=self.private_queue,
                             queue_exclusive=True,
@@ -3640,7 +4263,8 @@ class TA1:
                         server_rpc_queue=self.private_queue,
                         experiment_secret=request.experiment_secret,
                         model_experiment_id=self.model_experiment_id,
-                        experiment_timeout=self._AMQP_EXPERIMENT_TIMEOUT)
+                        experiment_timeout=self._AMQP_EXPERIMENT_TIMEOUT,
+                        step_rpc=True)
 
                     if self._AMQP_EXP_CALLBACK_ID is not None:
                         self.amqp.cancel_call_later(
@@ -3788,8 +4412,7 @@ class TA1:
                 # Get the next episode_id, episode_index, and dataset_id for the episode.
                 episode_id = self.episode_id_list[self.episode_id_list_index]
                 episode_index = self.episode_index_cache[episode_id]
-                dataset_id = self.get_episode_dataset_id(episode_id=episode_id,
-                                                         episode_index=episode_index)
+                dataset_id = self.get_episode_dataset_id(episode_id=episode_id)
                 # Set the current data_index for the episode to 0.
                 self.episode_cache[dataset_id][episode_index]['data_index'] = 0
                 # Load the episode data to the data_cache.
@@ -3895,8 +4518,7 @@ class TA1:
                 # Get the first episode_id to train and load it from the database.
                 episode_id = self.episode_id_list[self.episode_id_list_index]
                 episode_index = self.episode_index_cache[episode_id]
-                dataset_id = self.get_episode_dataset_id(episode_id=episode_id,
-                                                         episode_index=episode_index)
+                dataset_id = self.get_episode_dataset_id(episode_id=episode_id)
                 # Set the current data_index for the episode to 0.
                 self.episode_cache[dataset_id][episode_index]['data_index'] = 0
                 # Load the episode data to the data_cache.
@@ -3912,8 +4534,7 @@ class TA1:
                 # Get the next episode_id, episode_index, and dataset_id for the episode.
                 episode_id = self.episode_id_list[self.episode_id_list_index]
                 episode_index = self.episode_index_cache[episode_id]
-                dataset_id = self.get_episode_dataset_id(episode_id=episode_id,
-                                                         episode_index=episode_index)
+                dataset_id = self.get_episode_dataset_id(episode_id=episode_id)
                 # Set the current data_index for the episode to 0.
                 self.episode_cache[dataset_id][episode_index]['data_index'] = 0
                 # Load the episode data to the data_cache.
@@ -3999,8 +4620,7 @@ class TA1:
                 # Get the next episode_id, episode_index, and dataset_id for the episode.
                 episode_id = self.episode_id_list[self.episode_id_list_index]
                 episode_index = self.episode_index_cache[episode_id]
-                dataset_id = self.get_episode_dataset_id(episode_id=episode_id,
-                                                         episode_index=episode_index)
+                dataset_id = self.get_episode_dataset_id(episode_id=episode_id)
                 data_index = self.episode_cache[dataset_id][episode_index]['data_index']
                 data_id = self.data_cache[episode_id][data_index]['data_id']
                 test_instance_id = self.create_test_instance(
@@ -4022,8 +4642,7 @@ class TA1:
                 # Get the next episode_id, episode_index, and dataset_id for the episode.
                 episode_id = self.episode_id_list[self.episode_id_list_index]
                 episode_index = self.episode_index_cache[episode_id]
-                dataset_id = self.get_episode_dataset_id(episode_id=episode_id,
-                                                         episode_index=episode_index)
+                dataset_id = self.get_episode_dataset_id(episode_id=episode_id)
                 data_index = self.episode_cache[dataset_id][episode_index]['data_index']
                 dataset_size = self.episode_cache[dataset_id][episode_index]['size']
                 test_instance_id \
@@ -4089,8 +4708,7 @@ class TA1:
                 # Get the next episode_id, episode_index, and dataset_id for the episode.
                 episode_id = self.episode_id_list[self.episode_id_list_index]
                 episode_index = self.episode_index_cache[episode_id]
-                dataset_id = self.get_episode_dataset_id(episode_id=episode_id,
-                                                         episode_index=episode_index)
+                dataset_id = self.get_episode_dataset_id(episode_id=episode_id)
                 data_index = self.episode_cache[dataset_id][episode_index]['data_index']
                 data_id = self.data_cache[episode_id][data_index]['data_id']
                 test_instance_id = self.create_test_instance(
@@ -4113,8 +4731,7 @@ class TA1:
                 # Get the next episode_id, episode_index, and dataset_id for the episode.
                 episode_id = self.episode_id_list[self.episode_id_list_index]
                 episode_index = self.episode_index_cache[episode_id]
-                dataset_id = self.get_episode_dataset_id(episode_id=episode_id,
-                                                         episode_index=episode_index)
+                dataset_id = self.get_episode_dataset_id(episode_id=episode_id)
                 data_index = self.episode_cache[dataset_id][episode_index]['data_index']
                 dataset_size = self.episode_cache[dataset_id][episode_index]['size']
                 test_instance_id \
@@ -4198,8 +4815,7 @@ class TA1:
             # Get the next episode_id, episode_index, and dataset_id for the episode.
             episode_id = self.episode_id_list[self.episode_id_list_index]
             episode_index = self.episode_index_cache[episode_id]
-            dataset_id = self.get_episode_dataset_id(episode_id=episode_id,
-                                                     episode_index=episode_index)
+            dataset_id = self.get_episode_dataset_id(episode_id=episode_id)
             # Get the current data_index for the episode.
             data_index = self.episode_cache[dataset_id][episode_index]['data_index']
             # Load the episode data to the data_cache.
@@ -4217,83 +4833,78 @@ class TA1:
 
     def get_novelty_description(self, domain: str, novelty: int, difficulty: str) -> \
             objects.NoveltyDescription:
-        response_queue = queue.Queue()
-        tmp_thread = NoveltyDescriptionThread(log=self.log,
-                                              amqp_user=self.amqp_user,
-                                              amqp_pass=self.amqp_pass,
-                                              amqp_host=self.amqp_host,
-                                              amqp_port=self.amqp_port,
-                                              amqp_vhost=self.amqp_vhost,
-                                              amqp_ssl=self.amqp_ssl,
-                                              response_queue=response_queue,
-                                              domain=domain,
-                                              novelty=novelty,
-                                              difficulty=difficulty,
-                                              request_timeout=self._AMQP_EXPERIMENT_TIMEOUT)
-        tmp_thread.start()
-        start = time.time()
-        done = False
-        response = None
-        while abs(time.time() - start) < self._AMQP_EXPERIMENT_TIMEOUT and not done:
-            try:
-                response = response_queue.get(block=True, timeout=2.0)
-                done = True
-            except queue.Empty:
-                self.amqp.process_data_events()
-        tmp_thread.stop()
-        tmp_thread.join()
-        del tmp_thread
-        del response_queue
-        return response
+        trial_key = (domain, novelty, difficulty)
+        return self.get_novelty_descriptions(trial_keys=[trial_key])[trial_key]
 
-    def prepare_episode(self, episode: objects.Episode, errormsgs: list):
+    def get_novelty_descriptions(self, trial_keys: list) -> dict:
+        """Fetches the novelty descriptions for a list of (domain, novelty, difficulty) tuples,
+        with all of the requests outstanding at once.  Returns a dict keyed by those tuples, with
+        an empty NoveltyDescription for any the generator did not answer in time.
+        """
+        futures = dict()
+        for trial_key in trial_keys:
+            if trial_key not in futures:
+                futures[trial_key] = self._live_generator.request_novelty_description(
+                    domain=trial_key[0],
+                    novelty=trial_key[1],
+                    difficulty=trial_key[2],
+                    request_timeout=self._AMQP_EXPERIMENT_TIMEOUT)
+
+        descriptions = dict()
+        for trial_key, future in futures.items():
+            description = None
+            try:
+                description = future.result()
+            except objects.AiqExperimentException:
+                pass
+            if not isinstance(description, objects.NoveltyDescription):
+                self.log.warning('No novelty description for {}.'.format(str(trial_key)))
+                description = objects.NoveltyDescription(novelty_description=dict())
+            descriptions[trial_key] = description
+        return descriptions
+
+    def prepare_episode(self, episode: objects.Episode, errormsgs: list,
+                        next_episode: objects.Episode = None):
         self.log.debug('prepare_episode(episode={})'.format(str(episode)))
         # Check if recorded or live training episode.
         if episode.data_type in [objects.DTYPE_TRAIN, objects.DTYPE_TEST]:
             self.log.info('prepare_episode({})'.format(str(episode)))
             # Get the next episode_id, episode_index, and dataset_id for the episode.
-            domain_id = self.domain_ids[episode.domain]
-            dataset_id = self.dataset_cache[domain_id][episode.data_type][episode.novelty][
-                episode.difficulty][episode.trial_novelty]['dataset_id']
-            self.get_episode_ids(dataset_id=dataset_id,
+            self._episode_handle_episode = None
+            handle = self.get_episode_handle(episode=episode)
+            self.get_episode_ids(dataset_id=handle['dataset_id'],
                                  episode_index=episode.episode_index,
                                  errormsgs=errormsgs)
-            episode_id = self.episode_cache[dataset_id][episode.episode_index]['episode_id']
+            episode_id = handle['episode_id']
             episode.episode_id = episode_id
             # Set the current data_index for the episode to 0.
-            self.episode_cache[dataset_id][episode.episode_index]['data_index'] = 0
-            self.episode_data_total = self.episode_cache[dataset_id][episode.episode_index]['size']
+            handle['data_index'] = 0
+            self.episode_data_total = handle['size']
             del self.rolling_score
             self.rolling_score = list()
-            # Load the episode data to the data_cache.
-            self.load_data_to_cache(
-                episode_id=episode_id,
-                at_data_index=0,
-                errormsgs=errormsgs)
+            # Load the episode data to the data_cache, usually already prefetched.
+            self.ensure_data_in_cache(episode_id=episode_id,
+                                      data_index=0,
+                                      errormsgs=errormsgs)
+            self.prefetch_data(episode_id=episode_id,
+                               at_data_index=0)
+            # Warm up the start of the next episode while this one is played.
+            if next_episode is not None and next_episode.episode_id is not None \
+                    and next_episode.data_type in [objects.DTYPE_TRAIN, objects.DTYPE_TEST]:
+                self.prefetch_data(episode_id=next_episode.episode_id,
+                                   at_data_index=0)
         elif episode.data_type in [objects.DTYPE_LIVE_TRAIN, objects.DTYPE_LIVE_TEST]:
             self.episode_data_count = 0
-            del self._ta2_response
-            self._ta2_response = queue.Queue()
-            del self._live_output
-            self._live_output = queue.Queue()
-            self._live_thread = LiveGeneratorThread(log=self.log,
-                                                    amqp_user=self.amqp_user,
-                                                    amqp_pass=self.amqp_pass,
-                                                    amqp_host=self.amqp_host,
-                                                    amqp_port=self.amqp_port,
-                                                    amqp_vhost=self.amqp_vhost,
-                                                    amqp_ssl=self.amqp_ssl,
-                                                    ta2_response_queue=self._ta2_response,
-                                                    live_output_queue=self._live_output,
-                                                    domain=episode.domain,
-                                                    novelty=episode.novelty,
-                                                    difficulty=episode.difficulty,
-                                                    seed=episode.seed,
-                                                    trial_novelty=episode.trial_novelty,
-                                                    day_offset=episode.day_offset,
-                                                    request_timeout=self._AMQP_EXPERIMENT_TIMEOUT,
-                                                    use_image=episode.use_image)
-            self._live_thread.start()
+            self._live_step_data = None
+            self._live_generator.start_episode(domain=episode.domain,
+                                               novelty=episode.novelty,
+                                               difficulty=episode.difficulty,
+                                               seed=episode.seed,
+                                               trial_novelty=episode.trial_novelty,
+                                               day_offset=episode.day_offset,
+                                               request_timeout=self._AMQP_EXPERIMENT_TIMEOUT,
+                                               use_image=episode.use_image)
+            self._live_episode = True
             # Get the dataset_id so we can add a new episode.
             domain_id = self.domain_ids[episode.domain]
             """
@@ -4318,6 +4929,7 @@ class TA1:
             # Save the episode_id and episode_index to the episode object.
             episode.episode_index = episode_index
             episode.episode_id = episode_id
+            self._episode_handle_episode = None
         return
 
     def get_episode_data(self, request: objects.RequestData, episode: objects.Episode,
@@ -4326,28 +4938,24 @@ class TA1:
         data = objects.AiqObject()
         # Check if recorded or live training episode.
         if episode.data_type in [objects.DTYPE_TRAIN, objects.DTYPE_TEST]:
-            # Get the episode_id, episode_index, and dataset_id for the episode.
-            domain_id = self.domain_ids[episode.domain]
-            dataset_id = self.dataset_cache[domain_id][episode.data_type][episode.novelty][
-                episode.difficulty][episode.trial_novelty]['dataset_id']
-            self.get_episode_ids(dataset_id=dataset_id,
-                                 episode_index=episode.episode_index,
-                                 errormsgs=errormsgs)
-            episode_id = self.episode_cache[dataset_id][episode.episode_index]['episode_id']
-            episode_index = episode.episode_index
+            # Get the episode_id for the episode, prepare_episode() already looked it up.
+            handle = self.get_episode_handle(episode=episode)
+            episode_id = handle['episode_id']
 
             # Grab the data_index and data_id for the feature vector we will be sending.
             # The data itself should already be in self.data_cache.
-            data_index = self.episode_cache[dataset_id][episode_index]['data_index']
+            data_index = handle['data_index']
+            self.ensure_data_in_cache(episode_id=episode_id,
+                                      data_index=data_index,
+                                      errormsgs=errormsgs)
             data_id = self.data_cache[episode_id][data_index]['data_id']
-            # Create the test_instance row for this evaluation.
-            test_instance_id = self.create_test_instance(
+            # Buffer the test_instance row for this evaluation.
+            test_instance_id = self.buffer_test_instance(
                 data_id=data_id,
                 trial_episode_id=self.trial_episode_id,
                 errormsgs=errormsgs)
             # Store the test_instance_id for use later.
-            self.episode_cache[dataset_id][episode_index]['test_instance_id'] \
-                = test_instance_id
+            handle['test_instance_id'] = test_instance_id
             # Create the response object to send to TA2/SOTA.
             if episode.data_type == objects.DTYPE_TRAIN:
                 data = objects.TrainingData(
@@ -4361,50 +4969,45 @@ class TA1:
                     novelty_indicator=self.get_novelty_indicator_value())
             data.utc_remote_epoch_received = None
         elif episode.data_type in [objects.DTYPE_LIVE_TRAIN, objects.DTYPE_LIVE_TEST]:
-            self._ta2_response.put(request)
-            start = time.time()
-            done = False
             response = None
-            while abs(time.time() - start) < self._AMQP_EXPERIMENT_TIMEOUT and not done:
-                try:
-                    response = self._live_output.get(block=True, timeout=2.0)
-                    done = True
-                except queue.Empty:
-                    self.amqp.process_data_events()
+            if self._live_step_data is not None:
+                # The generator already sent this along with the ack for the last prediction.
+                response = self._live_step_data
+                self._live_step_data = None
+            else:
+                response = self._live_generator.request(request)
             self.log.debug('GEN RESPONSE: {}'.format(str(response)))
             if isinstance(response, objects.ExperimentException):
                 data = copy.deepcopy(response)
-                self._live_thread.stop()
-                self._live_thread.join()
-                self._live_thread = None
+                self._live_generator.end_episode()
+                self._live_episode = False
             elif isinstance(response, objects.BasicData):
                 self.episode_data_count += 1
-                # Grab the domain_id and dataset_id that we are dealing with.
-                domain_id = self.domain_ids[episode.domain]
-                dataset_id = self.dataset_cache[domain_id][episode.data_type][episode.novelty][
-                    episode.difficulty][episode.trial_novelty]['dataset_id']
+                # Grab the episode_cache entry that we are dealing with.
+                handle = self.get_episode_handle(episode=episode)
                 # The next data_index is the current size, as we start with 0.
-                data_index = self.episode_cache[dataset_id][episode.episode_index]['size']
-                # Create the data instance in the database.
-                data_id = self.create_data_instance(episode_id=episode.episode_id,
+                data_index = handle['size']
+                # Buffer the data instance for the database.
+                data_id = self.buffer_data_instance(episode_id=episode.episode_id,
                                                     feature_vector=response.feature_vector,
                                                     label=response.feature_label,
                                                     data_index=data_index,
                                                     errormsgs=errormsgs)
-                # Update the episode size in cache and in the database.
-                self.episode_cache[dataset_id][episode.episode_index]['size'] += 1
-                self.update_episode_size(episode_id=episode.episode_id,
-                                         size=self.episode_cache[dataset_id][episode.episode_index][
-                                             'size'],
-                                         errormsgs=errormsgs)
-                # Create the test_instance row for this evaluation.
-                test_instance_id = self.create_test_instance(
-                    data_id=data_id,
-                    trial_episode_id=self.trial_episode_id,
-                    errormsgs=errormsgs)
+                test_instance_id = None
+                # Without a data_id there is no row to point the test_instance at, so this
+                # tick is not recorded.
+                if data_id is not None:
+                    # Update the episode size in cache and in the database.
+                    handle['size'] += 1
+                    self.buffer_episode_size(episode_id=episode.episode_id,
+                                             size=handle['size'])
+                    # Buffer the test_instance row for this evaluation.
+                    test_instance_id = self.buffer_test_instance(
+                        data_id=data_id,
+                        trial_episode_id=self.trial_episode_id,
+                        errormsgs=errormsgs)
                 # Store the test_instance_id for use later.
-                self.episode_cache[dataset_id][episode.episode_index]['test_instance_id'] \
-                    = test_instance_id
+                handle['test_instance_id'] = test_instance_id
                 # Create the response object to send to TA2/SOTA.
                 if episode.data_type == objects.DTYPE_LIVE_TRAIN:
                     data = objects.TrainingData(
@@ -4425,23 +5028,19 @@ class TA1:
         self.log.debug('process_episode_data_prediction({})'.format(str(request)))
         data = objects.AiqObject()
         # We have some basic things that apply to ALL episode types first.
-        # Get the episode_id, episode_index, and dataset_id for the episode.
-        domain_id = self.domain_ids[episode.domain]
-        dataset_id = self.dataset_cache[domain_id][episode.data_type][episode.novelty][
-            episode.difficulty][episode.trial_novelty]['dataset_id']
-        test_instance_id \
-            = self.episode_cache[dataset_id][episode.episode_index]['test_instance_id']
+        # Get the episode_cache entry for the episode.
+        handle = self.get_episode_handle(episode=episode)
+        test_instance_id = handle['test_instance_id']
         remote_stamp_arrived = objects.epoch_to_stamp(request.utc_remote_epoch_received)
         remote_stamp_delivered = objects.epoch_to_stamp(request.utc_remote_epoch_sent)
-        self.update_test_instance(test_instance_id=test_instance_id,
-                                  remote_stamp_arrived=remote_stamp_arrived,
-                                  remote_stamp_delivered=remote_stamp_delivered,
-                                  errormsgs=errormsgs)
+        self.buffer_test_instance_stamps(test_instance_id=test_instance_id,
+                                         remote_stamp_arrived=remote_stamp_arrived,
+                                         remote_stamp_delivered=remote_stamp_delivered)
         # Check if recorded or live training episode.
         if episode.data_type in [objects.DTYPE_TRAIN, objects.DTYPE_TEST]:
             # Get the data_index and episode size.
-            data_index = self.episode_cache[dataset_id][episode.episode_index]['data_index']
-            dataset_size = self.episode_cache[dataset_id][episode.episode_index]['size']
+            data_index = handle['data_index']
+            dataset_size = handle['size']
             # Update the score.
             self.log.debug('data_cache keys: {}'.format(str(self.data_cache.keys())))
             self.log.debug('episode_id = {}'.format(episode.episode_id))
@@ -4462,21 +5061,16 @@ class TA1:
                                                                   data_index]['label'])})
             self.trial_episode_performance = performance
             # Log the response values in the database.
-            self.create_test_label(test_instance_id=test_instance_id,
+            self.buffer_test_label(test_instance_id=test_instance_id,
                                    label_prediction=request.label_prediction,
                                    performance=performance,
-                                   feedback=feedback,
-                                   errormsgs=errormsgs)
+                                   feedback=feedback)
 
             # Go ahead and delete the data instance.
             del self.data_cache[episode.episode_id][data_index]
 
             # Increment the index on the dataset we just finished a test instance on.
-            self.episode_cache[dataset_id][episode.episode_index]['data_index'] += 1
-
-            # Check if we need to mark the flag for a dataset reload.
-            if len(self.data_cache[episode.episode_id]) < self._DATA_CACHE_RELOAD:
-                self.refresh_dataset_cache = True
+            handle['data_index'] += 1
 
             if self.is_testing and not self.is_demo:
                 # If we are in testing mode we just want to limit the dataset sizes so we
@@ -4494,6 +5088,12 @@ class TA1:
             if (data_index + 1) >= dataset_size:
                 episode_has_ended = True
 
+            if episode_has_ended:
+                self.release_episode_data(episode_id=episode.episode_id)
+            else:
+                # Keep the upcoming data loading once the reply is on its way.
+                self.refresh_dataset_cache = True
+
             if episode.data_type == objects.DTYPE_TRAIN:
                 if episode_has_ended:
                     # The training episode has ended, so return objects.TrainingEpisodeEnd.
@@ -4515,40 +5115,45 @@ class TA1:
                                                   performance=performance,
                                                   feedback=feedback)
         elif episode.data_type in [objects.DTYPE_LIVE_TRAIN, objects.DTYPE_LIVE_TEST]:
-            self._ta2_response.put(request)
-            start = time.time()
-            done = False
-            response = None
-            while abs(time.time() - start) < self._AMQP_EXPERIMENT_TIMEOUT and not done:
-                try:
-                    response = self._live_output.get(block=True, timeout=2.0)
-                    self.trial_episode_performance = response.performance
-                    done = True
-                except queue.Empty:
-                    self.amqp.process_data_events()
+            live_request = request
+            if isinstance(request, objects.TestingDataStep):
+                if self._live_generator.has_step_rpc():
+                    # Have the generator send the next feature vector back with the ack.
+                    live_request = objects.BasicDataStep(
+                        label_prediction=request.label_prediction)
+                else:
+                    # The generator only knows plain predictions, the next feature vector is
+                    # requested separately by on_sail_on_request().
+                    live_request = objects.TestingDataPrediction(
+                        secret=request.secret,
+                        label_prediction=request.label_prediction,
+                        end_early=request.end_early)
+            response = self._live_generator.request(live_request)
             self.log.debug('GEN RESPONSE: {}'.format(str(response)))
-            feedback = None
-            if self.trial_budget_active:
-                if random.random() < self._experiment.budget:
-                    feedback = copy.deepcopy(response.feedback)
             if isinstance(response, objects.ExperimentException):
                 data = copy.deepcopy(response)
-                self._live_thread.stop()
-                self._live_thread.join()
-                self._live_thread = None
+                self._live_generator.end_episode()
+                self._live_episode = False
             elif isinstance(response, (objects.BasicDataAck, objects.EpisodeEnd)):
+                self.trial_episode_performance = response.performance
+                feedback = None
+                if self.trial_budget_active:
+                    if random.random() < self._experiment.budget:
+                        feedback = copy.deepcopy(response.feedback)
                 if self.is_shortdemo:
                     # Only end an episode early like this if it is a shortdemo.
                     if self.episode_data_count >= self._SHORT_DEMO_EPISODE_SIZE:
-                        self._ta2_response.put(objects.GeneratorReset())
+                        self._live_generator.request(objects.GeneratorReset())
                         response = objects.EpisodeEnd(performance=response.performance,
                                                       feedback=feedback)
+                if isinstance(response, objects.BasicDataStepAck):
+                    # Keep the next feature vector for get_episode_data().
+                    self._live_step_data = response.get_basic_data()
                 # Log the response values in the database.
-                self.create_test_label(test_instance_id=test_instance_id,
+                self.buffer_test_label(test_instance_id=test_instance_id,
                                        label_prediction=request.label_prediction,
                                        performance=response.performance,
-                                       feedback=feedback,
-                                       errormsgs=errormsgs)
+                                       feedback=feedback)
                 if episode.data_type == objects.DTYPE_LIVE_TRAIN:
                     if isinstance(response, objects.EpisodeEnd):
                         data = objects.TrainingEpisodeEnd(performance=response.performance,
@@ -4568,9 +5173,8 @@ class TA1:
 
                 # Check if it's the end and stop then join the live thread.
                 if isinstance(response, objects.EpisodeEnd):
-                    self._live_thread.stop()
-                    self._live_thread.join()
-                    self._live_thread = None
+                    self._live_generator.end_episode()
+                    self._live_episode = False
         return data
 
     def on_sail_on_request(self, ch, method, props, body, request):
@@ -4661,10 +5265,14 @@ class TA1:
                 # Get the episode.
                 episode = self._experiment.training.episodes[self._exper_train_index]
                 current_episode = episode
+                next_episode = None
+                if self._exper_train_index + 1 < len(self._experiment.training.episodes):
+                    next_episode = self._experiment.training.episodes[self._exper_train_index + 1]
 
                 # Prepare the training episode.
                 self.prepare_episode(episode=episode,
-                                     errormsgs=errormsgs)
+                                     errormsgs=errormsgs,
+                                     next_episode=next_episode)
 
                 # Start the trial_episode and get the trial_episode_id.
                 self.trial_episode_id = self.start_trial_episode(
@@ -4797,11 +5405,9 @@ class TA1:
                     # Set the current data_index for the episode to 0.
                     self.episode_cache[dataset_id][episode.episode_index]['data_index'] = 0
 
-                    # Load the episode data to the data_cache.
-                    self.load_data_to_cache(
-                        episode_id=episode.episode_id,
-                        at_data_index=0,
-                        errormsgs=errormsgs)
+                    # Start loading the episode data in the background.
+                    self.prefetch_data(episode_id=episode.episode_id,
+                                       at_data_index=0)
             elif isinstance(self.STATE, objects.TestingEpisodeStart):
                 self.STATE = objects.TestingEpisodeActive()
 
@@ -4811,10 +5417,14 @@ class TA1:
                 # Get the episode.
                 episode = trial.episodes[self._exper_episode_index]
                 current_episode = episode
+                next_episode = None
+                if self._exper_episode_index + 1 < len(trial.episodes):
+                    next_episode = trial.episodes[self._exper_episode_index + 1]
 
                 # Prepare the testing episode.
                 self.prepare_episode(episode=episode,
-                                     errormsgs=errormsgs)
+                                     errormsgs=errormsgs,
+                                     next_episode=next_episode)
 
                 # Start the trial_episode and get the trial_episode_id.
                 self.trial_episode_id = self.start_trial_episode(
@@ -4871,6 +5481,7 @@ class TA1:
                             message='Please RESET TA2 model to SAVED state.',
                             novelty_description=self._exper_trial_novelty_desc)
             elif isinstance(self.STATE, objects.ExperimentEnd):
+                self.flush_db_write_buffer(errormsgs=errormsgs)
                 if not self._exper_no_testing:
                     self.update_experiment_end(model_experiment_id=self.model_experiment_id,
                                                errormsgs=errormsgs)
@@ -5065,6 +5676,26 @@ class TA1:
                                        action=data.obj_type,
                                        data_object=data.get_json_obj(),
                                        experiment_trial_id=self.experiment_trial_id))
+                elif isinstance(request, objects.TestingDataStep) \
+                        and isinstance(data, objects.TestingDataAck):
+                    # The episode continues, so send the next TestingData with the ack instead of
+                    # waiting for a RequestTestingData.
+                    next_request = objects.RequestTestingData(
+                        model_experiment_id=self.model_experiment_id,
+                        secret=request.secret)
+                    next_data = self.get_episode_data(request=next_request,
+                                                      episode=episode,
+                                                      errormsgs=errormsgs)
+                    if isinstance(next_data, objects.TestingData):
+                        data = objects.TestingDataStepAck(
+                            secret=request.secret,
+                            feature_vector=next_data.feature_vector,
+                            performance=data.performance,
+                            feedback=data.feedback,
+                            novelty_indicator=next_data.novelty_indicator)
+                        data.utc_remote_epoch_received = None
+                    else:
+                        data = next_data
         elif isinstance(request, objects.TestingEpisodeNovelty):
             if not isinstance(self.STATE, (objects.TestingEpisodeStart, objects.TestingEnd)):
                 errormsgs.append('ERROR: Will not accept a TestingEpisodeNovelty in this state!')
@@ -5112,19 +5743,18 @@ class TA1:
 
         self.log.debug('STATE: {}'.format(str(self.STATE)))
 
+        if len(self._db_write_buffer['test_label']) >= self._DB_WRITE_BUFFER_SIZE:
+            # Write the buffered steps now that the TA2 already has its reply.
+            self.flush_db_write_buffer(errormsgs=errormsgs)
+
         if self.refresh_dataset_cache and current_episode is not None:
-            # Get the next episode_id, episode_index, and dataset_id for the episode.
-            episode_id = current_episode.episode_id
-            episode_index = current_episode.episode_index
-            dataset_id = self.get_episode_dataset_id(episode_id=episode_id,
-                                                     episode_index=episode_index)
             # Get the current data_index for the episode.
-            data_index = self.episode_cache[dataset_id][episode_index]['data_index']
-            # Load the episode data to the data_cache.
-            self.load_data_to_cache(
-                episode_id=episode_id,
-                at_data_index=data_index,
-                errormsgs=errormsgs)
+            episode_id = current_episode.episode_id
+            data_index = self.get_episode_handle(episode=current_episode)['data_index']
+            # Pick up what the prefetch thread has loaded and keep the window ahead filled.
+            self.merge_prefetched_data()
+            self.prefetch_data(episode_id=episode_id,
+                               at_data_index=data_index)
 
         if self.STATE is not None:
             self._AMQP_EXP_CALLBACK_ID = self.amqp.call_later(
@@ -5189,6 +5819,7 @@ class TA1:
             self.episode_cache = dict()
             del self.data_cache
             self.data_cache = dict()
+            self._prefetch = dict()
             del self.rolling_score
             self.rolling_score = list()
             if self._AMQP_EXP_CALLBACK_ID is not None:
@@ -5203,6 +5834,8 @@ class TA1:
                         self._AMQP_EXPERIMENT_TIMEOUT)),
                     experiment_trial_id=self.experiment_trial_id))
             errormsgs = list()
+            # Write whatever the episode buffered before the experiment state goes away.
+            self.flush_db_write_buffer(errormsgs=errormsgs)
             if self.private_queue is not None:
                 self.amqp.remove_subscribe_to_queue(queue_name=self.private_queue)
             self.subscribe_experiment_queue()
@@ -5242,16 +5875,13 @@ class TA1:
             self.episode_cache = dict()
             del self.data_cache
             self.data_cache = dict()
+            self._prefetch = dict()
             del self.rolling_score
             self.rolling_score = list()
-            if self._live_thread is not None:
-                self._live_thread.stop()
-                self._live_thread.join()
-                self._live_thread = None
-            del self._ta2_response
-            self._ta2_response = queue.Queue()
-            del self._live_output
-            self._live_output = queue.Queue()
+            if self._live_episode:
+                self._live_generator.end_episode()
+                self._live_episode = False
+            self._live_step_data = None
             if self._AMQP_EXP_CALLBACK_ID is not None:
                 self.amqp.cancel_call_later(timeout_id=self._AMQP_EXP_CALLBACK_ID)
                 self._AMQP_EXP_CALLBACK_ID = None
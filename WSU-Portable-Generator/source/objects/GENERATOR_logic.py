@@ -90,6 +90,11 @@ class GeneratorLogic(object):
         self.amqp_vhost = self.config.get("amqp", "vhost")
         self.amqp_port = self.config.getint("amqp", "port")
         self.amqp_ssl = self.config.getboolean("amqp", "ssl")
+        # The live generator queue always keeps a window of one whatever these say, a generator
+        # takes a single StartGenerator and stops consuming until its episode is over.
+        self.prefetch_count = self.config.getint("amqp", "prefetch_count")
+        self.novelty_prefetch_count = self.config.getint("amqp", "novelty_prefetch_count")
+        self.ack_batch_size = self.config.getint("amqp", "ack_batch_size")
 
         self.keyboard_ended = False
 
@@ -140,6 +145,9 @@ class GeneratorLogic(object):
         config.set("amqp", "vhost", "/")
         config.set("amqp", "port", "5671")
         config.set("amqp", "ssl", "True")
+        config.set("amqp", "prefetch_count", "1")
+        config.set("amqp", "novelty_prefetch_count", "1")
+        config.set("amqp", "ack_batch_size", "1")
         return config
 
     def _subscribe_generator_queue(self):
@@ -152,7 +160,8 @@ class GeneratorLogic(object):
             casas_events=True,
             callback_function=self.on_generator_request,
             auto_ack=False,
-            callback_full_params=True)
+            callback_full_params=True,
+            prefetch_count=1)
         self.amqp.setup_subscribe_to_queue(
             queue_name=objects.NOVELTY_DESC_RPC_QUEUE,
             queue_durable=True,
@@ -161,7 +170,9 @@ class GeneratorLogic(object):
             casas_events=True,
             callback_function=self.on_novelty_description_request,
             auto_ack=False,
-            callback_full_params=True)
+            callback_full_params=True,
+            prefetch_count=self.novelty_prefetch_count,
+            ack_batch_size=self.ack_batch_size)
         return
 
     def _unsubscribe_generator_queue(self):
@@ -258,7 +269,8 @@ class GeneratorLogic(object):
             self._unsubscribe_generator_queue()
             self._subscribe_private_queue()
 
-            response = objects.GeneratorResponse(generator_rpc_queue=self._private_queue)
+            response = objects.GeneratorResponse(generator_rpc_queue=self._private_queue,
+                                                 step_rpc=True)
 
             if props.reply_to is not None:
                 self.amqp.publish_to_queue(queue_name=props.reply_to,
@@ -277,6 +289,18 @@ class GeneratorLogic(object):
 
             response = objects.BasicData(feature_vector=feature_vector,
                                          feature_label=feature_label)
+        elif isinstance(request, objects.BasicDataStep):
+            # Apply the action and return the next feature vector in the same response.
+            performance = self.apply_action(label_prediction=request.label_prediction)
+
+            self.log.debug('self.is_episode_done = {}'.format(self.is_episode_done))
+            if not self.is_episode_done:
+                feature_vector, feature_label = self.get_feature_vector()
+                response = objects.BasicDataStepAck(feature_vector=feature_vector,
+                                                    feature_label=feature_label,
+                                                    performance=performance)
+            else:
+                response = objects.EpisodeEnd(performance=performance)
         elif isinstance(request, objects.BasicDataPrediction):
             performance = self.apply_action(label_prediction=request.label_prediction)
 
@@ -308,7 +332,7 @@ class GeneratorLogic(object):
     def _run_sail_on(self):
         self.log.debug('_run_sail_on()')
         try:
-            self.amqp.run()
+            self.amqp.run(prefetch_count=self.prefetch_count)
             self.amqp.start_consuming()
         except KeyboardInterrupt:
             self.stop()
@@ -20,9 +20,11 @@
 # **  Contact: Diane J. Cook (djcook@wsu.edu)                                                   ** #
 # ************************************************************************************************ #
 
+import asyncio
 import configparser
 import datetime
 import copy
+import functools
 import json
 import logging
 import logging.handlers
@@ -129,6 +131,7 @@ class TA2Logic(object):
         self._amqp_vhost = self._config.get("amqp", "vhost")
         self._amqp_port = self._config.getint("amqp", "port")
         self._amqp_ssl = self._config.getboolean("amqp", "ssl")
+        self._amqp_multipart = self._config.getboolean("amqp", "multipart")
 
         self._description = None
         self._seed = None
@@ -191,7 +194,8 @@ class TA2Logic(object):
                                          amqp_host=self._amqp_host,
                                          amqp_port=self._amqp_port,
                                          amqp_vhost=self._amqp_vhost,
-                                         amqp_ssl=self._amqp_ssl)
+                                         amqp_ssl=self._amqp_ssl,
+                                         multipart=self._amqp_multipart)
 
         self._model_filename_pat = 'model/model.TA2.{}.{}.file'.format(self._sail_on_domain, '{}')
         self._model_filename = None
@@ -279,6 +283,7 @@ class TA2Logic(object):
         config.set("amqp", "vhost", "/")
         config.set("amqp", "port", "5671")
         config.set("amqp", "ssl", "True")
+        config.set("amqp", "multipart", "False")
         return config
 
     def _write_config_file(self):
@@ -305,60 +310,116 @@ class TA2Logic(object):
                        'physical_ram': physical_ram})
         return result
 
-    def _run_sail_on_trial(self):
+    @staticmethod
+    def _unpack_image(image):
+        # Images arrive as raw blosc bytes in multipart messages and base64 inside plain JSON.
+        if isinstance(image, str):
+            image = b64decode(image)
+        return blosc.unpack_array(image)
+
+    # The SAIL-ON protocol is written once below as generators shared by TA2Logic and
+    # AsyncTA2Logic.  Every RabbitMQ request and agent function call is yielded as a callable
+    # taking no arguments, and _drive() sends back its result, so the only difference between the
+    # two classes is whether that result has to be awaited.
+    def _drive(self, steps):
+        result = None
+        while True:
+            try:
+                call = steps.send(result)
+            except StopIteration:
+                return
+            result = call()
+
+    def _train_and_save_model(self):
+        # Now stop the connection for training.
+        self.log.info('Stopping connection to train model if needed.')
+        self._amqp.stop()
+
+        # Call the function to train our model
+        self.train_model()
+
+        # Save the model to disk.
+        self.save_model(filename=self._model_filename)
+
+        self.log.info('Starting the connection back up.')
+        self._amqp.run()
+        return
+
+    def _drain_connection(self):
+        self._amqp.process_data_events(time_limit=1)
+        return
+
+    def _sail_on_trial_steps(self):
         # We already called the trial start function with the trial number.
 
         # Reset the model to the saved state.
-        self.reset_model(filename=self._model_filename)
+        yield functools.partial(self.reset_model, filename=self._model_filename)
 
         # Expect to receive TestingStart.
-        my_state = self._amqp.get_state()
+        my_state = yield self._amqp.get_state
         # self.log.info(str(my_state))
         if isinstance(my_state, objects.TestingStart):
             # We have receive an objects.TestingStart.
-            self.testing_start()
+            yield self.testing_start
 
             # Get the next state, should be Testing Episode Start.
-            my_state = self._amqp.get_state()
+            my_state = yield self._amqp.get_state
             # self.log.info(str(my_state))
 
             # Iterate over episodes.
             while isinstance(my_state, objects.TestingEpisodeStart):
                 # We just received an objects.TestingEpisodeStart.
-                self.testing_episode_start(episode_number=my_state.episode_number)
+                yield functools.partial(self.testing_episode_start,
+                                        episode_number=my_state.episode_number)
 
                 # Collect testing data until we get TestingEpisodeEnd.
+                test_data = None
                 while not isinstance(my_state, objects.TestingEpisodeEnd):
-                    # Get testing data.
-                    test_data = self._amqp.get_testing_data()
+                    # Get testing data, unless it arrived with the ack for our last prediction.
+                    if test_data is None:
+                        test_data = yield self._amqp.get_testing_data
 
                     # Decompress the image if there is one.
                     if 'image' in test_data.feature_vector:
                         if test_data.feature_vector['image'] is not None:
-                            comp_image = b64decode(test_data.feature_vector['image'])
                             test_data.feature_vector['image'] \
-                                = blosc.unpack_array(comp_image)
+                                = self._unpack_image(test_data.feature_vector['image'])
 
                     # Evaluate the testing data.
-                    label_prediction = \
-                        self.testing_instance(feature_vector=test_data.feature_vector,
-                                              novelty_indicator=test_data.novelty_indicator)
+                    label_prediction = yield functools.partial(
+                        self.testing_instance,
+                        feature_vector=test_data.feature_vector,
+                        novelty_indicator=test_data.novelty_indicator)
 
                     # Send the prediction and update my_state, expecting TestingDataAck until
-                    # the training episode is over.
-                    my_state = self._amqp.send_testing_predictions(
-                        label_prediction=label_prediction,
-                        end_early=self.end_experiment_early)
+                    # the testing episode is over.
+                    if self._amqp.has_step_rpc():
+                        # The server sends the next testing data back with the ack.
+                        my_state = yield functools.partial(
+                            self._amqp.send_testing_step,
+                            label_prediction=label_prediction,
+                            end_early=self.end_experiment_early)
+                    else:
+                        my_state = yield functools.partial(
+                            self._amqp.send_testing_predictions,
+                            label_prediction=label_prediction,
+                            end_early=self.end_experiment_early)
+                    test_data = None
                     if isinstance(my_state, objects.TestingDataAck):
-                        self.testing_performance(performance=my_state.performance,
-                                                 feedback=my_state.feedback)
+                        yield functools.partial(self.testing_performance,
+                                                performance=my_state.performance,
+                                                feedback=my_state.feedback)
+                        if isinstance(my_state, objects.TestingDataStepAck):
+                            test_data = my_state
 
-                # We are done with the training episode.
+                # We are done with the testing episode.
                 if isinstance(my_state, objects.TestingEpisodeEnd):
                     novelty_probability, novelty_threshold, novelty, novelty_characterization = \
-                        self.testing_episode_end(performance=my_state.performance,
-                                                 feedback=my_state.feedback)
-                    my_state = self._amqp.send_testing_episode_novelty(
+                        yield functools.partial(self.testing_episode_end,
+                                                performance=my_state.performance,
+                                                feedback=my_state.feedback)
+                    my_state = yield functools.partial(
+                        self._amqp.send_testing_episode_novelty,
                         novelty_characterization=novelty_characterization,
                         novelty_probability=novelty_probability,
                         novelty_threshold=novelty_threshold,
@@ -367,85 +428,90 @@ class TA2Logic(object):
                 self.log.debug(str(my_state))
 
                 # Find out if we have another episode or if the trial is over.
-                my_state = self._amqp.get_state()
+                my_state = yield self._amqp.get_state
                 # self.log.info(str(my_state))
 
         if isinstance(my_state, objects.TestingEnd):
             # We have received an objects.TestingEnd.
-            self.testing_end()
+            yield self.testing_end
 
             # Next we should receive an objects.TrialEnd.
             while not isinstance(my_state, objects.TrialEnd):
-                my_state = self._amqp.get_state()
+                my_state = yield self._amqp.get_state
                 # self.log.info(str(my_state))
 
         # We have received an objects.TrialEnd.
-        self.trial_end()
+        yield self.trial_end
         return
 
-    def _run_sail_on_experiment(self):
-        my_state = self._amqp.get_state()
+    def _sail_on_experiment_steps(self):
+        my_state = yield self._amqp.get_state
         if isinstance(my_state, objects.BenchmarkRequest):
             # self.log.info(str(my_state))
             benchmark_data = self._get_benchmark_data()
-            my_state = self._amqp.send_benchmark_data(benchmark_data=benchmark_data)
+            my_state = yield functools.partial(self._amqp.send_benchmark_data,
+                                               benchmark_data=benchmark_data)
             # self.log.info(str(my_state))
 
         # Wait until we are ready to start experiment.
         while not isinstance(my_state, objects.ExperimentStart):
-            my_state = self._amqp.get_state()
+            my_state = yield self._amqp.get_state
             # self.log.info(str(my_state))
 
         # We have received objects.ExperimentStart.
-        self.experiment_start()
+        yield self.experiment_start
 
         # Experiment has started, now look for TrainingStart.
         while not isinstance(my_state, objects.TrainingStart):
-            my_state = self._amqp.get_state()
+            my_state = yield self._amqp.get_state
             # self.log.info(str(my_state))
 
         # We have received objects.TrainingStart.
-        self.training_start()
+        yield self.training_start
 
-        my_state = self._amqp.get_state()
+        my_state = yield self._amqp.get_state
         # self.log.info(str(my_state))
 
         # Iterate over episodes.
         while isinstance(my_state, objects.TrainingEpisodeStart):
             # We have received objects.TrainingEpisodeStart.
-            self.training_episode_start(episode_number=my_state.episode_number)
+            yield functools.partial(self.training_episode_start,
+                                    episode_number=my_state.episode_number)
 
             # Collect training data until we get TrainingEpisodeEnd
             while not isinstance(my_state, objects.TrainingEpisodeEnd):
                 # Get training data.
-                training_data = self._amqp.get_training_data()
+                training_data = yield self._amqp.get_training_data
 
                 # Decompress the image if there is one.
                 if 'image' in training_data.feature_vector:
                     if training_data.feature_vector['image'] is not None:
-                        comp_image = b64decode(training_data.feature_vector['image'])
                         training_data.feature_vector['image'] \
-                            = blosc.unpack_array(comp_image)
+                            = self._unpack_image(training_data.feature_vector['image'])
                 # Handle the training data.
-                label_prediction = \
-                    self.training_instance(feature_vector=training_data.feature_vector,
-                                           feature_label=training_data.feature_label)
+                label_prediction = yield functools.partial(
+                    self.training_instance,
+                    feature_vector=training_data.feature_vector,
+                    feature_label=training_data.feature_label)
 
                 # Send the prediction and update my_state, expecting TrainingDataAck until
                 # the training episode is over.
-                my_state = self._amqp.send_training_predictions(
-                    label_prediction=label_prediction,
-                    end_early=self.end_training_early)
+                my_state = yield functools.partial(self._amqp.send_training_predictions,
+                                                   label_prediction=label_prediction,
+                                                   end_early=self.end_training_early)
                 if isinstance(my_state, objects.TrainingDataAck):
-                    self.training_performance(performance=my_state.performance,
-                                              feedback=my_state.feedback)
+                    yield functools.partial(self.training_performance,
+                                            performance=my_state.performance,
+                                            feedback=my_state.feedback)
 
             if isinstance(my_state, objects.TrainingEpisodeEnd):
                 # We have received objects.TrainingEpisodeEnd.
                 novelty_probability, novelty_threshold, novelty, novelty_characterization = \
-                    self.training_episode_end(performance=my_state.performance,
-                                              feedback=my_state.feedback)
-                my_state = self._amqp.send_training_episode_novelty(
+                    yield functools.partial(self.training_episode_end,
+                                            performance=my_state.performance,
+                                            feedback=my_state.feedback)
+                my_state = yield functools.partial(
+                    self._amqp.send_training_episode_novelty,
                     novelty_characterization=novelty_characterization,
                     novelty_probability=novelty_probability,
                     novelty_threshold=novelty_threshold,
@@ -454,145 +520,141 @@ class TA2Logic(object):
             self.log.debug(str(my_state))
 
             # Find out if we are going to start another episode or not.
-            my_state = self._amqp.get_state()
+            my_state = yield self._amqp.get_state
 
         # We must have received objects.TrainingEnd.
         if isinstance(my_state, objects.TrainingEnd):
-            self.training_end()
-
-            # Now stop the connection for training.
-            self.log.info('Stopping connection to train model if needed.')
-            self._amqp.stop()
-
-            # Call the function to train our model
-            self.train_model()
+            yield self.training_end
 
-            # Save the model to disk.
-            self.save_model(filename=self._model_filename)
-
-            self.log.info('Starting the connection back up.')
-            self._amqp.run()
+            # Train the model and save it to disk.
+            yield self._train_and_save_model
 
             # Expect to get objects.TrainingModelEnd here.
-            my_state = self._amqp.get_state()
+            my_state = yield self._amqp.get_state
 
-        self._run_sail_on_testing()
+        yield from self._sail_on_testing_steps()
         return
 
-    def _run_jump_to_sail_on_testing(self):
-        self.log.debug('_run_jump_to_sail_on_testing()')
-        my_state = self._amqp.get_state()
+    def _jump_to_sail_on_testing_steps(self):
+        self.log.debug('_jump_to_sail_on_testing_steps()')
+        my_state = yield self._amqp.get_state
         self.log.debug(str(my_state))
         if isinstance(my_state, objects.BenchmarkRequest):
             # self.log.info(str(my_state))
             benchmark_data = self._get_benchmark_data()
-            my_state = self._amqp.send_benchmark_data(benchmark_data=benchmark_data)
+            my_state = yield functools.partial(self._amqp.send_benchmark_data,
+                                               benchmark_data=benchmark_data)
             self.log.debug(str(my_state))
 
         # Wait until we are ready to start experiment.
         while not isinstance(my_state, objects.ExperimentStart):
-            my_state = self._amqp.get_state()
+            my_state = yield self._amqp.get_state
             self.log.info(str(my_state))
 
         # We have received objects.ExperimentStart.
         # Be nice and call experiment_start() before we begin jumping into testing.
-        self.experiment_start()
+        yield self.experiment_start
 
-        self._run_sail_on_testing()
+        yield from self._sail_on_testing_steps()
         return
 
-    def _run_sail_on_testing(self):
-        self.log.debug('_run_sail_on_testing()')
+    def _sail_on_testing_steps(self):
+        self.log.debug('_sail_on_testing_steps()')
         # Based on which path we took to reach here, the current state must be
         # objects.ExperimentStart or objects.TrainingModelEnd, the next state should be either
         # objects.TrialStart or objects.ExperimentEnd.
-        my_state = self._amqp.get_state()
+        my_state = yield self._amqp.get_state
         self.log.info(str(my_state))
 
         # Iterate over the trials we will run.
         while isinstance(my_state, objects.TrialStart):
             # We just received an objects.TrialStart.
-            self.trial_start(trial_number=my_state.trial_number,
-                             novelty_description=my_state.novelty_description)
+            yield functools.partial(self.trial_start,
+                                    trial_number=my_state.trial_number,
+                                    novelty_description=my_state.novelty_description)
 
             # Run the trial.
-            self._run_sail_on_trial()
+            yield from self._sail_on_trial_steps()
 
             # Check to see if we get another go at this loop or continue.
             # This will either be objects.ExperimentEnd of objects.TrialStart.
-            my_state = self._amqp.get_state()
+            my_state = yield self._amqp.get_state
             self.log.info(str(my_state))
 
         # Get Confirmation of ExperimentEnd.
         while not isinstance(my_state, objects.ExperimentEnd):
-            my_state = self._amqp.get_state()
+            my_state = yield self._amqp.get_state
             self.log.info(str(my_state))
-        self.experiment_end()
+        yield self.experiment_end
 
-        self._amqp.process_data_events(time_limit=1)
+        yield self._drain_connection
         return
 
-    def _run_sail_on(self):
-        try:
-            self._amqp.run()
-
-            # Build the model.
-            model = objects.Model(model_name=self._model_name,
-                                  organization=self._organization,
-                                  aiq_username=self._aiq_username,
-                                  aiq_secret=self._aiq_secret)
-
-            # Let the user know we are attempting to connect to an available TA1, and we will
-            # wait if one is not available yet.
-            message = ('Attempting to connect to an available TA1, if all are currently busy '
-                       'this will wait in line until one is available.')
-            if self._printout:
-                self.log.info(message)
-            else:
-                print(message)
-
-            # Start a SAIL-ON experiment!
-            if self._experiment_secret is None or self._no_testing:
-                # Based on these variables, we need to start a new experiment.
-                my_experiment = self._amqp.start_sail_on_experiment(model=model,
-                                                                    domain=self._sail_on_domain,
-                                                                    no_testing=self._no_testing,
-                                                                    seed=self._seed,
-                                                                    description=self._description)
-                self.log.info('experiment is gathering requirements!')
-                # self.log.debug(str(my_experiment))
-                # Store the experiment_secret locally.
-                self._experiment_secret = my_experiment.experiment_secret
-                if self._experiment_secret is not None:
-                    # Now we can set the model filename.
-                    self._set_model_filename()
-                    # Set the experiment_secret in the config object.
-                    self._config.set('sail-on', 'experiment_secret', self._experiment_secret)
-                    # Write out the config with the new experiment_secret value.
-                    self._write_config_file()
-
-                    # Run the SAIL-ON experiment!
-                    self._run_sail_on_experiment()
-            else:
+    def _sail_on_steps(self):
+        yield self._amqp.run
+
+        # Build the model.
+        model = objects.Model(model_name=self._model_name,
+                              organization=self._organization,
+                              aiq_username=self._aiq_username,
+                              aiq_secret=self._aiq_secret)
+
+        # Let the user know we are attempting to connect to an available TA1, and we will
+        # wait if one is not available yet.
+        message = ('Attempting to connect to an available TA1, if all are currently busy '
+                   'this will wait in line until one is available.')
+        if self._printout:
+            self.log.info(message)
+        else:
+            print(message)
+
+        # Start a SAIL-ON experiment!
+        if self._experiment_secret is None or self._no_testing:
+            # Based on these variables, we need to start a new experiment.
+            my_experiment = yield functools.partial(self._amqp.start_sail_on_experiment,
+                                                    model=model,
+                                                    domain=self._sail_on_domain,
+                                                    no_testing=self._no_testing,
+                                                    seed=self._seed,
+                                                    description=self._description)
+            self.log.info('experiment is gathering requirements!')
+            # self.log.debug(str(my_experiment))
+            # Store the experiment_secret locally.
+            self._experiment_secret = my_experiment.experiment_secret
+            if self._experiment_secret is not None:
+                # Now we can set the model filename.
                 self._set_model_filename()
-                # Here we don't need to start a new experiment, just register to work on 1 or
-                # many trials for the given experiment.
-                my_experiment = self._amqp.start_work_on_experiment_trials(
-                    model=model,
-                    experiment_secret=self._experiment_secret,
-                    just_one_trial=self._just_one_trial,
-                    domain=self._sail_on_domain)
-                if isinstance(my_experiment, objects.CasasResponse):
-                    if my_experiment.status == 'error':
-                        for casas_error in my_experiment.error_list:
-                            self.log.error(casas_error.message)
-                            self.log.error(str(casas_error.error_dict))
-                else:
-                    # We have our response.
-                    # Start working on trials until TA1 tells us the experiment is done, or at
-                    # least we are done with what we requested.
-                    self._run_jump_to_sail_on_testing()
+                # Set the experiment_secret in the config object.
+                self._config.set('sail-on', 'experiment_secret', self._experiment_secret)
+                # Write out the config with the new experiment_secret value.
+                self._write_config_file()
+
+                # Run the SAIL-ON experiment!
+                yield from self._sail_on_experiment_steps()
+        else:
+            self._set_model_filename()
+            # Here we don't need to start a new experiment, just register to work on 1 or
+            # many trials for the given experiment.
+            my_experiment = yield functools.partial(self._amqp.start_work_on_experiment_trials,
+                                                    model=model,
+                                                    experiment_secret=self._experiment_secret,
+                                                    just_one_trial=self._just_one_trial,
+                                                    domain=self._sail_on_domain)
+            if isinstance(my_experiment, objects.CasasResponse):
+                if my_experiment.status == 'error':
+                    for casas_error in my_experiment.error_list:
+                        self.log.error(casas_error.message)
+                        self.log.error(str(casas_error.error_dict))
+            else:
+                # We have our response.
+                # Start working on trials until TA1 tells us the experiment is done, or at
+                # least we are done with what we requested.
+                yield from self._jump_to_sail_on_testing_steps()
+        return
 
+    def _run_sail_on(self):
+        try:
+            self._drive(steps=self._sail_on_steps())
         except KeyboardInterrupt:
             self._stop()
         except objects.AiqExperimentException as e:
@@ -828,3 +890,78 @@ class TA2Logic(object):
         """
         raise ValueError('experiment_end() not defined.')
 
+
+
+class AsyncTA2Logic(TA2Logic):
+    """The asyncio variant of TA2Logic, talking to TA1 through a rabbitmq.AsyncConnection.
+
+    The agent functions (training_instance(), testing_instance(), ...) may be written as either
+    plain functions or coroutines.  Coroutines are awaited, so an agent can await its own I/O or
+    model inference while the event loop keeps the RabbitMQ connection serviced.  A plain
+    train_model() is run in the loop's default executor for the same reason, so unlike TA2Logic
+    the connection stays open while the model trains.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Replace the blocking Connection built by TA2Logic, it has not connected yet.
+        self._amqp = rabbitmq.AsyncConnection(agent_name=self._agent_name,
+                                              amqp_user=self._amqp_user,
+                                              amqp_pass=self._amqp_pass,
+                                              amqp_host=self._amqp_host,
+                                              amqp_port=self._amqp_port,
+                                              amqp_vhost=self._amqp_vhost,
+                                              amqp_ssl=self._amqp_ssl,
+                                              multipart=self._amqp_multipart)
+        return
+
+    async def _drive(self, steps):
+        # The same as TA2Logic._drive(), awaiting whatever the call returns if it is a coroutine.
+        result = None
+        while True:
+            try:
+                call = steps.send(result)
+            except StopIteration:
+                return
+            result = call()
+            if asyncio.iscoroutine(result):
+                result = await result
+
+    async def _train_and_save_model(self):
+        # Train and save the model, the connection stays up while we do.
+        if asyncio.iscoroutinefunction(self.train_model):
+            await self.train_model()
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, self.train_model)
+        result = self.save_model(filename=self._model_filename)
+        if asyncio.iscoroutine(result):
+            await result
+        return
+
+    def _drain_connection(self):
+        # The event loop services the connection, there is nothing to drain here.
+        return
+
+    async def _run_sail_on(self):
+        try:
+            await self._drive(steps=self._sail_on_steps())
+        except objects.AiqExperimentException as e:
+            self.log.error(e.value)
+        await self._stop()
+        return
+
+    def run(self):
+        loop = asyncio.get_event_loop()
+        try:
+            loop.run_until_complete(self._run_sail_on())
+        except KeyboardInterrupt:
+            loop.run_until_complete(self._stop())
+        return
+
+    async def _stop(self):
+        await self._amqp.stop()
+        return
+
+    def process_amqp_events(self):
+        # The event loop services the connection, there is nothing to pump here.
+        return
@@ -17,6 +17,58 @@ import os
 import time
 
 
+# One tick of cartpole state kept as a single rounded array. Rows are the cart, the pole and
+# then each block. Cart and block columns are the x, y, z position and x, y, z velocity (the
+# last column is unused), pole columns are the x, y, z, w quaternion and x, y, z velocity.
+class CartPoleState:
+    round_amount = 6
+
+    def __init__(self, values, block_ids, initial=False):
+        self.values = values
+        self.block_ids = block_ids
+        self.initial = initial
+        self._dict = None
+
+    # Build the nested dict sent to the TA2, only done once per state
+    def to_dict(self):
+        if self._dict is not None:
+            return self._dict
+
+        values = self.values.tolist()
+        world_state = dict()
+
+        # Get cart info ============================================
+        row = values[0]
+        world_state['cart'] = {'x_position': row[0], 'y_position': row[1],
+                               'z_position': row[2], 'x_velocity': row[3],
+                               'y_velocity': row[4], 'z_velocity': row[5]}
+
+        # Get pole info =============================================
+        row = values[1]
+        world_state['pole'] = {'x_quaternion': row[0], 'y_quaternion': row[1],
+                               'z_quaternion': row[2], 'w_quaternion': row[3],
+                               'x_velocity': row[4], 'y_velocity': row[5],
+                               'z_velocity': row[6]}
+
+        # get block info ====================================
+        block_state = list()
+        for block_id, row in zip(self.block_ids, values[2:]):
+            block_state.append({'id': block_id, 'x_position': row[0], 'y_position': row[1],
+                                'z_position': row[2], 'x_velocity': row[3],
+                                'y_velocity': row[4], 'z_velocity': row[5]})
+
+        world_state['blocks'] = block_state
+
+        # Get wall info ======================================
+        # Hardcoded cause I don't know how to get the info :(
+        if self.initial:
+            world_state['walls'] = [[-5, -5, 0], [5, -5, 0], [5, 5, 0], [-5, 5, 0],
+                                    [-5, -5, 10], [5, -5, 10], [5, 5, 10], [-5, 5, 10]]
+
+        self._dict = world_state
+        return self._dict
+
+
 class CartPoleBulletEnv(gym.Env):
     metadata = {'render.modes': ['human', 'rgb_array'], 'video.frames_per_second': 50}
 
@@ -53,6 +105,11 @@ class CartPoleBulletEnv(gym.Env):
         self.walls = None
         self.state = None
 
+        # Blocks are loaded once per client, the ones an episode does not use are parked
+        self.max_blocks = 4
+        self.block_urdf = os.path.join('models', 'block.urdf')
+        self.block_pool = list()
+
         if self._discrete_actions:
             self.action_space = spaces.Discrete(5)
         else:
@@ -133,7 +190,7 @@ class CartPoleBulletEnv(gym.Env):
 
         self.tick = self.tick + 1
 
-        return self.get_state(), reward, done, {}
+        return self.observe(), reward, done, {}
 
     # Check if is done
     def is_done(self):
@@ -179,7 +236,7 @@ class CartPoleBulletEnv(gym.Env):
         # Run for one step to get everything going
         self.step(0)
 
-        return self.get_state(initial=True)
+        return self.observe(initial=True)
 
     # Used to generate the initial world state
     def generate_world(self):
@@ -211,18 +268,58 @@ class CartPoleBulletEnv(gym.Env):
             p.changeDynamics(self.walls, joint_nb, restitution=1.0, lateralFriction=0.0,
                              rollingFriction=0.0, spinningFriction=0.0)
 
+        # Load the most blocks an episode can use
+        self.block_pool = [None] * self.max_blocks
+        for i in range(self.max_blocks):
+            self.block_pool[i] = p.loadURDF(os.path.join(self.path, self.block_urdf))
+
+        # Set blocks to be bouncy
+        for i in self.block_pool:
+            p.changeDynamics(i, -1, restitution=1.0, lateralFriction=0.0,
+                             rollingFriction=0.0, spinningFriction=0.0)
+
+        self.blocks = list()
+        self.park_blocks()
+
+        return None
+
+    # Neither resetJointStateMultiDof nor restoreState resets the planar joint of the cart, so
+    # the cartpole is still the one body loaded again every episode
+    def reset_cartpole(self):
+        p = self._p
+
+        p.removeBody(self.cartpole)
+        self.cartpole = p.loadURDF(os.path.join(self.path, 'models', 'ground_cart.urdf'))
+
+        return None
+
+    # Take the first nb_blocks blocks from the pool for this episode and park the rest
+    def use_blocks(self, nb_blocks):
+        self.nb_blocks = nb_blocks
+        self.blocks = self.block_pool[:nb_blocks]
+        self.park_blocks()
+
+        return None
+
+    # Move unused blocks far below the ground and out of the camera view, spaced so they
+    # never touch each other
+    def park_blocks(self):
+        p = self._p
+
+        for ind, val in enumerate(self.block_pool):
+            if val in self.blocks:
+                continue
+            p.resetBasePositionAndOrientation(val, [10.0 * ind, 0, -1000.0], [0, 0, 0, 1])
+            p.resetBaseVelocity(val, [0, 0, 0], [0, 0, 0])
+
         return None
 
     def reset_world(self):
         # Reset world (assume is created)
         p = self._p
 
-        # Delete cartpole
-        if self.cartpole == -10:
-            self.cartpole = p.loadURDF(os.path.join(self.path, 'models', 'ground_cart.urdf'))
-        else:
-            p.removeBody(self.cartpole)
-            self.cartpole = p.loadURDF(os.path.join(self.path, 'models', 'ground_cart.urdf'))
+        # Load a fresh cartpole
+        self.reset_cartpole()
 
         # This big line sets the spehrical joint on the pole to loose
         p.setJointMotorControlMultiDof(self.cartpole, 1, p.POSITION_CONTROL, targetPosition=[0, 0, 0, 1],
@@ -242,20 +339,8 @@ class CartPoleBulletEnv(gym.Env):
         pole_ori = list(randstate[3:5]) + [0]
         p.resetJointStateMultiDof(self.cartpole, 1, targetValue=pole_pos, targetVelocity=pole_ori)
 
-        # Delete old blocks
-        for i in self.blocks:
-            p.removeBody(i)
-
-        # Load blocks in
-        self.nb_blocks = np.random.randint(4) + 1
-        self.blocks = [None] * self.nb_blocks
-        for i in range(self.nb_blocks):
-            self.blocks[i] = p.loadURDF(os.path.join(self.path, 'models', 'block.urdf'))
-
-        # Set blocks to be bouncy
-        for i in self.blocks:
-            p.changeDynamics(i, -1, restitution=1.0, lateralFriction=0.0,
-                             rollingFriction=0.0, spinningFriction=0.0)
+        # Take blocks from the pool
+        self.use_blocks(np.random.randint(self.max_blocks) + 1)
 
         # Set block posistions
         min_dist = 1
@@ -281,94 +366,34 @@ class CartPoleBulletEnv(gym.Env):
 
         return None
 
-    # Unified function for getting state information
-    def get_state(self, initial=False):
+    # Gather the state of every body for this tick into one array, see CartPoleState for the
+    # layout
+    def get_state_array(self):
         p = self._p
-        world_state = dict()
-        round_amount = 6
 
-        # Get cart info ============================================
-        state = dict()
-
-        # Handle pos, ori
+        # Cart position is the planar joint offset from the base, both joints come in one call
         base_pose, _ = p.getBasePositionAndOrientation(self.cartpole)
-        pos, vel, jRF, aJMT = p.getJointStateMultiDof(self.cartpole, 0)
-        state['x_position'] = round(pos[0] + base_pose[0], round_amount)
-        state['y_position'] = round(pos[1] + base_pose[1], round_amount)
-        state['z_position'] = round(0.1 + base_pose[2], round_amount)
+        (cart_pos, cart_vel, _, _), (pole_pos, pole_vel, _, _) = \
+            p.getJointStatesMultiDof(self.cartpole, [0, 1])
+        rows = [(cart_pos[0] + base_pose[0], cart_pos[1] + base_pose[1], 0.1 + base_pose[2],
+                 cart_vel[0], cart_vel[1], 0.0, 0.0),
+                pole_pos + pole_vel]
 
-        # Handle velocity
-        state['x_velocity'] = round(vel[0], round_amount)
-        state['y_velocity'] = round(vel[1], round_amount)
-        state['z_velocity'] = round(0.0, round_amount)
+        # Blocks
+        for val in self.blocks:
+            rows.append(p.getBasePositionAndOrientation(val)[0] + p.getBaseVelocity(val)[0] +
+                        (0.0,))
 
-        world_state['cart'] = state
+        # Round everything at once
+        return np.round(np.array(rows), CartPoleState.round_amount)
 
-        # Get pole info =============================================
-        state = dict()
-        use_euler = False
+    # State for this tick, the dict view is only built when the state is serialized
+    def observe(self, initial=False):
+        return CartPoleState(self.get_state_array(), list(self.blocks), initial)
 
-        # Position and orientation, the other two not used
-        pos, vel, jRF, aJMT = p.getJointStateMultiDof(self.cartpole, 1)
-
-        # Convert quats to eulers
-        eulers = self.quaternion_to_euler(*pos)
-
-        # Position
-        if use_euler:
-            state['x_position'] = round(eulers[0], round_amount)
-            state['y_position'] = round(eulers[1], round_amount)
-            state['z_position'] = round(eulers[2], round_amount)
-        else:
-            state['x_quaternion'] = round(pos[0], round_amount)
-            state['y_quaternion'] = round(pos[1], round_amount)
-            state['z_quaternion'] = round(pos[2], round_amount)
-            state['w_quaternion'] = round(pos[3], round_amount)
-
-        # Velocity
-        state['x_velocity'] = round(vel[0], round_amount)
-        state['y_velocity'] = round(vel[1], round_amount)
-        state['z_velocity'] = round(vel[2], round_amount)
-
-        world_state['pole'] = state
-
-        # get block info ====================================
-        block_state = list()
-        for ind, val in enumerate(self.blocks):
-            state = dict()
-            state['id'] = val
-
-            pos, _ = p.getBasePositionAndOrientation(val)
-            state['x_position'] = round(pos[0], round_amount)
-            state['y_position'] = round(pos[1], round_amount)
-            state['z_position'] = round(pos[2], round_amount)
-
-            vel, _ = p.getBaseVelocity(val)
-            state['x_velocity'] = round(vel[0], round_amount)
-            state['y_velocity'] = round(vel[1], round_amount)
-            state['z_velocity'] = round(vel[2], round_amount)
-
-            block_state.append(state)
-
-        world_state['blocks'] = block_state
-
-        # Get wall info ======================================
-        # Hardcoded cause I don't know how to get the info :(
-        if initial:
-            state = list()
-            state.append([-5, -5, 0])
-            state.append([5, -5, 0])
-            state.append([5, 5, 0])
-            state.append([-5, 5, 0])
-
-            state.append([-5, -5, 10])
-            state.append([5, -5, 10])
-            state.append([5, 5, 10])
-            state.append([-5, 5, 10])
-
-            world_state['walls'] = state
-
-        return world_state
+    # Unified function for getting state information
+    def get_state(self, initial=False):
+        return self.observe(initial=initial).to_dict()
 
     def get_image(self):
         if self.use_img:
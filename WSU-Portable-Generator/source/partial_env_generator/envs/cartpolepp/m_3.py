@@ -19,12 +19,8 @@ class CartPolePPMock3(CartPoleBulletEnv):
         # Reset world (assume is created)
         p = self._p
 
-        # Delete cartpole
-        if self.cartpole == -10:
-            self.cartpole = p.loadURDF(os.path.join(self.path, 'models', 'ground_cart.urdf'))
-        else:
-            p.removeBody(self.cartpole)
-            self.cartpole = p.loadURDF(os.path.join(self.path, 'models', 'ground_cart.urdf'))
+        # Load a fresh cartpole
+        self.reset_cartpole()
 
         # This big line sets the spehrical joint on the pole to loose
         p.setJointMotorControlMultiDof(self.cartpole, 1, p.POSITION_CONTROL, targetPosition=[0, 0, 0, 1],
@@ -44,20 +40,8 @@ class CartPolePPMock3(CartPoleBulletEnv):
         pole_ori = list(randstate[3:5]) + [0]
         p.resetJointStateMultiDof(self.cartpole, 1, targetValue=pole_pos, targetVelocity=pole_ori)
 
-        # Delete old blocks
-        for i in self.blocks:
-            p.removeBody(i)
-
-        # Load blocks in
-        self.nb_blocks = np.random.randint(4) + 1
-        self.blocks = [None] * self.nb_blocks
-        for i in range(self.nb_blocks):
-            self.blocks[i] = p.loadURDF(os.path.join(self.path, 'models', 'block.urdf'))
-
-        # Set blocks to be bouncy
-        for i in self.blocks:
-            p.changeDynamics(i, -1, restitution=1.0, lateralFriction=0.0,
-                             rollingFriction=0.0, spinningFriction=0.0)
+        # Take blocks from the pool
+        self.use_blocks(np.random.randint(self.max_blocks) + 1)
 
         # Set block posistions
         min_dist = 1
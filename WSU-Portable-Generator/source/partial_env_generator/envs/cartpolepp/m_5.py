@@ -93,6 +93,6 @@ class CartPolePPMock5(CartPoleBulletEnv):
 
         self.tick = self.tick + 1
 
-        return self.get_state(), reward, done, {}
+        return self.observe(), reward, done, {}
 
 
@@ -0,0 +1,41 @@
+# Benchmark how many resets per second each cartpole env manages.
+# Run from the directory holding the env package, e.g. in the generator container:
+#     python3 -m env_generator.envs.cartpolepp.reset_benchmark
+import os.path
+import sys
+import time
+
+from .n_0 import CartPole
+from .m_1 import CartPolePPMock1
+from .m_2 import CartPolePPMock2
+from .m_3 import CartPolePPMock3
+from .m_4 import CartPolePPMock4
+from .m_5 import CartPolePPMock5
+
+
+def benchmark(env_class, nb_resets=500, difficulty='easy'):
+    env = env_class(difficulty)
+    env.path = os.path.dirname(os.path.abspath(__file__))
+    env.seed(123)
+
+    # First reset builds the world, leave it out of the timing
+    env.reset()
+
+    start = time.time()
+    for i in range(nb_resets):
+        env.reset()
+    duration = time.time() - start
+
+    env.close()
+    return nb_resets / duration
+
+
+if __name__ == "__main__":
+    nb_resets = 500
+    if len(sys.argv) > 1:
+        nb_resets = int(sys.argv[1])
+
+    for env_class in [CartPole, CartPolePPMock1, CartPolePPMock2, CartPolePPMock3,
+                      CartPolePPMock4, CartPolePPMock5]:
+        print('{}: {:.1f} resets/second'.format(env_class.__name__,
+                                               benchmark(env_class, nb_resets)))
@@ -0,0 +1,57 @@
+# Profile where the time goes in one cartpole tick: the physics step, gathering the state
+# array and building the dict view that gets sent to the TA2.
+# Run from the directory holding the env package, e.g. in the generator container:
+#     python3 -m env_generator.envs.cartpolepp.step_profile
+import os.path
+import random
+import sys
+import time
+
+from .n_0 import CartPole
+from .m_5 import CartPolePPMock5
+
+
+def profile(env_class, nb_steps=5000, difficulty='easy'):
+    env = env_class(difficulty)
+    env.path = os.path.dirname(os.path.abspath(__file__))
+    env.seed(123)
+    random.seed(123)
+    env.reset()
+
+    timing = {'step': 0.0, 'state_array': 0.0, 'to_dict': 0.0, 'get_state': 0.0}
+    for i in range(nb_steps):
+        start = time.perf_counter()
+        obs, reward, done, info = env.step(random.choice(env.actions))
+        timing['step'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        obs.to_dict()
+        timing['to_dict'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        env.get_state_array()
+        timing['state_array'] += time.perf_counter() - start
+
+        # The full dict path get_state() still offers
+        start = time.perf_counter()
+        env.get_state()
+        timing['get_state'] += time.perf_counter() - start
+
+        if done:
+            env.reset()
+
+    env.close()
+    return {key: value / nb_steps * 1e6 for key, value in timing.items()}
+
+
+if __name__ == "__main__":
+    nb_steps = 5000
+    if len(sys.argv) > 1:
+        nb_steps = int(sys.argv[1])
+
+    for env_class in [CartPole, CartPolePPMock5]:
+        timing = profile(env_class, nb_steps)
+        print('{}: step {:.1f}us (state array {:.1f}us, dict view {:.1f}us), '
+              'get_state {:.1f}us'.format(env_class.__name__, timing['step'],
+                                          timing['state_array'], timing['to_dict'],
+                                          timing['get_state']))
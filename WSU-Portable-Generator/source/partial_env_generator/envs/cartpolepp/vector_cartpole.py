@@ -0,0 +1,179 @@
+# Drive several headless cartpole envs at once for offline rollouts, no RabbitMQ or TA1 needed.
+#
+#     from env_generator.envs.cartpolepp.vector_cartpole import VectorCartPole
+#
+#     envs = VectorCartPole(nb_envs=8, level=2, difficulty='easy', seed=0, use_processes=True)
+#     obs = envs.reset()
+#     obs, rewards, dones, infos = envs.step(['left'] * 8)
+#     envs.close()
+#
+# Observations are stacked into one (nb_envs, 2 + max_blocks, 7) array laid out like
+# CartPoleState.values, rows for blocks an env does not have are NaN.
+import multiprocessing
+import os.path
+
+import numpy as np
+
+from .n_0 import CartPole
+from .m_1 import CartPolePPMock1
+from .m_2 import CartPolePPMock2
+from .m_3 import CartPolePPMock3
+from .m_4 import CartPolePPMock4
+from .m_5 import CartPolePPMock5
+
+# Env class for each novelty level, 0 is the plain cartpole and 1-5 are the mocks
+CARTPOLE_LEVELS = {0: CartPole,
+                   1: CartPolePPMock1,
+                   2: CartPolePPMock2,
+                   3: CartPolePPMock3,
+                   4: CartPolePPMock4,
+                   5: CartPolePPMock5}
+
+
+def make_cartpole(level, difficulty, seed):
+    if level not in CARTPOLE_LEVELS:
+        raise ValueError('Cartpole level: ' + str(level) + ', is not recognized!')
+
+    env = CARTPOLE_LEVELS[level](difficulty)
+    env.path = os.path.dirname(os.path.abspath(__file__))
+    env.seed(seed)
+    return env
+
+
+# Runs one env in its own process and answers the commands sent down the pipe
+def cartpole_worker(pipe, level, difficulty, seed):
+    # The envs also draw from the global numpy random, give each process its own seed
+    np.random.seed(seed)
+    env = make_cartpole(level, difficulty, seed)
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == 'step':
+                pipe.send(env.step(data))
+            elif command == 'reset':
+                pipe.send(env.reset())
+            elif command == 'close':
+                break
+    finally:
+        env.close()
+        pipe.close()
+
+    return None
+
+
+class VectorCartPole:
+
+    def __init__(self, nb_envs, level=0, difficulty='easy', seed=0, use_processes=False,
+                 auto_reset=True):
+        self.nb_envs = nb_envs
+        self.level = level
+        self.difficulty = difficulty
+        self.seed = seed
+        self.use_processes = use_processes
+        self.auto_reset = auto_reset
+
+        # Envs are cheap to build until their world is generated on the first reset
+        self.max_blocks = make_cartpole(level, difficulty, seed).max_blocks
+
+        # Last CartPoleState of every env, for when the dict view is wanted
+        self.states = [None] * self.nb_envs
+
+        self.envs = list()
+        self.pipes = list()
+        self.processes = list()
+        self._results = [None] * self.nb_envs
+
+        if self.use_processes:
+            for i in range(self.nb_envs):
+                parent_pipe, child_pipe = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=cartpole_worker,
+                                                  args=(child_pipe, level, difficulty, seed + i),
+                                                  daemon=True)
+                process.start()
+                child_pipe.close()
+                self.pipes.append(parent_pipe)
+                self.processes.append(process)
+        else:
+            np.random.seed(seed)
+            for i in range(self.nb_envs):
+                self.envs.append(make_cartpole(level, difficulty, seed + i))
+
+        return None
+
+    def _send(self, index, command, data=None):
+        if self.use_processes:
+            self.pipes[index].send((command, data))
+        elif command == 'step':
+            self._results[index] = self.envs[index].step(data)
+        elif command == 'reset':
+            self._results[index] = self.envs[index].reset()
+
+        return None
+
+    def _recv(self, index):
+        if self.use_processes:
+            return self.pipes[index].recv()
+
+        return self._results[index]
+
+    # Stack the state arrays of every env, padding missing blocks with NaN
+    def stack(self, states):
+        observations = np.full((len(states), 2 + self.max_blocks, 7), np.nan)
+        for ind, state in enumerate(states):
+            observations[ind, :len(state.values)] = state.values
+
+        return observations
+
+    def reset(self):
+        for i in range(self.nb_envs):
+            self._send(i, 'reset')
+        self.states = [self._recv(i) for i in range(self.nb_envs)]
+
+        return self.stack(self.states)
+
+    def step(self, actions):
+        if len(actions) != self.nb_envs:
+            raise ValueError('Expected ' + str(self.nb_envs) + ' actions, got ' +
+                             str(len(actions)) + '!')
+
+        # Every env steps at the same time when they live in their own processes
+        for i, action in enumerate(actions):
+            self._send(i, 'step', action)
+        results = [self._recv(i) for i in range(self.nb_envs)]
+
+        rewards = np.zeros(self.nb_envs)
+        dones = np.zeros(self.nb_envs, dtype=bool)
+        infos = list()
+        for i, (state, reward, done, info) in enumerate(results):
+            self.states[i] = state
+            rewards[i] = reward
+            dones[i] = done
+            infos.append(dict(info))
+
+        # Finished envs start their next episode, the last state goes in the info
+        if self.auto_reset:
+            done_envs = np.flatnonzero(dones)
+            for i in done_envs:
+                infos[i]['terminal_state'] = self.states[i]
+                self._send(i, 'reset')
+            for i in done_envs:
+                self.states[i] = self._recv(i)
+
+        return self.stack(self.states), rewards, dones, infos
+
+    def close(self):
+        if self.use_processes:
+            for pipe in self.pipes:
+                pipe.send(('close', None))
+            for process in self.processes:
+                process.join()
+            for pipe in self.pipes:
+                pipe.close()
+            self.pipes = list()
+            self.processes = list()
+        else:
+            for env in self.envs:
+                env.close()
+            self.envs = list()
+
+        return None
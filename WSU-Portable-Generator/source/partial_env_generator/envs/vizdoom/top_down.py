@@ -0,0 +1,138 @@
+import numpy as np
+
+
+# Draws the top down map of a SailonViz state straight into a numpy image. The walls only change
+# with the map so they are drawn once into a layer, each tick copies that layer and stamps the
+# player, enemies and items on top.
+class TopDownRenderer:
+
+    # Colors (RGB) matching what the old matplotlib plot used
+    colors = {'wall': (0, 0, 0),
+              'player': (31, 119, 180),
+              'enemy': (255, 0, 0),
+              'health': (0, 128, 0),
+              'ammo': (0, 128, 0),
+              'obstacle': (0, 0, 0),
+              'trap': (255, 0, 0)}
+
+    # Marker shape for each kind of entity
+    markers = {'player': 'disc',
+               'enemy': 'disc',
+               'health': 'plus',
+               'ammo': 'ring',
+               'obstacle': 'square',
+               'trap': 'cross'}
+
+    def __init__(self, width=640, height=480, x_range=(-522, 522 + 300), y_range=(-522, 522),
+                 margin=10, arrow_length=75, marker_size=5):
+        self.width = width
+        self.height = height
+        self.x_range = x_range
+        self.y_range = y_range
+        self.arrow_length = arrow_length
+
+        # Equal aspect, fit the map in the image and center it
+        self.scale = min((width - 2 * margin) / (x_range[1] - x_range[0]),
+                         (height - 2 * margin) / (y_range[1] - y_range[0]))
+        self.x_offset = (width - self.scale * (x_range[1] - x_range[0])) / 2
+        self.y_offset = (height - self.scale * (y_range[1] - y_range[0])) / 2
+
+        # Pixel offsets of every marker shape
+        self.shapes = self.build_shapes(marker_size)
+
+        # Blank map until the walls are known
+        self.wall_layer = np.full((height, width, 3), 255, dtype=np.uint8)
+
+        return None
+
+    @staticmethod
+    def build_shapes(size):
+        rows, cols = np.mgrid[-size:size + 1, -size:size + 1]
+        rows = rows.ravel()
+        cols = cols.ravel()
+        dist = np.sqrt(rows ** 2 + cols ** 2)
+
+        keep = {'disc': dist <= size,
+                'ring': (dist <= size) & (dist >= size - 1.5),
+                'square': np.ones(rows.shape, dtype=bool),
+                'plus': (np.abs(rows) <= 1) | (np.abs(cols) <= 1),
+                'cross': (np.abs(rows - cols) <= 1) | (np.abs(rows + cols) <= 1)}
+
+        return {name: (rows[mask], cols[mask]) for name, mask in keep.items()}
+
+    # Convert map coordinates to pixel rows and columns
+    def to_pixels(self, x, y):
+        cols = self.x_offset + (np.asarray(x, dtype=float) - self.x_range[0]) * self.scale
+        rows = self.y_offset + (self.y_range[1] - np.asarray(y, dtype=float)) * self.scale
+        return np.rint(rows).astype(int), np.rint(cols).astype(int)
+
+    # Pixel rows and columns along every segment, thickened to the given width
+    def line_pixels(self, x1, y1, x2, y2, thickness=1):
+        rows1, cols1 = self.to_pixels(x1, y1)
+        rows2, cols2 = self.to_pixels(x2, y2)
+        rows1, cols1, rows2, cols2 = [np.atleast_1d(a) for a in (rows1, cols1, rows2, cols2)]
+
+        # Enough samples along each segment to not leave gaps
+        nb_samples = np.maximum(np.abs(rows2 - rows1), np.abs(cols2 - cols1)) + 1
+        seg = np.repeat(np.arange(len(rows1)), nb_samples)
+        start = np.repeat(np.cumsum(nb_samples) - nb_samples, nb_samples)
+        frac = (np.arange(len(seg)) - start) / np.maximum(nb_samples[seg] - 1, 1)
+        rows = np.rint(rows1[seg] + (rows2[seg] - rows1[seg]) * frac).astype(int)
+        cols = np.rint(cols1[seg] + (cols2[seg] - cols1[seg]) * frac).astype(int)
+
+        # Square brush for thick lines
+        if thickness > 1:
+            brush_rows, brush_cols = np.mgrid[0:thickness, 0:thickness] - (thickness - 1) // 2
+            rows = (rows[:, None] + brush_rows.ravel()[None, :]).ravel()
+            cols = (cols[:, None] + brush_cols.ravel()[None, :]).ravel()
+
+        return rows, cols
+
+    def paint(self, image, rows, cols, color):
+        inside = (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+        image[rows[inside], cols[inside]] = color
+        return None
+
+    # Draw the walls from the initial state once
+    def set_walls(self, walls):
+        self.wall_layer = np.full((self.height, self.width, 3), 255, dtype=np.uint8)
+        if len(walls) > 0:
+            rows, cols = self.line_pixels([wall['x1'] for wall in walls],
+                                          [wall['y1'] for wall in walls],
+                                          [wall['x2'] for wall in walls],
+                                          [wall['y2'] for wall in walls],
+                                          thickness=2)
+            self.paint(self.wall_layer, rows, cols, self.colors['wall'])
+
+        return None
+
+    def render(self, state):
+        image = self.wall_layer.copy()
+
+        # Gather every entity so each kind is stamped in one go
+        entities = list()
+        if 'player' in state:
+            entities.append(('player', [state['player']]))
+        entities.append(('enemy', state['enemies']))
+        for kind in ['health', 'ammo', 'trap', 'obstacle']:
+            entities.append((kind, state['items'][kind]))
+
+        for kind, group in entities:
+            if len(group) == 0:
+                continue
+            x = np.array([entity['x_position'] for entity in group])
+            y = np.array([entity['y_position'] for entity in group])
+
+            # Player and enemies get an arrow for the way they face
+            if kind in ['player', 'enemy']:
+                angle = np.array([entity['angle'] for entity in group]) / 180 * np.pi
+                rows, cols = self.line_pixels(x, y, x + self.arrow_length * np.cos(angle),
+                                              y + self.arrow_length * np.sin(angle))
+                self.paint(image, rows, cols, self.colors[kind])
+
+            rows, cols = self.to_pixels(x, y)
+            shape_rows, shape_cols = self.shapes[self.markers[kind]]
+            self.paint(image, (rows[:, None] + shape_rows[None, :]).ravel(),
+                       (cols[:, None] + shape_cols[None, :]).ravel(), self.colors[kind])
+
+        return image
@@ -7,6 +7,7 @@ import numpy as np
 import vizdoom as vzd
 
 from .Agents import Agents
+from .top_down import TopDownRenderer
 
 
 class SailonViz:
@@ -37,10 +38,16 @@ class SailonViz:
         self.enemies_health = None
         self.id_to_cvar = dict()
         self.use_top_down = False
+        self.top_down = TopDownRenderer()
         self.walls = None
         self.time = None
         self.time_delta = 1.0 / 35.0
 
+        # Snapshot of the current tick shared by the agents, observation and images, it is
+        # cleared whenever the game moves on
+        self.game_state = None
+        self.tick_state = None
+
         # Set internal params
         self.step_limit = 2000
         self.actions = {'nothing': [False, False, False, False, False, 0],
@@ -115,6 +122,24 @@ class SailonViz:
 
         return None
 
+    def reseed(self, seed):
+        # Reuse the initialized game for a new seed instead of building another one
+        self.seed = seed
+        self.id_to_cvar = dict()
+        self.Agents = Agents(self.level, self.difficulty, self.use_mock)
+
+        # Set seed here
+        random.seed(self.seed)
+        np.random.seed(self.seed)
+        self.game.set_seed(self.seed)
+
+        return None
+
+    def close(self):
+        self.game.close()
+
+        return None
+
     def step(self, action):
         # Decode action
         action = self.actions[action]
@@ -127,6 +152,7 @@ class SailonViz:
 
         # Make action
         self.game.make_action(action)
+        self.clear_tick_state()
 
         # Update counter
         self.tick = self.tick + 1
@@ -175,63 +201,24 @@ class SailonViz:
             return self.get_top_down()
         else:
             # Get current game information
-            return self.game.get_state().screen_buffer
+            return self.get_game_state().screen_buffer
 
     def get_top_down(self):
-        import matplotlib.pyplot as plt
-        import numpy as np
-
-        # Make a random plot...
-        fig = plt.figure()
-        fig.add_subplot(111)
-
-        plt.xlim(-522, 522 + 300)
-        plt.ylim(-522, 522)
-        plt.gca().set_aspect('equal', adjustable='box')
-
-        # Draw stuff
-        state = self.get_state()
-        for wall in self.walls:
-            plt.plot([wall['x1'], wall['x2']], [wall['y1'], wall['y2']], color='black', linewidth=2)
-
-        # Draw player
-        x, y = state['player']['x_position'], state['player']['y_position']
-        a = state['player']['angle'] / 180 * np.pi
-        plt.plot(x, y, marker="$P$", label='player')
-        plt.arrow(x, y, 75 * np.cos(a), 75 * np.sin(a), head_width=10)
-
-        # Draw enemy
-        for ind, enemy in enumerate(state['enemies']):
-            x, y = enemy['x_position'], enemy['y_position']
-            a = enemy['angle'] / 180 * np.pi
-            if ind == 0:
-                plt.plot(x, y, marker="$" + str(enemy['id']) + "$", color='red', label='enemy')
-            else:
-                plt.plot(x, y, marker="$" + str(enemy['id']) + "$", color='red')
-            plt.arrow(x, y, 75 * np.cos(a), 75 * np.sin(a), head_width=10)
-
-        # Draw stuff
-        mark = {'health': "$H$", 'trap': "x", 'obstacle': 's', 'ammo': "$A$"}
-        col = {'health': 'green', 'ammo': 'green', 'obstacle': 'black', 'trap': 'red'}
-        for type in state['items']:
-            for ind, item in enumerate(state['items'][type]):
-                x, y = item['x_position'], item['y_position']
-                if ind == 0:
-                    plt.plot(x, y, marker=mark[type], color=col[type], label=type)
-                else:
-                    plt.plot(x, y, marker=mark[type], color=col[type])
-
-        # If we haven't already shown or saved the plot, then we need to
-        # draw the figure first...
-        plt.legend(loc='center right', handlelength=0)
-        fig.canvas.draw()
-
-        # Now we can save it to a numpy array.
-        data = np.fromstring(fig.canvas.tostring_rgb(), dtype=np.uint8, sep='')
-        data = data.reshape(fig.canvas.get_width_height()[::-1] + (3,))
-
-        plt.close()
-        return data
+        # Walls are already drawn from the initial state, only entities are stamped per tick
+        return self.top_down.render(self.get_state())
+
+    # Raw vizdoom state for this tick, only asked of the game once per tick
+    def get_game_state(self):
+        if self.game_state is None:
+            self.game_state = self.game.get_state()
+
+        return self.game_state
+
+    def clear_tick_state(self):
+        self.game_state = None
+        self.tick_state = None
+
+        return None
 
     def get_state(self, initial=False):
         # Check for game end, if so just send last value
@@ -241,8 +228,12 @@ class SailonViz:
         if self.game is None:
             return self.last_obs
 
+        # Already built this tick, hand out a copy so callers can add keys to their own
+        if self.tick_state is not None and not initial:
+            return dict(self.tick_state)
+
         # Get current game information
-        state = self.game.get_state()
+        state = self.get_game_state()
         health = self.game.get_game_variable(vzd.vizdoom.HEALTH)
         ammo = self.game.get_game_variable(vzd.vizdoom.AMMO2)
 
@@ -316,6 +307,12 @@ class SailonViz:
                     data['walls'].append({'x1': round(line.x1, 2), 'x2': round(line.x2, 2),
                                           'y1': round(line.y1, 2), 'y2': round(line.y2, 2)})
             self.walls = data['walls']
+            self.top_down.set_walls(self.walls)
+
+        # The initial snapshot also carries the walls, only cache the per tick ones
+        if not initial:
+            self.tick_state = data
+            return dict(data)
 
         return data
 
@@ -329,6 +326,7 @@ class SailonViz:
 
         # Start a new episode
         self.game.new_episode()
+        self.clear_tick_state()
 
         # Docs suggest putting it here too
         self.game.set_seed(self.seed)
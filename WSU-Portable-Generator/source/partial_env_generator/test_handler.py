@@ -40,6 +40,24 @@ class TestHandler:
 
         return None
 
+    def restart(self, seed: int, trial_novelty: int = 0, day_offset: int = 0):
+        # Reset and reseed the already loaded test rather than loading a new one
+        self.seed = seed
+        self.trial_novelty = trial_novelty
+        self.day_offset = day_offset
+        self.test.restart(seed=self.seed,
+                          trial_novelty=self.trial_novelty,
+                          day_offset=self.day_offset)
+
+        # Get first information
+        self.information = self.test.get_state()
+
+        return None
+
+    def close(self):
+        self.test.close()
+        return None
+
     def apply_action(self, action):
         action = action['action']
         self.test.act(action)
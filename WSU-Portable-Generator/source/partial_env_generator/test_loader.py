@@ -6,7 +6,6 @@ import zlib
 import os.path
 
 import numpy as np
-from base64 import b64encode
 import blosc
 
 
@@ -153,6 +152,45 @@ class TestLoader:
 
         return None
 
+    # Reuse the loaded env for a new episode with a new seed
+    def restart(self, seed: int, trial_novelty: int = None, day_offset: int = None):
+        # Only the live domains keep their env between episodes
+        if self.domain not in ['cartpole', 'vizdoom']:
+            raise ValueError('Domain: ' + self.domain + ', can not be restarted!')
+
+        self.seed = seed
+        if trial_novelty is not None:
+            self.trial_novelty = trial_novelty
+            self.trial = int(str(self.trial_novelty)[-1])
+            if self.trial < 0 or self.trial >= 6:
+                raise Exception("Invalid trial level sent to test_loader!")
+        if day_offset is not None:
+            self.day_offset = day_offset
+
+        # Set seeds (thread wide here)
+        random.seed(self.seed)
+        np.random.seed(self.seed)
+
+        if self.domain == 'cartpole':
+            self.env.seed(self.seed)
+            self.reward = 0
+        elif self.domain == 'vizdoom':
+            self.env.reseed(self.seed)
+            self.reward = 2000
+
+        # Start episode
+        self.begin()
+
+        return None
+
+    # Release the env
+    def close(self):
+        if self.env is not None and hasattr(self.env, 'close'):
+            self.env.close()
+        self.env = None
+
+        return None
+
     # Prepare env
     def begin(self):
         # Reset env
@@ -184,7 +222,8 @@ class TestLoader:
 
     def format_sensor(self):
         if self.domain == 'cartpole':
-            self.sensors = self.obs
+            # The env hands back a CartPoleState, the dict view is only built here
+            self.sensors = self.obs.to_dict()
             self.sensors['time_stamp'] = self.env.get_time()
             self.sensors['image'] = self.env.get_image()
             self.actions = self.env.get_actions()
@@ -195,7 +234,8 @@ class TestLoader:
                              'action': 'left'}
 
         elif self.domain == 'vizdoom':
-            self.sensors = self.obs
+            # Copy, the env may still hold this dict as its cached state for the tick
+            self.sensors = dict(self.obs)
             self.sensors['time_stamp'] = self.env.get_time()
             self.sensors['image'] = self.env.get_image()
             self.actions = self.env.get_actions()
@@ -214,10 +254,10 @@ class TestLoader:
                              'action_list': self.actions,
                              'action': self.env.last_label}
 
-        # Compress image if not None
+        # Compress image if not None, the bytes are base64 encoded when sent inside JSON or
+        # travel as a binary part of a multipart message.
         if self.response['sensors']['image'] is not None:
-            comp_img = blosc.pack_array(self.response['sensors']['image'])
-            self.response['sensors']['image'] = b64encode(comp_img).decode('ascii')
+            self.response['sensors']['image'] = blosc.pack_array(self.response['sensors']['image'])
 
         # Send response
         return self.response
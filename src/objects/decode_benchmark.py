@@ -0,0 +1,79 @@
+# Benchmark how long build_objects_from_json() takes to decode one message of each obj_type
+# that is on the experiment hot path.
+# Run from the directory holding the objects package, e.g. in the generator container:
+#     python3 -m objects.decode_benchmark
+import logging
+import sys
+import timeit
+
+from . import objects
+
+
+def build_episode(index=0):
+    return objects.Episode(novelty=objects.NOVELTY_200,
+                           difficulty=objects.DIFFICULTY_EASY,
+                           seed=123,
+                           domain=objects.DOMAIN_CARTPOLE,
+                           data_type=objects.DTYPE_TEST,
+                           episode_index=index,
+                           episode_id=index,
+                           trial_novelty=objects.NOVELTY_200,
+                           day_offset=0,
+                           trial_episode_index=index,
+                           use_image=False)
+
+
+def build_samples():
+    feature_vector = dict({'cart': dict({'x_position': 0.1, 'y_position': 0.2, 'z_position': 0.0,
+                                         'x_velocity': 0.01, 'y_velocity': -0.02,
+                                         'z_velocity': 0.0}),
+                           'pole': dict({'x_quaternion': 0.0, 'y_quaternion': 0.0,
+                                         'z_quaternion': 0.0, 'w_quaternion': 1.0,
+                                         'x_velocity': 0.0, 'y_velocity': 0.0,
+                                         'z_velocity': 0.0}),
+                           'blocks': [dict({'id': i, 'x_position': 1.0 * i, 'y_position': 2.0,
+                                            'z_position': 3.0, 'x_velocity': 0.1,
+                                            'y_velocity': 0.2, 'z_velocity': 0.3})
+                                      for i in range(5)],
+                           'time_stamp': 1600000000.0,
+                           'image': None})
+    return list([
+        ('Episode', build_episode()),
+        ('TestingData', objects.TestingData(secret='secret',
+                                            feature_vector=feature_vector,
+                                            novelty_indicator=None)),
+        ('TestingDataPrediction', objects.TestingDataPrediction(
+            secret='secret',
+            label_prediction=dict({'action': 'left'}))),
+        ('StartGenerator', objects.StartGenerator(domain=objects.DOMAIN_CARTPOLE,
+                                                  novelty=objects.NOVELTY_200,
+                                                  difficulty=objects.DIFFICULTY_EASY,
+                                                  seed=123,
+                                                  server_rpc_queue='rpc.queue',
+                                                  trial_novelty=objects.NOVELTY_200,
+                                                  epoch=1600000000.0,
+                                                  day_offset=0,
+                                                  request_timeout=5,
+                                                  use_image=False)),
+        ('Trial (10 episodes)', objects.Trial(episodes=[build_episode(i) for i in range(10)],
+                                              novelty=objects.NOVELTY_200,
+                                              novelty_visibility=0,
+                                              difficulty=objects.DIFFICULTY_EASY))])
+
+
+def benchmark(body, number=2000, repeat=5) -> float:
+    timer = timeit.Timer(lambda: objects.build_objects_from_json(body))
+    return min(timer.repeat(number=number, repeat=repeat)) / number
+
+
+if __name__ == "__main__":
+    number = 2000
+    if len(sys.argv) > 1:
+        number = int(sys.argv[1])
+    # Decoding logs at debug, keep that out of the timing.
+    logging.disable(logging.CRITICAL)
+
+    print('JSON backend: {}'.format(objects.JSON_BACKEND))
+    for name, sample in build_samples():
+        body = sample.get_json_body()
+        print('{:<22} {:>8.1f}us'.format(name, benchmark(body, number) * 1e6))
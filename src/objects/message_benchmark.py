@@ -0,0 +1,54 @@
+# Benchmark building and serializing the messages that carry the most data: a TestingData with
+# a vizdoom sized feature vector and a Trial of 20 episodes.
+# Run from the directory holding the objects package, e.g. in the generator container:
+#     python3 -m objects.message_benchmark
+import base64
+import os
+import sys
+import timeit
+
+from . import objects
+from .decode_benchmark import build_episode
+
+
+def build_vizdoom_feature_vector():
+    # 40 enemies, 20 items and a 60 kB image string.
+    return dict({'enemies': [dict({'id': i, 'name': 'ZombieMan', 'x_position': 1.0 * i,
+                                   'y_position': 2.0, 'z_position': 0.0, 'angle': 90.0,
+                                   'health': 60}) for i in range(40)],
+                 'items': dict({'health': [dict({'id': i, 'x_position': 1.0 * i,
+                                                 'y_position': 2.0}) for i in range(10)],
+                                'ammo': [dict({'id': i, 'x_position': 1.0 * i,
+                                               'y_position': 2.0}) for i in range(10)]}),
+                 'player': dict({'id': 0, 'x_position': 1.0, 'y_position': 1.0, 'angle': 0.0,
+                                 'health': 100, 'ammo': 10}),
+                 'image': base64.b64encode(os.urandom(45000)).decode('ascii')})
+
+
+def benchmark(function, number=500, repeat=5) -> float:
+    return min(timeit.Timer(function).repeat(number=number, repeat=repeat)) / number
+
+
+if __name__ == "__main__":
+    number = 500
+    if len(sys.argv) > 1:
+        number = int(sys.argv[1])
+
+    feature_vector = build_vizdoom_feature_vector()
+    testing_data = objects.TestingData(secret='secret',
+                                       feature_vector=feature_vector,
+                                       novelty_indicator=None)
+    trial = objects.Trial(episodes=[build_episode(i) for i in range(20)],
+                          novelty=objects.NOVELTY_200,
+                          novelty_visibility=0,
+                          difficulty=objects.DIFFICULTY_EASY)
+
+    print('JSON backend: {}'.format(objects.JSON_BACKEND))
+    for name, function in [
+            ('TestingData ctor + get_json_str',
+             lambda: objects.TestingData(secret='secret',
+                                         feature_vector=feature_vector,
+                                         novelty_indicator=None).get_json_str()),
+            ('TestingData.get_json_obj', testing_data.get_json_obj),
+            ('Trial(20 episodes).get_json_str', trial.get_json_str)]:
+        print('{:<32} {:>8.1f}us'.format(name, benchmark(function, number) * 1e6))
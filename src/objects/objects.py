@@ -28,11 +28,23 @@ import dateutil
 import json
 import logging
 import logging.handlers
+import math
 import pytz
 import re
 import time
 import types
 import uuid
+from base64 import b64encode
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
 
 __major_version__ = '0.7'
 __minor_version__ = '3'
@@ -42,6 +54,197 @@ __database_version__ = re.sub('[.]', '_', __db_version__)
 
 log = logging.getLogger(__name__)
 
+# JSON backends for the wire format, the fastest one installed is used by default.
+JSON_BACKEND_ORJSON = 'orjson'
+JSON_BACKEND_UJSON = 'ujson'
+JSON_BACKEND_STDLIB = 'json'
+JSON_BACKEND = None
+# Key of the JSON reference to a binary part sent alongside the JSON, see json_dumps_parts().
+BINARY_PART = 'aiq_binary_part'
+
+
+def _json_default(value):
+    # Binary values (compressed images) are carried in JSON as base64 strings.
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return b64encode(value).decode('ascii')
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(value).__name__))
+
+
+def _has_non_finite(value) -> bool:
+    # True if value holds a NaN or Infinity float anywhere, x - x is only 0.0 for finite floats.
+    value_type = type(value)
+    if value_type is float:
+        return value - value != 0.0
+    if value_type is dict:
+        value = value.values()
+    elif value_type is not list and value_type is not tuple:
+        return False
+    for item in value:
+        item_type = type(item)
+        if item_type is float:
+            if item - item != 0.0:
+                return True
+        elif item_type is dict or item_type is list or item_type is tuple:
+            if _has_non_finite(item):
+                return True
+    return False
+
+
+def _top_level_nulls(obj) -> int:
+    # The number of nulls written for the None values directly in a message dict.
+    if type(obj) is list and len(obj) == 1:
+        obj = obj[0]
+    if type(obj) is dict:
+        return len([value for value in obj.values() if value is None])
+    return 0
+
+
+def _orjson_dumps_bytes(obj, default=_json_default) -> bytes:
+    body = orjson.dumps(obj, default=default,
+                        option=orjson.OPT_NON_STR_KEYS)
+    # orjson writes NaN and Infinity as null, hand those messages to the stdlib so they go out
+    # the same whatever backend is installed. Every NaN and Infinity adds a null to the body, so
+    # only look through obj when there are more nulls than its top level None values explain.
+    nulls = body.count(b'null')
+    if nulls > 0 and nulls > _top_level_nulls(obj) and _has_non_finite(obj):
+        raise ValueError('orjson can not encode NaN or Infinity.')
+    return body
+
+
+def _ujson_dumps_bytes(obj, default=_json_default) -> bytes:
+    # ujson has no usable default hook, so binary values are left to the stdlib fallback.
+    return ujson.dumps(obj, reject_bytes=True).encode('utf-8')
+
+
+def _stdlib_dumps_bytes(obj, default=_json_default) -> bytes:
+    return json.dumps(obj, default=default).encode('utf-8')
+
+
+# Backend name -> (dumps to bytes, loads) for the backends that are installed.
+_JSON_BACKENDS = dict({JSON_BACKEND_STDLIB: (_stdlib_dumps_bytes, json.loads)})
+if ujson is not None:
+    _JSON_BACKENDS[JSON_BACKEND_UJSON] = (_ujson_dumps_bytes, ujson.loads)
+if orjson is not None:
+    _JSON_BACKENDS[JSON_BACKEND_ORJSON] = (_orjson_dumps_bytes, orjson.loads)
+_json_dumps_bytes = _stdlib_dumps_bytes
+_json_loads = json.loads
+
+
+def set_json_backend(backend: str = None):
+    """Select the JSON library used to encode and decode messages.
+
+    Every backend produces the same JSON, so peers using different backends can talk to each
+    other.
+
+    Parameters
+    ----------
+    backend : str, optional
+        One of JSON_BACKEND_ORJSON, JSON_BACKEND_UJSON or JSON_BACKEND_STDLIB. If not provided
+        the fastest installed backend is chosen.
+
+    Returns
+    -------
+    str
+        The name of the backend now in use.
+    """
+    global JSON_BACKEND, _json_dumps_bytes, _json_loads
+    if backend is None:
+        for backend in [JSON_BACKEND_ORJSON, JSON_BACKEND_UJSON, JSON_BACKEND_STDLIB]:
+            if backend in _JSON_BACKENDS:
+                break
+    if backend not in _JSON_BACKENDS:
+        raise ValueError('The JSON backend {} is not available, installed backends are {}.'.format(
+            backend, ', '.join(_JSON_BACKENDS)))
+    _json_dumps_bytes, _json_loads = _JSON_BACKENDS[backend]
+    JSON_BACKEND = backend
+    return JSON_BACKEND
+
+
+def json_dumps_bytes(obj) -> bytes:
+    """Encode obj as UTF-8 JSON bytes with the selected backend.
+
+    Anything the fast backends refuse or would write differently (unusual keys or types, NaN and
+    Infinity) is encoded by the stdlib instead, so the result never depends on which backend is
+    installed. Binary values are written as base64 strings.
+    """
+    try:
+        return _json_dumps_bytes(obj)
+    except (TypeError, ValueError, OverflowError):
+        return _stdlib_dumps_bytes(obj)
+
+
+def json_dumps_parts(obj):
+    """Encode obj as UTF-8 JSON bytes, moving every binary value out into a separate part.
+
+    Each binary value is replaced in the JSON by {BINARY_PART: index}, where index points into
+    the returned list of parts, so images do not have to be base64 encoded and run through the
+    JSON encoder. resolve_binary_parts() puts them back.
+
+    Returns
+    -------
+    (bytes, list)
+        The JSON bytes and the list of binary parts it refers to.
+    """
+    parts = list()
+
+    def binary_part(value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            parts.append(value)
+            return dict({BINARY_PART: len(parts) - 1})
+        raise TypeError('Object of type {} is not JSON serializable'.format(type(value).__name__))
+
+    try:
+        body = _json_dumps_bytes(obj, default=binary_part)
+    except (TypeError, ValueError, OverflowError):
+        del parts[:]
+        body = _stdlib_dumps_bytes(obj, default=binary_part)
+    return body, parts
+
+
+def resolve_binary_parts(value, parts: list):
+    """Replace the {BINARY_PART: index} references written by json_dumps_parts() with the
+    matching entry of parts, in place where possible.
+
+    Parameters
+    ----------
+    value : dict|list
+        The decoded JSON.
+    parts : list
+        The binary parts that arrived with the JSON.
+
+    Returns
+    -------
+    The resolved value.
+    """
+    if isinstance(value, dict):
+        if len(value) == 1 and BINARY_PART in value:
+            return parts[value[BINARY_PART]]
+        for key, item in value.items():
+            if isinstance(item, (dict, list)):
+                value[key] = resolve_binary_parts(item, parts)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            if isinstance(item, (dict, list)):
+                value[index] = resolve_binary_parts(item, parts)
+    return value
+
+
+def json_dumps(obj) -> str:
+    """Encode obj as a JSON str with the selected backend."""
+    return json_dumps_bytes(obj).decode('utf-8')
+
+
+def json_loads(data):
+    """Decode a JSON str or bytes with the selected backend, falling back to the stdlib for
+    input it rejects (such as the NaN and Infinity literals the stdlib writes)."""
+    try:
+        return _json_loads(data)
+    except ValueError:
+        return json.loads(data)
+
+
+set_json_backend()
+
 # Database naming pattern.
 DATABASE_PATTERN = '{}_v{}'.format('{}', __database_version__)
 
@@ -80,6 +283,8 @@ REQ_DATA = 'request_data'
 BASIC_DATA = 'basic_data'
 BASIC_DATA_PREDICTION = 'basic_data_prediction'
 BASIC_DATA_ACK = 'basic_data_ack'
+BASIC_DATA_STEP = 'basic_data_step'
+BASIC_DATA_STEP_ACK = 'basic_data_step_ack'
 BASIC_EPISODE_NOVELTY = 'basic_episode_novelty'
 REQ_TRAIN_DATA = 'request_training_data'
 TRAINING_DATA = 'training_data'
@@ -97,6 +302,8 @@ REQ_TEST_DATA = 'request_testing_data'
 TESTING_DATA = 'testing_data'
 TEST_DATA_PRED = 'testing_data_prediction'
 TEST_DATA_ACK = 'testing_data_ack'
+TEST_DATA_STEP = 'testing_data_step'
+TEST_DATA_STEP_ACK = 'testing_data_step_ack'
 END_EXPERIMENT = 'end_experiment'
 WAIT_ON_SOTA = 'waiting_on_sota'
 SOTA_IDLE = 'sota_idle'
@@ -500,6 +707,39 @@ class CasasObject(object):
         """
         raise ValueError("This object did not implement get_json().")
 
+    def get_json_body(self, secret=None, key=None) -> bytes:
+        """Returns the UTF-8 encoded JSON list holding this object, as published to RabbitMQ.
+
+        Parameters
+        ----------
+        secret : str, optional
+            The secret in the key:secret required for uploading data.
+        key : str, optional
+            The key in the key:secret required for uploading data.
+
+        Returns
+        -------
+        bytes
+        """
+        return '[{}]'.format(self.get_json(secret=secret, key=key)).encode('utf-8')
+
+    def get_json_parts(self, secret=None, key=None):
+        """Returns the message body as get_json_body() does, but with any binary values moved
+        out of the JSON into separate parts, see json_dumps_parts().
+
+        Parameters
+        ----------
+        secret : str, optional
+            The secret in the key:secret required for uploading data.
+        key : str, optional
+            The key in the key:secret required for uploading data.
+
+        Returns
+        -------
+        (bytes, list)
+        """
+        return self.get_json_body(secret=secret, key=key), list()
+
     def get_detailed_json(self, secret=None, key=None):
         """Returns a JSON string representing this object with additional fields.
 
@@ -3802,7 +4042,13 @@ class AiqObject(CasasObject):
         raise ValueError('This object did not implement get_json_obj().')
 
     def get_json_str(self) -> str:
-        return json.dumps(self.get_json_obj())
+        return json_dumps(self.get_json_obj())
+
+    def get_json_body(self, secret=None, key=None) -> bytes:
+        return json_dumps_bytes([self.get_json_obj()])
+
+    def get_json_parts(self, secret=None, key=None):
+        return json_dumps_parts([self.get_json_obj()])
 
 
 class RequestModel(AiqObject):
@@ -3824,7 +4070,7 @@ class RequestModel(AiqObject):
                'model_name': self.model_name,
                'organization': self.organization,
                'description': self.description}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class RequestState(AiqObject):
@@ -3835,7 +4081,7 @@ class RequestState(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class Model(AiqObject):
@@ -3858,7 +4104,7 @@ class Model(AiqObject):
                'description': self.description,
                'aiq_username': self.aiq_username,
                'aiq_secret': self.aiq_secret}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class RequestExperiment(AiqObject):
@@ -3868,7 +4114,7 @@ class RequestExperiment(AiqObject):
                  description: str = None):
         super().__init__()
         self.obj_type = REQ_EXPERIMENT
-        self.model = copy.deepcopy(model)
+        self.model = model
         self.novelty = novelty
         self.novelty_visibility = novelty_visibility
         self.client_rpc_queue = client_rpc_queue
@@ -3879,10 +4125,12 @@ class RequestExperiment(AiqObject):
         self.seed = seed
         if domain_dict is None:
             domain_dict = dict()
+        else:
+            domain_dict = dict(domain_dict)
         for domain in VALID_DOMAINS:
             if domain not in domain_dict:
                 domain_dict[domain] = False
-        self.domain_dict = copy.deepcopy(domain_dict)
+        self.domain_dict = domain_dict
         self.epoch = epoch
         if self.epoch is None:
             self.epoch = time.time()
@@ -3911,7 +4159,7 @@ class RequestExperiment(AiqObject):
                'no_testing': self.no_testing,
                'experiment_type': self.experiment_type,
                'description': self.description}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class RequestExperimentTrials(RequestExperiment):
@@ -3926,7 +4174,7 @@ class RequestExperimentTrials(RequestExperiment):
                          domain_dict=domain_dict,
                          epoch=epoch)
         self.obj_type = REQ_EXP_TRIALS
-        self.model = copy.deepcopy(model)
+        self.model = model
         self.experiment_secret = experiment_secret
         self.client_rpc_queue = client_rpc_queue
         self.just_one_trial = just_one_trial
@@ -3943,18 +4191,20 @@ class RequestExperimentTrials(RequestExperiment):
                'just_one_trial': self.just_one_trial,
                'domain_dict': self.domain_dict,
                'epoch': self.epoch}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class ExperimentResponse(AiqObject):
     def __init__(self, server_rpc_queue: str, experiment_secret: str, model_experiment_id: int,
-                 experiment_timeout: float):
+                 experiment_timeout: float, step_rpc: bool = False):
         super().__init__()
         self.obj_type = EXPERIMENT_RESP
         self.server_rpc_queue = server_rpc_queue
         self.experiment_secret = experiment_secret
         self.model_experiment_id = model_experiment_id
         self.experiment_timeout = experiment_timeout
+        # True when the server accepts TestingDataStep, older servers leave this out.
+        self.step_rpc = step_rpc
         return
 
     def get_json_obj(self):
@@ -3962,8 +4212,9 @@ class ExperimentResponse(AiqObject):
                'server_rpc_queue': self.server_rpc_queue,
                'experiment_secret': self.experiment_secret,
                'model_experiment_id': self.model_experiment_id,
-               'experiment_timeout': self.experiment_timeout}
-        return copy.deepcopy(obj)
+               'experiment_timeout': self.experiment_timeout,
+               'step_rpc': self.step_rpc}
+        return obj
 
 
 class ExperimentStart(AiqObject):
@@ -3974,7 +4225,7 @@ class ExperimentStart(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class ExperimentEnd(AiqObject):
@@ -3985,7 +4236,7 @@ class ExperimentEnd(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class ExperimentException(AiqObject):
@@ -3998,7 +4249,7 @@ class ExperimentException(AiqObject):
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type,
                'message': self.message}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class BenchmarkRequest(AiqObject):
@@ -4011,20 +4262,20 @@ class BenchmarkRequest(AiqObject):
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type,
                'benchmark_script': self.benchmark_script}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class BenchmarkData(AiqObject):
     def __init__(self, benchmark_data: dict):
         super().__init__()
         self.obj_type = BENCHMARK_DATA
-        self.benchmark_data = copy.deepcopy(benchmark_data)
+        self.benchmark_data = benchmark_data
         return
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type,
                'benchmark_data': self.benchmark_data}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class BenchmarkAck(AiqObject):
@@ -4035,7 +4286,7 @@ class BenchmarkAck(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class NoveltyStart(AiqObject):
@@ -4046,7 +4297,7 @@ class NoveltyStart(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class NoveltyEnd(AiqObject):
@@ -4057,7 +4308,7 @@ class NoveltyEnd(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrialStart(AiqObject):
@@ -4068,7 +4319,7 @@ class TrialStart(AiqObject):
         self.trial_number = trial_number
         self.total_trials = total_trials
         self.message = message
-        self.novelty_description = copy.deepcopy(novelty_description)
+        self.novelty_description = novelty_description
         if self.novelty_description is None:
             self.novelty_description = dict()
         return
@@ -4079,7 +4330,7 @@ class TrialStart(AiqObject):
                'total_trials': self.total_trials,
                'message': self.message,
                'novelty_description': self.novelty_description}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrialEnd(AiqObject):
@@ -4090,7 +4341,7 @@ class TrialEnd(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingStart(AiqObject):
@@ -4101,7 +4352,7 @@ class TrainingStart(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingActive(AiqObject):
@@ -4112,7 +4363,7 @@ class TrainingActive(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingEnd(AiqObject):
@@ -4125,7 +4376,7 @@ class TrainingEnd(AiqObject):
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type,
                'message': self.message}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingModelEnd(AiqObject):
@@ -4136,7 +4387,7 @@ class TrainingModelEnd(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingEndEarly(AiqObject):
@@ -4147,7 +4398,7 @@ class TrainingEndEarly(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingEpisodeStart(AiqObject):
@@ -4162,7 +4413,7 @@ class TrainingEpisodeStart(AiqObject):
         obj = {'obj_type': self.obj_type,
                'episode_number': self.episode_number,
                'total_episodes': self.total_episodes}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingEpisodeActive(AiqObject):
@@ -4173,7 +4424,7 @@ class TrainingEpisodeActive(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class EpisodeEnd(AiqObject):
@@ -4181,14 +4432,14 @@ class EpisodeEnd(AiqObject):
         super().__init__()
         self.obj_type = EPISODE_END
         self.performance = performance
-        self.feedback = copy.deepcopy(feedback)
+        self.feedback = feedback
         return
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type,
                'performance': self.performance,
                'feedback': self.feedback}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class BasicData(AiqObject):
@@ -4210,7 +4461,7 @@ class BasicData(AiqObject):
         obj = {'obj_type': self.obj_type,
                'feature_vector': self.feature_vector,
                'feature_label': self.feature_label}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class BasicDataPrediction(AiqObject):
@@ -4233,7 +4484,7 @@ class BasicDataPrediction(AiqObject):
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type,
                'label_prediction': self.label_prediction}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class BasicDataAck(AiqObject):
@@ -4241,7 +4492,7 @@ class BasicDataAck(AiqObject):
         super().__init__()
         self.obj_type = BASIC_DATA_ACK
         self.performance = performance
-        self.feedback = copy.deepcopy(feedback)
+        self.feedback = feedback
         if self.feedback is None:
             self.feedback = dict()
         return
@@ -4250,7 +4501,41 @@ class BasicDataAck(AiqObject):
         obj = {'obj_type': self.obj_type,
                'performance': self.performance,
                'feedback': self.feedback}
-        return copy.deepcopy(obj)
+        return obj
+
+
+class BasicDataStep(BasicDataPrediction):
+    """A BasicDataPrediction that also asks for the next feature vector, answered with a
+    BasicDataStepAck (or EpisodeEnd) so one round trip replaces BasicDataPrediction followed by
+    RequestData.  Only send this to a generator whose GeneratorResponse set step_rpc.
+    """
+    def __init__(self, label_prediction: dict = None):
+        super().__init__(label_prediction=label_prediction)
+        self.obj_type = BASIC_DATA_STEP
+        return
+
+
+class BasicDataStepAck(BasicDataAck):
+    def __init__(self, feature_vector: dict, feature_label: dict, performance: float = None,
+                 feedback: dict = None):
+        super().__init__(performance=performance,
+                         feedback=feedback)
+        self.obj_type = BASIC_DATA_STEP_ACK
+        self.feature_vector = feature_vector
+        self.feature_label = feature_label
+        return
+
+    def get_basic_data(self) -> BasicData:
+        return BasicData(feature_vector=self.feature_vector,
+                         feature_label=self.feature_label)
+
+    def get_json_obj(self):
+        obj = {'obj_type': self.obj_type,
+               'performance': self.performance,
+               'feedback': self.feedback,
+               'feature_vector': self.feature_vector,
+               'feature_label': self.feature_label}
+        return obj
 
 
 class BasicEpisodeNovelty(AiqObject):
@@ -4261,7 +4546,7 @@ class BasicEpisodeNovelty(AiqObject):
         self.novelty_probability = novelty_probability
         self.novelty_threshold = novelty_threshold
         self.novelty = novelty
-        self.novelty_characterization = copy.deepcopy(novelty_characterization)
+        self.novelty_characterization = novelty_characterization
         return
 
     def get_json_obj(self):
@@ -4270,7 +4555,7 @@ class BasicEpisodeNovelty(AiqObject):
                'novelty_threshold': self.novelty_threshold,
                'novelty': self.novelty,
                'novelty_characterization': self.novelty_characterization}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingEpisodeEnd(EpisodeEnd):
@@ -4284,7 +4569,7 @@ class TrainingEpisodeEnd(EpisodeEnd):
         obj = {'obj_type': self.obj_type,
                'performance': self.performance,
                'feedback': self.feedback}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class RequestData(AiqObject):
@@ -4295,7 +4580,7 @@ class RequestData(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class RequestTrainingData(RequestData):
@@ -4310,7 +4595,7 @@ class RequestTrainingData(RequestData):
         obj = {'obj_type': self.obj_type,
                'model_experiment_id': self.model_experiment_id,
                'secret': self.secret}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingData(AiqObject):
@@ -4319,7 +4604,7 @@ class TrainingData(AiqObject):
         super().__init__()
         self.obj_type = TRAINING_DATA
         self.secret = secret
-        self.feature_vector = copy.deepcopy(feature_vector)
+        self.feature_vector = feature_vector
         self.feature_label = dict()
         valid_label = False
         if 'action' in feature_label:
@@ -4341,7 +4626,7 @@ class TrainingData(AiqObject):
                'feature_label': self.feature_label,
                'utc_remote_epoch_received': self.utc_remote_epoch_received,
                'utc_remote_epoch_sent': time.time()}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingDataPrediction(BasicDataPrediction):
@@ -4373,7 +4658,7 @@ class TrainingDataPrediction(BasicDataPrediction):
                'utc_remote_epoch_sent': time.time(),
                'label_prediction': self.label_prediction,
                'end_early': self.end_early}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingDataAck(AiqObject):
@@ -4382,7 +4667,7 @@ class TrainingDataAck(AiqObject):
         self.obj_type = TRAIN_DATA_ACK
         self.secret = secret
         self.performance = performance
-        self.feedback = copy.deepcopy(feedback)
+        self.feedback = feedback
         return
 
     def get_json_obj(self):
@@ -4390,7 +4675,7 @@ class TrainingDataAck(AiqObject):
                'secret': self.secret,
                'performance': self.performance,
                'feedback': self.feedback}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingEpisodeNovelty(BasicEpisodeNovelty):
@@ -4409,7 +4694,7 @@ class TrainingEpisodeNovelty(BasicEpisodeNovelty):
                'novelty_threshold': self.novelty_threshold,
                'novelty': self.novelty,
                'novelty_characterization': self.novelty_characterization}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TrainingEpisodeNoveltyAck(AiqObject):
@@ -4420,7 +4705,7 @@ class TrainingEpisodeNoveltyAck(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TestingStart(AiqObject):
@@ -4431,7 +4716,7 @@ class TestingStart(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TestingActive(AiqObject):
@@ -4442,7 +4727,7 @@ class TestingActive(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TestingEnd(AiqObject):
@@ -4453,7 +4738,7 @@ class TestingEnd(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TestingEpisodeStart(AiqObject):
@@ -4468,7 +4753,7 @@ class TestingEpisodeStart(AiqObject):
         obj = {'obj_type': self.obj_type,
                'episode_number': self.episode_number,
                'total_episodes': self.total_episodes}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TestingEpisodeActive(AiqObject):
@@ -4479,7 +4764,7 @@ class TestingEpisodeActive(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TestingEpisodeEnd(EpisodeEnd):
@@ -4493,7 +4778,7 @@ class TestingEpisodeEnd(EpisodeEnd):
         obj = {'obj_type': self.obj_type,
                'performance': self.performance,
                'feedback': self.feedback}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class RequestTestingData(RequestData):
@@ -4508,7 +4793,7 @@ class RequestTestingData(RequestData):
         obj = {'obj_type': self.obj_type,
                'model_experiment_id': self.model_experiment_id,
                'secret': self.secret}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TestingData(AiqObject):
@@ -4517,7 +4802,7 @@ class TestingData(AiqObject):
         super().__init__()
         self.obj_type = TESTING_DATA
         self.secret = secret
-        self.feature_vector = copy.deepcopy(feature_vector)
+        self.feature_vector = feature_vector
         self.utc_remote_epoch_received = utc_remote_epoch_received
         if self.utc_remote_epoch_received is None:
             self.utc_remote_epoch_received = time.time()
@@ -4532,7 +4817,7 @@ class TestingData(AiqObject):
                'utc_remote_epoch_received': self.utc_remote_epoch_received,
                'utc_remote_epoch_sent': time.time(),
                'novelty_indicator': self.novelty_indicator}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TestingDataPrediction(BasicDataPrediction):
@@ -4564,7 +4849,7 @@ class TestingDataPrediction(BasicDataPrediction):
                'utc_remote_epoch_sent': time.time(),
                'label_prediction': self.label_prediction,
                'end_early': self.end_early}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TestingDataAck(AiqObject):
@@ -4573,7 +4858,7 @@ class TestingDataAck(AiqObject):
         self.obj_type = TEST_DATA_ACK
         self.secret = secret
         self.performance = performance
-        self.feedback = copy.deepcopy(feedback)
+        self.feedback = feedback
         return
 
     def get_json_obj(self):
@@ -4581,7 +4866,53 @@ class TestingDataAck(AiqObject):
                'secret': self.secret,
                'performance': self.performance,
                'feedback': self.feedback}
-        return copy.deepcopy(obj)
+        return obj
+
+
+class TestingDataStep(TestingDataPrediction):
+    """A TestingDataPrediction that also asks for the next TestingData, answered with a
+    TestingDataStepAck (or TestingEpisodeEnd) so one round trip replaces TestingDataPrediction
+    followed by RequestTestingData.  Only send this to a server whose ExperimentResponse set
+    step_rpc.
+    """
+    def __init__(self, secret: str, utc_remote_epoch_received: float = None,
+                 utc_remote_epoch_sent: float = None, label_prediction: dict = None,
+                 end_early: bool = False):
+        super().__init__(secret=secret,
+                         utc_remote_epoch_received=utc_remote_epoch_received,
+                         utc_remote_epoch_sent=utc_remote_epoch_sent,
+                         label_prediction=label_prediction,
+                         end_early=end_early)
+        self.obj_type = TEST_DATA_STEP
+        return
+
+
+class TestingDataStepAck(TestingDataAck):
+    def __init__(self, secret: str, feature_vector: dict, performance: float = None,
+                 feedback: dict = None, utc_remote_epoch_received: float = None,
+                 utc_remote_epoch_sent: float = None, novelty_indicator: bool = None):
+        super().__init__(secret=secret,
+                         performance=performance,
+                         feedback=feedback)
+        self.obj_type = TEST_DATA_STEP_ACK
+        self.feature_vector = feature_vector
+        self.utc_remote_epoch_received = utc_remote_epoch_received
+        if self.utc_remote_epoch_received is None:
+            self.utc_remote_epoch_received = time.time()
+        self.utc_remote_epoch_sent = utc_remote_epoch_sent
+        self.novelty_indicator = novelty_indicator
+        return
+
+    def get_json_obj(self):
+        obj = {'obj_type': self.obj_type,
+               'secret': self.secret,
+               'performance': self.performance,
+               'feedback': self.feedback,
+               'feature_vector': self.feature_vector,
+               'utc_remote_epoch_received': self.utc_remote_epoch_received,
+               'utc_remote_epoch_sent': time.time(),
+               'novelty_indicator': self.novelty_indicator}
+        return obj
 
 
 class TestingEpisodeNovelty(BasicEpisodeNovelty):
@@ -4600,7 +4931,7 @@ class TestingEpisodeNovelty(BasicEpisodeNovelty):
                'novelty_threshold': self.novelty_threshold,
                'novelty': self.novelty,
                'novelty_characterization': self.novelty_characterization}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class TestingEpisodeNoveltyAck(AiqObject):
@@ -4611,7 +4942,7 @@ class TestingEpisodeNoveltyAck(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class EndExperiment(AiqObject):
@@ -4626,7 +4957,7 @@ class EndExperiment(AiqObject):
         obj = {'obj_type': self.obj_type,
                'model_experiment_id': self.model_experiment_id,
                'secret': self.secret}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class WaitOnSota(AiqObject):
@@ -4637,7 +4968,7 @@ class WaitOnSota(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class SotaIdle(AiqObject):
@@ -4648,7 +4979,7 @@ class SotaIdle(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class Episode(AiqObject):
@@ -4694,14 +5025,14 @@ class Episode(AiqObject):
                'day_offset': self.day_offset,
                'trial_episode_index': self.trial_episode_index,
                'use_image': self.use_image}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class Training(AiqObject):
     def __init__(self, episodes: list):
         super().__init__()
         self.obj_type = OBJ_TRAINING
-        self.episodes = copy.deepcopy(episodes)
+        self.episodes = list(episodes)
         return
 
     def get_json_obj(self):
@@ -4709,14 +5040,14 @@ class Training(AiqObject):
                'episodes': list()}
         for ep in self.episodes:
             obj['episodes'].append(ep.get_json_obj())
-        return copy.deepcopy(obj)
+        return obj
 
 
 class Trial(AiqObject):
     def __init__(self, episodes: list, novelty: int, novelty_visibility: int, difficulty: str):
         super().__init__()
         self.obj_type = OBJ_TRIAL
-        self.episodes = copy.deepcopy(episodes)
+        self.episodes = list(episodes)
         self.novelty = novelty
         self.novelty_visibility = novelty_visibility
         self.difficulty = difficulty
@@ -4730,14 +5061,14 @@ class Trial(AiqObject):
                'difficulty': self.difficulty}
         for ep in self.episodes:
             obj['episodes'].append(ep.get_json_obj())
-        return copy.deepcopy(obj)
+        return obj
 
 
 class NoveltyGroup(AiqObject):
     def __init__(self, trials: list):
         super().__init__()
         self.obj_type = OBJ_NOVELTY_GRP
-        self.trials = copy.deepcopy(trials)
+        self.trials = list(trials)
         return
 
     def get_json_obj(self):
@@ -4745,15 +5076,15 @@ class NoveltyGroup(AiqObject):
                'trials': list()}
         for trial in self.trials:
             obj['trials'].append(trial.get_json_obj())
-        return copy.deepcopy(obj)
+        return obj
 
 
 class Experiment(AiqObject):
     def __init__(self, training: Training, novelty_groups: list, budget: float):
         super().__init__()
         self.obj_type = OBJ_EXPERIMENT
-        self.training = copy.deepcopy(training)
-        self.novelty_groups = copy.deepcopy(novelty_groups)
+        self.training = training
+        self.novelty_groups = list(novelty_groups)
         self.budget = budget
         self.model_experiment_id = None
         return
@@ -4765,7 +5096,7 @@ class Experiment(AiqObject):
                'budget': self.budget}
         for nov_group in self.novelty_groups:
             obj['novelty_groups'].append(nov_group.get_json_obj())
-        return copy.deepcopy(obj)
+        return obj
 
 
 class RequestNoveltyDescription(AiqObject):
@@ -4788,20 +5119,20 @@ class RequestNoveltyDescription(AiqObject):
                'domain': self.domain,
                'novelty': self.novelty,
                'difficulty': self.difficulty}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class NoveltyDescription(AiqObject):
     def __init__(self, novelty_description: dict):
         super().__init__()
         self.obj_type = OBJ_NOVELTY_DESCRIPTION
-        self.novelty_description = copy.deepcopy(novelty_description)
+        self.novelty_description = novelty_description
         return
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type,
                'novelty_description': self.novelty_description}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class GeneratorIdle(AiqObject):
@@ -4812,7 +5143,7 @@ class GeneratorIdle(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class GeneratorReset(AiqObject):
@@ -4823,7 +5154,7 @@ class GeneratorReset(AiqObject):
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class StartGenerator(AiqObject):
@@ -4866,20 +5197,23 @@ class StartGenerator(AiqObject):
                'day_offset': self.day_offset,
                'request_timeout': self.request_timeout,
                'use_image': self.use_image}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class GeneratorResponse(AiqObject):
-    def __init__(self, generator_rpc_queue: str):
+    def __init__(self, generator_rpc_queue: str, step_rpc: bool = False):
         super().__init__()
         self.obj_type = GENERATOR_RESPONSE
         self.generator_rpc_queue = generator_rpc_queue
+        # True when the generator accepts BasicDataStep, older generators leave this out.
+        self.step_rpc = step_rpc
         return
 
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type,
-               'generator_rpc_queue': self.generator_rpc_queue}
-        return copy.deepcopy(obj)
+               'generator_rpc_queue': self.generator_rpc_queue,
+               'step_rpc': self.step_rpc}
+        return obj
 
 
 class AnalysisReady(AiqObject):
@@ -4892,7 +5226,7 @@ class AnalysisReady(AiqObject):
     def get_json_obj(self):
         obj = {'obj_type': self.obj_type,
                'model_experiment_id': self.model_experiment_id}
-        return copy.deepcopy(obj)
+        return obj
 
 
 class AnalysisPartial(AiqObject):
@@ -4907,7 +5241,7 @@ class AnalysisPartial(AiqObject):
         obj = {'obj_type': self.obj_type,
                'model_experiment_id': self.model_experiment_id,
                'experiment_trial_id': self.experiment_trial_id}
-        return copy.deepcopy(obj)
+        return obj
 
 
 """
@@ -5099,13 +5433,314 @@ def build_routing_key(action=EVENT, sensor_type='*', package_type='*', site='*',
     return routing_key
 
 
-def build_objects_from_json(message):
+class AiqDecoder(object):
+    """Builds one AIQ obj_type from its decoded JSON dictionary.
+
+    The required attributes are validated with a single set comparison against the keys of the
+    JSON dictionary, the per-attribute error messages are only built when something is missing.
+
+    Attributes
+    ----------
+    obj_class : class
+        The AiqObject subclass this decoder builds.
+    required : tuple
+        The JSON attributes that must be present, in the order errors are reported.
+    optional : tuple
+        JSON attributes that are passed to the constructor only when they are present.
+    build : function
+        Optional function(obj, errormsgs) used instead of calling obj_class(**obj[required]),
+        for the objects that contain sub-objects or rename attributes.
+    """
+    def __init__(self, obj_class, required=None, optional=None, build=None):
+        self.obj_class = obj_class
+        self.required = tuple(required or ())
+        self.optional = tuple(optional or ())
+        self.build = build
+        self._required_set = frozenset(self.required)
+        self._missing_messages = dict()
+        for attribute in self.required:
+            self._missing_messages[attribute] = ('Could not obtain attribute {0}, please include '
+                                                 'json attribute {0}.'.format(attribute))
+        return
+
+    def decode(self, obj: dict, errormsgs: list):
+        """Validate and build the object.
+
+        Parameters
+        ----------
+        obj : dict
+            The decoded JSON dictionary for a single AIQ object.
+        errormsgs : list
+            The list any validation errors are appended to.
+
+        Returns
+        -------
+        AiqObject
+            The new object, or None if there were errors.
+        """
+        if not obj.keys() >= self._required_set:
+            for attribute in self.required:
+                if attribute not in obj:
+                    errormsgs.append(self._missing_messages[attribute])
+            return None
+        if self.build is not None:
+            return self.build(obj, errormsgs)
+        kwargs = {attribute: obj[attribute] for attribute in self.required}
+        for attribute in self.optional:
+            if attribute in obj:
+                kwargs[attribute] = obj[attribute]
+        return self.obj_class(**kwargs)
+
+
+def _decode_request_experiment(obj, errormsgs):
+    model = get_subobject(casas_object=obj['model'],
+                          errormsgs=errormsgs)
+    if len(errormsgs) > 0:
+        return None
+    return RequestExperiment(model=model,
+                             novelty=obj['novelty'],
+                             novelty_visibility=obj['novelty_visibility'],
+                             client_rpc_queue=obj['client_rpc_queue'],
+                             git_version=obj['git_version'],
+                             experiment_type=obj['experiment_type'],
+                             seed=obj['seed'],
+                             domain_dict=obj['domain_dict'],
+                             epoch=obj.get('epoch'),
+                             no_testing=obj['no_testing'],
+                             description=obj['description'])
+
+
+def _decode_request_experiment_trials(obj, errormsgs):
+    model = get_subobject(casas_object=obj['model'],
+                          errormsgs=errormsgs)
+    if len(errormsgs) > 0:
+        return None
+    return RequestExperimentTrials(model=model,
+                                   experiment_secret=obj['experiment_secret'],
+                                   client_rpc_queue=obj['client_rpc_queue'],
+                                   just_one_trial=obj['just_one_trial'],
+                                   domain_dict=obj['domain_dict'],
+                                   epoch=obj.get('epoch'))
+
+
+def _decode_experiment_exception(obj, errormsgs):
+    if 'message' not in obj:
+        raise AiqExperimentException(value='Experiment Exception raised without a message!')
+    raise AiqExperimentException(value=obj['message'])
+
+
+def _decode_subobject_list(values, errormsgs):
+    sub_objects = list()
+    if len(values) > 0:
+        sub_objects = get_subobject_list(casas_object=json_dumps(values),
+                                         errormsgs=errormsgs)
+    return sub_objects
+
+
+def _decode_training(obj, errormsgs):
+    episodes = _decode_subobject_list(values=obj['episodes'], errormsgs=errormsgs)
+    if len(errormsgs) > 0:
+        return None
+    return Training(episodes=episodes)
+
+
+def _decode_trial(obj, errormsgs):
+    episodes = _decode_subobject_list(values=obj['episodes'], errormsgs=errormsgs)
+    if len(errormsgs) > 0:
+        return None
+    return Trial(episodes=episodes,
+                 novelty=obj['novelty'],
+                 novelty_visibility=obj['novelty_visibility'],
+                 difficulty=obj['difficulty'])
+
+
+def _decode_novelty_group(obj, errormsgs):
+    trials = _decode_subobject_list(values=obj['trials'], errormsgs=errormsgs)
+    if len(errormsgs) > 0:
+        return None
+    return NoveltyGroup(trials=trials)
+
+
+def _decode_experiment(obj, errormsgs):
+    training = get_subobject(casas_object=json_dumps([obj['training']]),
+                             errormsgs=errormsgs)
+    if len(errormsgs) > 0:
+        return None
+    nov_groups = _decode_subobject_list(values=obj['novelty_groups'], errormsgs=errormsgs)
+    if len(errormsgs) > 0:
+        return None
+    return Experiment(training=training,
+                      novelty_groups=nov_groups,
+                      budget=obj['budget'])
+
+
+def _decode_request_novelty_description(obj, errormsgs):
+    return RequestNoveltyDescription(r_domain=obj['domain'],
+                                     novelty=obj['novelty'],
+                                     difficulty=obj['difficulty'])
+
+
+# The obj_type -> AiqDecoder dispatch table used by build_objects_from_json().
+AIQ_DECODERS = dict({
+    REQ_MODEL: AiqDecoder(RequestModel,
+                          required=['aiq_username', 'aiq_secret', 'model_name', 'organization',
+                                    'description']),
+    REQ_STATE: AiqDecoder(RequestState),
+    MODEL: AiqDecoder(Model,
+                      required=['aiq_username', 'aiq_secret', 'model_name', 'organization',
+                                'description']),
+    REQ_EXPERIMENT: AiqDecoder(RequestExperiment,
+                               required=['model', 'novelty', 'novelty_visibility',
+                                         'client_rpc_queue', 'git_version', 'seed', 'domain_dict',
+                                         'experiment_type', 'no_testing', 'description'],
+                               build=_decode_request_experiment),
+    REQ_EXP_TRIALS: AiqDecoder(RequestExperimentTrials,
+                               required=['model', 'experiment_secret', 'client_rpc_queue',
+                                         'just_one_trial', 'domain_dict'],
+                               build=_decode_request_experiment_trials),
+    EXPERIMENT_RESP: AiqDecoder(ExperimentResponse,
+                                required=['server_rpc_queue', 'experiment_secret',
+                                          'model_experiment_id', 'experiment_timeout'],
+                                optional=['step_rpc']),
+    EXPERIMENT_START: AiqDecoder(ExperimentStart),
+    EXPERIMENT_END: AiqDecoder(ExperimentEnd),
+    EXPERIMENT_EXCEPTION: AiqDecoder(ExperimentException,
+                                     build=_decode_experiment_exception),
+    BENCHMARK_REQ: AiqDecoder(BenchmarkRequest,
+                              required=['benchmark_script']),
+    BENCHMARK_DATA: AiqDecoder(BenchmarkData,
+                               required=['benchmark_data']),
+    BENCHMARK_ACK: AiqDecoder(BenchmarkAck),
+    NOVELTY_START: AiqDecoder(NoveltyStart),
+    NOVELTY_END: AiqDecoder(NoveltyEnd),
+    TRIAL_START: AiqDecoder(TrialStart,
+                            required=['trial_number', 'total_trials', 'message',
+                                      'novelty_description']),
+    TRIAL_END: AiqDecoder(TrialEnd),
+    TRAINING_START: AiqDecoder(TrainingStart),
+    TRAINING_ACTIVE: AiqDecoder(TrainingActive),
+    TRAINING_END: AiqDecoder(TrainingEnd,
+                             required=['message']),
+    TRAINING_MODEL_END: AiqDecoder(TrainingModelEnd),
+    TRAINING_END_EARLY: AiqDecoder(TrainingEndEarly),
+    TRAIN_EPISODE_START: AiqDecoder(TrainingEpisodeStart,
+                                    required=['episode_number', 'total_episodes']),
+    TRAIN_EPISODE_ACTIVE: AiqDecoder(TrainingEpisodeActive),
+    TRAIN_EPISODE_END: AiqDecoder(TrainingEpisodeEnd,
+                                  required=['performance', 'feedback']),
+    EPISODE_END: AiqDecoder(EpisodeEnd,
+                            required=['performance', 'feedback']),
+    BASIC_DATA: AiqDecoder(BasicData,
+                           required=['feature_vector', 'feature_label']),
+    BASIC_DATA_PREDICTION: AiqDecoder(BasicDataPrediction,
+                                      required=['label_prediction']),
+    BASIC_DATA_ACK: AiqDecoder(BasicDataAck,
+                               required=['performance', 'feedback']),
+    BASIC_DATA_STEP: AiqDecoder(BasicDataStep,
+                                required=['label_prediction']),
+    BASIC_DATA_STEP_ACK: AiqDecoder(BasicDataStepAck,
+                                    required=['feature_vector', 'feature_label', 'performance',
+                                              'feedback']),
+    BASIC_EPISODE_NOVELTY: AiqDecoder(BasicEpisodeNovelty,
+                                      required=['novelty_probability', 'novelty_threshold',
+                                                'novelty', 'novelty_characterization']),
+    REQ_DATA: AiqDecoder(RequestData),
+    REQ_TRAIN_DATA: AiqDecoder(RequestTrainingData,
+                               required=['model_experiment_id', 'secret']),
+    TRAINING_DATA: AiqDecoder(TrainingData,
+                              required=['secret', 'feature_vector', 'feature_label',
+                                        'utc_remote_epoch_received', 'utc_remote_epoch_sent']),
+    TRAIN_DATA_PRED: AiqDecoder(TrainingDataPrediction,
+                                required=['secret', 'utc_remote_epoch_received',
+                                          'utc_remote_epoch_sent', 'label_prediction',
+                                          'end_early']),
+    TRAIN_DATA_ACK: AiqDecoder(TrainingDataAck,
+                               required=['secret', 'performance', 'feedback']),
+    TRAIN_EPISODE_NOVELTY: AiqDecoder(TrainingEpisodeNovelty,
+                                      required=['novelty_probability', 'novelty_threshold',
+                                                'novelty', 'novelty_characterization']),
+    TRAIN_EPISODE_NOVELTY_ACK: AiqDecoder(TrainingEpisodeNoveltyAck),
+    TESTING_START: AiqDecoder(TestingStart),
+    TESTING_ACTIVE: AiqDecoder(TestingActive),
+    TESTING_END: AiqDecoder(TestingEnd),
+    TEST_EPISODE_START: AiqDecoder(TestingEpisodeStart,
+                                   required=['episode_number', 'total_episodes']),
+    TEST_EPISODE_ACTIVE: AiqDecoder(TestingEpisodeActive),
+    TEST_EPISODE_END: AiqDecoder(TestingEpisodeEnd,
+                                 required=['performance', 'feedback']),
+    REQ_TEST_DATA: AiqDecoder(RequestTestingData,
+                              required=['model_experiment_id', 'secret']),
+    TESTING_DATA: AiqDecoder(TestingData,
+                             required=['secret', 'feature_vector', 'utc_remote_epoch_received',
+                                       'utc_remote_epoch_sent', 'novelty_indicator']),
+    TEST_DATA_PRED: AiqDecoder(TestingDataPrediction,
+                               required=['secret', 'utc_remote_epoch_received',
+                                         'utc_remote_epoch_sent', 'label_prediction',
+                                         'end_early']),
+    TEST_DATA_ACK: AiqDecoder(TestingDataAck,
+                              required=['secret', 'performance', 'feedback']),
+    TEST_DATA_STEP: AiqDecoder(TestingDataStep,
+                               required=['secret', 'utc_remote_epoch_received',
+                                         'utc_remote_epoch_sent', 'label_prediction',
+                                         'end_early']),
+    TEST_DATA_STEP_ACK: AiqDecoder(TestingDataStepAck,
+                                   required=['secret', 'feature_vector', 'performance', 'feedback',
+                                             'utc_remote_epoch_received', 'utc_remote_epoch_sent',
+                                             'novelty_indicator']),
+    TEST_EPISODE_NOVELTY: AiqDecoder(TestingEpisodeNovelty,
+                                     required=['novelty_probability', 'novelty_threshold',
+                                               'novelty', 'novelty_characterization']),
+    TEST_EPISODE_NOVELTY_ACK: AiqDecoder(TestingEpisodeNoveltyAck),
+    END_EXPERIMENT: AiqDecoder(EndExperiment,
+                               required=['model_experiment_id', 'secret']),
+    WAIT_ON_SOTA: AiqDecoder(WaitOnSota),
+    SOTA_IDLE: AiqDecoder(SotaIdle),
+    OBJ_EPISODE: AiqDecoder(Episode,
+                            required=['novelty', 'difficulty', 'seed', 'domain', 'data_type',
+                                      'episode_index', 'episode_id', 'trial_novelty',
+                                      'day_offset', 'trial_episode_index', 'use_image']),
+    OBJ_TRAINING: AiqDecoder(Training,
+                             required=['episodes'],
+                             build=_decode_training),
+    OBJ_TRIAL: AiqDecoder(Trial,
+                          required=['episodes', 'novelty', 'novelty_visibility', 'difficulty'],
+                          build=_decode_trial),
+    OBJ_NOVELTY_GRP: AiqDecoder(NoveltyGroup,
+                                required=['trials'],
+                                build=_decode_novelty_group),
+    OBJ_EXPERIMENT: AiqDecoder(Experiment,
+                               required=['training', 'novelty_groups', 'budget'],
+                               build=_decode_experiment),
+    REQ_NOVELTY_DESCRIPTION: AiqDecoder(RequestNoveltyDescription,
+                                        required=['domain', 'novelty', 'difficulty'],
+                                        build=_decode_request_novelty_description),
+    OBJ_NOVELTY_DESCRIPTION: AiqDecoder(NoveltyDescription,
+                                        required=['novelty_description']),
+    GENERATOR_IDLE: AiqDecoder(GeneratorIdle),
+    GENERATOR_RESET: AiqDecoder(GeneratorReset),
+    START_GENERATOR: AiqDecoder(StartGenerator,
+                                required=['domain', 'novelty', 'difficulty', 'seed',
+                                          'server_rpc_queue', 'trial_novelty', 'epoch',
+                                          'day_offset', 'request_timeout', 'use_image']),
+    GENERATOR_RESPONSE: AiqDecoder(GeneratorResponse,
+                                   required=['generator_rpc_queue'],
+                                   optional=['step_rpc']),
+    ANALYSIS_READY: AiqDecoder(AnalysisReady,
+                               required=['model_experiment_id']),
+    ANALYSIS_PARTIAL: AiqDecoder(AnalysisPartial,
+                                 required=['model_experiment_id', 'experiment_trial_id'])})
+
+
+def build_objects_from_json(message, binary_parts=None):
     """This function converts a string message into a list of casas.objects.
 
     Parameters
     ----------
-    message : str
+    message : str|bytes
         A string of a JSON list containing dictionaries.
+    binary_parts : list, optional
+        The binary parts referenced by the JSON when the message was sent as multipart, see
+        json_dumps_parts().
 
     Returns
     -------
@@ -5113,19 +5748,21 @@ def build_objects_from_json(message):
         A list containing Event, Tag, Control, Heartbeat, or Translation objects.
         This list can be mixed for different types so make sure to check the action variable.
     """
-    log.debug("build_objects_from_json( {} )".format(str(message)))
+    log.debug("build_objects_from_json( %s )", message)
     response = CasasResponse(status='success',
                              response_type='data',
                              error_message='No Errors')
     return_objects = list()
     result = None
     try:
-        blob = json.loads(message)
+        blob = json_loads(message)
+        if binary_parts:
+            blob = resolve_binary_parts(blob, binary_parts)
 
         # AIQ quick modification.
         if isinstance(blob, dict):
             if 'obj_type' in blob:
-                blob = list([copy.deepcopy(blob)])
+                blob = list([blob])
 
         if len(blob) == 0:
             response.add_error(
@@ -5134,752 +5771,19 @@ def build_objects_from_json(message):
 
         element_id = 0
         for obj in blob:
-            log.debug("object: {}".format(str(obj)))
+            log.debug("object: %s", obj)
             errormsgs = list()
             obj_uuid = "unknown"
 
             if 'obj_type' in obj:
-                if obj['obj_type'] == REQ_MODEL:
-                    if 'aiq_username' not in obj:
-                        errormsgs.append('Could not obtain attribute aiq_username, '
-                                         'please include json attribute aiq_username.')
-                    if 'aiq_secret' not in obj:
-                        errormsgs.append('Could not obtain attribute aiq_secret, '
-                                         'please include json attribute aiq_secret.')
-                    if 'model_name' not in obj:
-                        errormsgs.append('Could not obtain attribute model_name, '
-                                         'please include json attribute model_name.')
-                    if 'organization' not in obj:
-                        errormsgs.append('Could not obtain attribute organization, '
-                                         'please include json attribute organization.')
-                    if 'description' not in obj:
-                        errormsgs.append('Could not obtain attribute description, '
-                                         'please include json attribute description.')
-                    if len(errormsgs) == 0:
-                        result = RequestModel(aiq_username=obj['aiq_username'],
-                                              aiq_secret=obj['aiq_secret'],
-                                              model_name=obj['model_name'],
-                                              organization=obj['organization'],
-                                              description=obj['description'])
-                elif obj['obj_type'] == REQ_STATE:
-                    if len(errormsgs) == 0:
-                        result = RequestState()
-                elif obj['obj_type'] == MODEL:
-                    if 'aiq_username' not in obj:
-                        errormsgs.append('Could not obtain attribute aiq_username, '
-                                         'please include json attribute aiq_username.')
-                    if 'aiq_secret' not in obj:
-                        errormsgs.append('Could not obtain attribute aiq_secret, '
-                                         'please include json attribute aiq_secret.')
-                    if 'model_name' not in obj:
-                        errormsgs.append('Could not obtain attribute model_name, '
-                                         'please include json attribute model_name.')
-                    if 'organization' not in obj:
-                        errormsgs.append('Could not obtain attribute organization, '
-                                         'please include json attribute organization.')
-                    if 'description' not in obj:
-                        errormsgs.append('Could not obtain attribute description, '
-                                         'please include json attribute description.')
-                    result = Model(model_name=obj['model_name'],
-                                   organization=obj['organization'],
-                                   aiq_username=obj['aiq_username'],
-                                   aiq_secret=obj['aiq_secret'],
-                                   description=obj['description'])
-                elif obj['obj_type'] == REQ_EXPERIMENT:
-                    model = None
-                    epoch = None
-                    if 'model' in obj:
-                        model = get_subobject(casas_object=obj['model'],
-                                              errormsgs=errormsgs)
-                    else:
-                        errormsgs.append('Could not obtain attribute model, '
-                                         'please include json attribute model.')
-                    if 'novelty' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty, '
-                                         'please include json attribute novelty.')
-                    if 'novelty_visibility' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_visibility, '
-                                         'please include json attribute novelty_visibility.')
-                    if 'client_rpc_queue' not in obj:
-                        errormsgs.append('Could not obtain attribute client_rpc_queue, '
-                                         'please include json attribute client_rpc_queue.')
-                    if 'git_version' not in obj:
-                        errormsgs.append('Could not obtain attribute git_version, '
-                                         'please include json attribute git_version.')
-                    if 'seed' not in obj:
-                        errormsgs.append('Could not obtain attribute seed, '
-                                         'please include json attribute seed.')
-                    if 'domain_dict' not in obj:
-                        errormsgs.append('Could not obtain attribute domain_dict, '
-                                         'please include json attribute domain_dict.')
-                    if 'experiment_type' not in obj:
-                        errormsgs.append('Could not obtain attribute experiment_type, '
-                                         'please include json attribute experiment_type.')
-                    if 'no_testing' not in obj:
-                        errormsgs.append('Could not obtain attribute no_testing, '
-                                         'please include json attribute no_testing.')
-                    if 'description' not in obj:
-                        errormsgs.append('Could not obtain attribute description, '
-                                         'please include json attribute description.')
-                    if 'epoch' in obj:
-                        epoch = obj['epoch']
-                    if len(errormsgs) == 0:
-                        result = RequestExperiment(model=model,
-                                                   novelty=obj['novelty'],
-                                                   novelty_visibility=obj['novelty_visibility'],
-                                                   client_rpc_queue=obj['client_rpc_queue'],
-                                                   git_version=obj['git_version'],
-                                                   experiment_type=obj['experiment_type'],
-                                                   seed=obj['seed'],
-                                                   domain_dict=obj['domain_dict'],
-                                                   epoch=epoch,
-                                                   no_testing=obj['no_testing'],
-                                                   description=obj['description'])
-                elif obj['obj_type'] == REQ_EXP_TRIALS:
-                    model = None
-                    epoch = None
-                    if 'model' in obj:
-                        model = get_subobject(casas_object=obj['model'],
-                                              errormsgs=errormsgs)
-                    else:
-                        errormsgs.append('Could not obtain attribute model, '
-                                         'please include json attribute model.')
-                    if 'experiment_secret' not in obj:
-                        errormsgs.append('Could not obtain attribute experiment_secret, '
-                                         'please include json attribute experiment_secret.')
-                    if 'client_rpc_queue' not in obj:
-                        errormsgs.append('Could not obtain attribute client_rpc_queue, '
-                                         'please include json attribute client_rpc_queue.')
-                    if 'just_one_trial' not in obj:
-                        errormsgs.append('Could not obtain attribute just_one_trial, '
-                                         'please include json attribute just_one_trial.')
-                    if 'domain_dict' not in obj:
-                        errormsgs.append('Could not obtain attribute domain_dict, '
-                                         'please include json attribute domain_dict.')
-                    if 'epoch' in obj:
-                        epoch = obj['epoch']
-                    if len(errormsgs) == 0:
-                        result = RequestExperimentTrials(
-                            model=model,
-                            experiment_secret=obj['experiment_secret'],
-                            client_rpc_queue=obj['client_rpc_queue'],
-                            just_one_trial=obj['just_one_trial'],
-                            domain_dict=obj['domain_dict'],
-                            epoch=epoch)
-                elif obj['obj_type'] == EXPERIMENT_RESP:
-                    if 'server_rpc_queue' not in obj:
-                        errormsgs.append('Could not obtain attribute server_rpc_queue, '
-                                         'please include json attribute server_rpc_queue.')
-                    if 'experiment_secret' not in obj:
-                        errormsgs.append('Could not obtain attribute experiment_secret, '
-                                         'please include json attribute experiment_secret.')
-                    if 'model_experiment_id' not in obj:
-                        errormsgs.append('Could not obtain attribute model_experiment_id, '
-                                         'please include json attribute model_experiment_id.')
-                    if 'experiment_timeout' not in obj:
-                        errormsgs.append('Could not obtain attribute experiment_timeout, '
-                                         'please include json attribute experiment_timeout.')
-                    if len(errormsgs) == 0:
-                        result = ExperimentResponse(server_rpc_queue=obj['server_rpc_queue'],
-                                                    experiment_secret=obj['experiment_secret'],
-                                                    model_experiment_id=obj['model_experiment_id'],
-                                                    experiment_timeout=obj['experiment_timeout'])
-                elif obj['obj_type'] == EXPERIMENT_START:
-                    if len(errormsgs) == 0:
-                        result = ExperimentStart()
-                elif obj['obj_type'] == EXPERIMENT_END:
-                    if len(errormsgs) == 0:
-                        result = ExperimentEnd()
-                elif obj['obj_type'] == EXPERIMENT_EXCEPTION:
-                    if 'message' not in obj:
-                        raise AiqExperimentException(
-                            value='Experiment Exception raised without a message!')
-                    else:
-                        raise AiqExperimentException(value=obj['message'])
-                elif obj['obj_type'] == BENCHMARK_REQ:
-                    if 'benchmark_script' not in obj:
-                        errormsgs.append('Could not obtain attribute benchmark_script, '
-                                         'please include json attribute benchmark_script.')
-                    if len(errormsgs) == 0:
-                        result = BenchmarkRequest(benchmark_script=obj['benchmark_script'])
-                elif obj['obj_type'] == BENCHMARK_DATA:
-                    if 'benchmark_data' not in obj:
-                        errormsgs.append('Could not obtain attribute benchmark_data, '
-                                         'please include json attribute benchmark_data.')
-                    if len(errormsgs) == 0:
-                        result = BenchmarkData(benchmark_data=obj['benchmark_data'])
-                elif obj['obj_type'] == BENCHMARK_ACK:
-                    if len(errormsgs) == 0:
-                        result = BenchmarkAck()
-                elif obj['obj_type'] == NOVELTY_START:
-                    if len(errormsgs) == 0:
-                        result = NoveltyStart()
-                elif obj['obj_type'] == NOVELTY_END:
-                    if len(errormsgs) == 0:
-                        result = NoveltyEnd()
-                elif obj['obj_type'] == TRIAL_START:
-                    if 'trial_number' not in obj:
-                        errormsgs.append('Could not obtain attribute trial_number, '
-                                         'please include json attribute trial_number.')
-                    if 'total_trials' not in obj:
-                        errormsgs.append('Could not obtain attribute total_trials, '
-                                         'please include json attribute total_trials.')
-                    if 'message' not in obj:
-                        errormsgs.append('Could not obtain attribute message, '
-                                         'please include json attribute message.')
-                    if 'novelty_description' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_description, '
-                                         'please include json attribute novelty_description.')
-                    if len(errormsgs) == 0:
-                        result = TrialStart(trial_number=obj['trial_number'],
-                                            total_trials=obj['total_trials'],
-                                            message=obj['message'],
-                                            novelty_description=obj['novelty_description'])
-                elif obj['obj_type'] == TRIAL_END:
-                    if len(errormsgs) == 0:
-                        result = TrialEnd()
-                elif obj['obj_type'] == TRAINING_START:
-                    if len(errormsgs) == 0:
-                        result = TrainingStart()
-                elif obj['obj_type'] == TRAINING_ACTIVE:
-                    if len(errormsgs) == 0:
-                        result = TrainingActive()
-                elif obj['obj_type'] == TRAINING_END:
-                    if 'message' not in obj:
-                        errormsgs.append('Could not obtain attribute message, '
-                                         'please include json attribute message.')
-                    if len(errormsgs) == 0:
-                        result = TrainingEnd(message=obj['message'])
-                elif obj['obj_type'] == TRAINING_MODEL_END:
-                    if len(errormsgs) == 0:
-                        result = TrainingModelEnd()
-                elif obj['obj_type'] == TRAINING_END_EARLY:
-                    if len(errormsgs) == 0:
-                        result = TrainingEndEarly()
-                elif obj['obj_type'] == TRAIN_EPISODE_START:
-                    if 'episode_number' not in obj:
-                        errormsgs.append('Could not obtain attribute episode_number, '
-                                         'please include json attribute episode_number.')
-                    if 'total_episodes' not in obj:
-                        errormsgs.append('Could not obtain attribute total_episodes, '
-                                         'please include json attribute total_episodes.')
-                    if len(errormsgs) == 0:
-                        result = TrainingEpisodeStart(episode_number=obj['episode_number'],
-                                                      total_episodes=obj['total_episodes'])
-                elif obj['obj_type'] == TRAIN_EPISODE_ACTIVE:
-                    if len(errormsgs) == 0:
-                        result = TrainingEpisodeActive()
-                elif obj['obj_type'] == TRAIN_EPISODE_END:
-                    if 'performance' not in obj:
-                        errormsgs.append('Could not obtain attribute performance, '
-                                         'please include json attribute performance.')
-                    if 'feedback' not in obj:
-                        errormsgs.append('Could not obtain attribute feedback, '
-                                         'please include json attribute feedback.')
-                    if len(errormsgs) == 0:
-                        result = TrainingEpisodeEnd(performance=obj['performance'],
-                                                    feedback=obj['feedback'])
-                elif obj['obj_type'] == EPISODE_END:
-                    if 'performance' not in obj:
-                        errormsgs.append('Could not obtain attribute performance, '
-                                         'please include json attribute performance.')
-                    if 'feedback' not in obj:
-                        errormsgs.append('Could not obtain attribute feedback, '
-                                         'please include json attribute feedback.')
-                    if len(errormsgs) == 0:
-                        result = EpisodeEnd(performance=obj['performance'],
-                                            feedback=obj['feedback'])
-                elif obj['obj_type'] == BASIC_DATA:
-                    if 'feature_vector' not in obj:
-                        errormsgs.append('Could not obtain attribute feature_vector, '
-                                         'please include json attribute feature_vector.')
-                    if 'feature_label' not in obj:
-                        errormsgs.append('Could not obtain attribute feature_label, '
-                                         'please include json attribute feature_label.')
-                    if len(errormsgs) == 0:
-                        result = BasicData(feature_vector=obj['feature_vector'],
-                                           feature_label=obj['feature_label'])
-                elif obj['obj_type'] == BASIC_DATA_PREDICTION:
-                    if 'label_prediction' not in obj:
-                        errormsgs.append('Could not obtain attribute label_prediction, '
-                                         'please include json attribute label_prediction.')
-                    if len(errormsgs) == 0:
-                        result = BasicDataPrediction(label_prediction=obj['label_prediction'])
-                elif obj['obj_type'] == BASIC_DATA_ACK:
-                    if 'performance' not in obj:
-                        errormsgs.append('Could not obtain attribute performance, '
-                                         'please include json attribute performance.')
-                    if 'feedback' not in obj:
-                        errormsgs.append('Could not obtain attribute feedback, '
-                                         'please include json attribute feedback.')
-                    if len(errormsgs) == 0:
-                        result = BasicDataAck(performance=obj['performance'],
-                                              feedback=obj['feedback'])
-                elif obj['obj_type'] == BASIC_EPISODE_NOVELTY:
-                    if 'novelty_probability' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_probability, '
-                                         'please include json attribute novelty_probability.')
-                    if 'novelty_threshold' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_threshold, '
-                                         'please include json attribute novelty_threshold.')
-                    if 'novelty' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty, '
-                                         'please include json attribute novelty.')
-                    if 'novelty_characterization' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_characterization, '
-                                         'please include json attribute novelty_characterization.')
-                    if len(errormsgs) == 0:
-                        result = BasicEpisodeNovelty(
-                            novelty_probability=obj['novelty_probability'],
-                            novelty_threshold=obj['novelty_threshold'],
-                            novelty=obj['novelty'],
-                            novelty_characterization=obj['novelty_characterization'])
-                elif obj['obj_type'] == REQ_DATA:
-                    if len(errormsgs) == 0:
-                        result = RequestData()
-                elif obj['obj_type'] == REQ_TRAIN_DATA:
-                    if 'model_experiment_id' not in obj:
-                        errormsgs.append('Could not obtain attribute model_experiment_id, '
-                                         'please include json attribute model_experiment_id.')
-                    if 'secret' not in obj:
-                        errormsgs.append('Could not obtain attribute secret, '
-                                         'please include json attribute secret.')
-                    if len(errormsgs) == 0:
-                        result = RequestTrainingData(model_experiment_id=obj['model_experiment_id'],
-                                                     secret=obj['secret'])
-                elif obj['obj_type'] == TRAINING_DATA:
-                    if 'secret' not in obj:
-                        errormsgs.append('Could not obtain attribute secret, '
-                                         'please include json attribute secret.')
-                    if 'feature_vector' not in obj:
-                        errormsgs.append('Could not obtain attribute feature_vector, '
-                                         'please include json attribute feature_vector.')
-                    if 'feature_label' not in obj:
-                        errormsgs.append('Could not obtain attribute feature_label, '
-                                         'please include json attribute feature_label.')
-                    if 'utc_remote_epoch_received' not in obj:
-                        errormsgs.append('Could not obtain attribute utc_remote_epoch_received, '
-                                         'please include json attribute utc_remote_epoch_received.')
-                    if 'utc_remote_epoch_sent' not in obj:
-                        errormsgs.append('Could not obtain attribute utc_remote_epoch_sent, '
-                                         'please include json attribute utc_remote_epoch_sent.')
-                    if len(errormsgs) == 0:
-                        result = TrainingData(
-                            secret=obj['secret'],
-                            feature_vector=obj['feature_vector'],
-                            feature_label=obj['feature_label'],
-                            utc_remote_epoch_received=obj['utc_remote_epoch_received'],
-                            utc_remote_epoch_sent=obj['utc_remote_epoch_sent'])
-                elif obj['obj_type'] == TRAIN_DATA_PRED:
-                    if 'secret' not in obj:
-                        errormsgs.append('Could not obtain attribute secret, '
-                                         'please include json attribute secret.')
-                    if 'utc_remote_epoch_received' not in obj:
-                        errormsgs.append('Could not obtain attribute utc_remote_epoch_received, '
-                                         'please include json attribute utc_remote_epoch_received.')
-                    if 'utc_remote_epoch_sent' not in obj:
-                        errormsgs.append('Could not obtain attribute utc_remote_epoch_sent, '
-                                         'please include json attribute utc_remote_epoch_sent.')
-                    if 'label_prediction' not in obj:
-                        errormsgs.append('Could not obtain attribute label_prediction, '
-                                         'please include json attribute label_prediction.')
-                    if 'end_early' not in obj:
-                        errormsgs.append('Could not obtain attribute end_early, '
-                                         'please include json attribute end_early.')
-                    if len(errormsgs) == 0:
-                        result = TrainingDataPrediction(
-                            secret=obj['secret'],
-                            utc_remote_epoch_received=obj['utc_remote_epoch_received'],
-                            utc_remote_epoch_sent=obj['utc_remote_epoch_sent'],
-                            label_prediction=obj['label_prediction'],
-                            end_early=obj['end_early'])
-                elif obj['obj_type'] == TRAIN_DATA_ACK:
-                    if 'secret' not in obj:
-                        errormsgs.append('Could not obtain attribute secret, '
-                                         'please include json attribute secret.')
-                    if 'performance' not in obj:
-                        errormsgs.append('Could not obtain attribute performance, '
-                                         'please include json attribute performance.')
-                    if 'feedback' not in obj:
-                        errormsgs.append('Could not obtain attribute feedback, '
-                                         'please include json attribute feedback.')
-                    if len(errormsgs) == 0:
-                        result = TrainingDataAck(
-                            secret=obj['secret'],
-                            performance=obj['performance'],
-                            feedback=obj['feedback'])
-                elif obj['obj_type'] == TRAIN_EPISODE_NOVELTY:
-                    if 'novelty_probability' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_probability, '
-                                         'please include json attribute novelty_probability.')
-                    if 'novelty_threshold' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_threshold, '
-                                         'please include json attribute novelty_threshold.')
-                    if 'novelty' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty, '
-                                         'please include json attribute novelty.')
-                    if 'novelty_characterization' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_characterization, '
-                                         'please include json attribute novelty_characterization.')
-                    if len(errormsgs) == 0:
-                        result = TrainingEpisodeNovelty(
-                            novelty_probability=obj['novelty_probability'],
-                            novelty_threshold=obj['novelty_threshold'],
-                            novelty=obj['novelty'],
-                            novelty_characterization=obj['novelty_characterization'])
-                elif obj['obj_type'] == TRAIN_EPISODE_NOVELTY_ACK:
-                    if len(errormsgs) == 0:
-                        result = TrainingEpisodeNoveltyAck()
-                elif obj['obj_type'] == TESTING_START:
-                    if len(errormsgs) == 0:
-                        result = TestingStart()
-                elif obj['obj_type'] == TESTING_ACTIVE:
-                    if len(errormsgs) == 0:
-                        result = TestingActive()
-                elif obj['obj_type'] == TESTING_END:
-                    if len(errormsgs) == 0:
-                        result = TestingEnd()
-                elif obj['obj_type'] == TEST_EPISODE_START:
-                    if 'episode_number' not in obj:
-                        errormsgs.append('Could not obtain attribute episode_number, '
-                                         'please include json attribute episode_number.')
-                    if 'total_episodes' not in obj:
-                        errormsgs.append('Could not obtain attribute total_episodes, '
-                                         'please include json attribute total_episodes.')
-                    if len(errormsgs) == 0:
-                        result = TestingEpisodeStart(episode_number=obj['episode_number'],
-                                                     total_episodes=obj['total_episodes'])
-                elif obj['obj_type'] == TEST_EPISODE_ACTIVE:
-                    if len(errormsgs) == 0:
-                        result = TestingEpisodeActive()
-                elif obj['obj_type'] == TEST_EPISODE_END:
-                    if 'performance' not in obj:
-                        errormsgs.append('Could not obtain attribute performance, '
-                                         'please include json attribute performance.')
-                    if 'feedback' not in obj:
-                        errormsgs.append('Could not obtain attribute feedback, '
-                                         'please include json attribute feedback.')
-                    if len(errormsgs) == 0:
-                        result = TestingEpisodeEnd(performance=obj['performance'],
-                                                   feedback=obj['feedback'])
-                elif obj['obj_type'] == REQ_TEST_DATA:
-                    if 'model_experiment_id' not in obj:
-                        errormsgs.append('Could not obtain attribute model_experiment_id, '
-                                         'please include json attribute model_experiment_id.')
-                    if 'secret' not in obj:
-                        errormsgs.append('Could not obtain attribute secret, '
-                                         'please include json attribute secret.')
-                    if len(errormsgs) == 0:
-                        result = RequestTestingData(model_experiment_id=obj['model_experiment_id'],
-                                                    secret=obj['secret'])
-                elif obj['obj_type'] == TESTING_DATA:
-                    if 'secret' not in obj:
-                        errormsgs.append('Could not obtain attribute secret, '
-                                         'please include json attribute secret.')
-                    if 'feature_vector' not in obj:
-                        errormsgs.append('Could not obtain attribute feature_vector, '
-                                         'please include json attribute feature_vector.')
-                    if 'utc_remote_epoch_received' not in obj:
-                        errormsgs.append('Could not obtain attribute utc_remote_epoch_received, '
-                                         'please include json attribute utc_remote_epoch_received.')
-                    if 'utc_remote_epoch_sent' not in obj:
-                        errormsgs.append('Could not obtain attribute utc_remote_epoch_sent, '
-                                         'please include json attribute utc_remote_epoch_sent.')
-                    if 'novelty_indicator' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_indicator, '
-                                         'please include json attribute novelty_indicator.')
-                    if len(errormsgs) == 0:
-                        result = TestingData(
-                            secret=obj['secret'],
-                            feature_vector=obj['feature_vector'],
-                            utc_remote_epoch_received=obj['utc_remote_epoch_received'],
-                            utc_remote_epoch_sent=obj['utc_remote_epoch_sent'],
-                            novelty_indicator=obj['novelty_indicator'])
-                elif obj['obj_type'] == TEST_DATA_PRED:
-                    if 'secret' not in obj:
-                        errormsgs.append('Could not obtain attribute secret, '
-                                         'please include json attribute secret.')
-                    if 'utc_remote_epoch_received' not in obj:
-                        errormsgs.append('Could not obtain attribute utc_remote_epoch_received, '
-                                         'please include json attribute utc_remote_epoch_received.')
-                    if 'utc_remote_epoch_sent' not in obj:
-                        errormsgs.append('Could not obtain attribute utc_remote_epoch_sent, '
-                                         'please include json attribute utc_remote_epoch_sent.')
-                    if 'label_prediction' not in obj:
-                        errormsgs.append('Could not obtain attribute label_prediction, '
-                                         'please include json attribute label_prediction.')
-                    if 'end_early' not in obj:
-                        errormsgs.append('Could not obtain attribute end_early, '
-                                         'please include json attribute end_early.')
-                    if len(errormsgs) == 0:
-                        result = TestingDataPrediction(
-                            secret=obj['secret'],
-                            utc_remote_epoch_received=obj['utc_remote_epoch_received'],
-                            utc_remote_epoch_sent=obj['utc_remote_epoch_sent'],
-                            label_prediction=obj['label_prediction'],
-                            end_early=obj['end_early'])
-                elif obj['obj_type'] == TEST_DATA_ACK:
-                    if 'secret' not in obj:
-                        errormsgs.append('Could not obtain attribute secret, '
-                                         'please include json attribute secret.')
-                    if 'performance' not in obj:
-                        errormsgs.append('Could not obtain attribute performance, '
-                                         'please include json attribute performance.')
-                    if 'feedback' not in obj:
-                        errormsgs.append('Could not obtain attribute feedback, '
-                                         'please include json attribute feedback.')
-                    if len(errormsgs) == 0:
-                        result = TestingDataAck(secret=obj['secret'],
-                                                performance=obj['performance'],
-                                                feedback=obj['feedback'])
-                elif obj['obj_type'] == TEST_EPISODE_NOVELTY:
-                    if 'novelty_probability' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_probability, '
-                                         'please include json attribute novelty_probability.')
-                    if 'novelty_threshold' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_threshold, '
-                                         'please include json attribute novelty_threshold.')
-                    if 'novelty' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty, '
-                                         'please include json attribute novelty.')
-                    if 'novelty_characterization' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_characterization, '
-                                         'please include json attribute novelty_characterization.')
-                    if len(errormsgs) == 0:
-                        result = TestingEpisodeNovelty(
-                            novelty_probability=obj['novelty_probability'],
-                            novelty_threshold=obj['novelty_threshold'],
-                            novelty=obj['novelty'],
-                            novelty_characterization=obj['novelty_characterization'])
-                elif obj['obj_type'] == TEST_EPISODE_NOVELTY_ACK:
-                    if len(errormsgs) == 0:
-                        result = TestingEpisodeNoveltyAck()
-                elif obj['obj_type'] == END_EXPERIMENT:
-                    if 'model_experiment_id' not in obj:
-                        errormsgs.append('Could not obtain attribute model_experiment_id, '
-                                         'please include json attribute model_experiment_id.')
-                    if 'secret' not in obj:
-                        errormsgs.append('Could not obtain attribute secret, '
-                                         'please include json attribute secret.')
-                    if len(errormsgs) == 0:
-                        result = EndExperiment(model_experiment_id=obj['model_experiment_id'],
-                                               secret=obj['secret'])
-                elif obj['obj_type'] == WAIT_ON_SOTA:
-                    if len(errormsgs) == 0:
-                        result = WaitOnSota()
-                elif obj['obj_type'] == SOTA_IDLE:
-                    if len(errormsgs) == 0:
-                        result = SotaIdle()
-                elif obj['obj_type'] == OBJ_EPISODE:
-                    if 'novelty' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty, '
-                                         'please include json attribute novelty.')
-                    if 'difficulty' not in obj:
-                        errormsgs.append('Could not obtain attribute difficulty, '
-                                         'please include json attribute difficulty.')
-                    if 'seed' not in obj:
-                        errormsgs.append('Could not obtain attribute seed, '
-                                         'please include json attribute seed.')
-                    if 'domain' not in obj:
-                        errormsgs.append('Could not obtain attribute domain, '
-                                         'please include json attribute domain.')
-                    if 'data_type' not in obj:
-                        errormsgs.append('Could not obtain attribute data_type, '
-                                         'please include json attribute data_type.')
-                    if 'episode_index' not in obj:
-                        errormsgs.append('Could not obtain attribute episode_index, '
-                                         'please include json attribute episode_index.')
-                    if 'episode_id' not in obj:
-                        errormsgs.append('Could not obtain attribute episode_id, '
-                                         'please include json attribute episode_id.')
-                    if 'trial_novelty' not in obj:
-                        errormsgs.append('Could not obtain attribute trial_novelty, '
-                                         'please include json attribute trial_novelty.')
-                    if 'day_offset' not in obj:
-                        errormsgs.append('Could not obtain attribute day_offset, '
-                                         'please include json attribute day_offset.')
-                    if 'trial_episode_index' not in obj:
-                        errormsgs.append('Could not obtain attribute trial_episode_index, '
-                                         'please include json attribute trial_episode_index.')
-                    if 'use_image' not in obj:
-                        errormsgs.append('Could not obtain attribute use_image, '
-                                         'please include json attribute use_image.')
-                    if len(errormsgs) == 0:
-                        result = Episode(novelty=obj['novelty'],
-                                         difficulty=obj['difficulty'],
-                                         domain=obj['domain'],
-                                         data_type=obj['data_type'],
-                                         seed=obj['seed'],
-                                         episode_index=obj['episode_index'],
-                                         episode_id=obj['episode_id'],
-                                         trial_novelty=obj['trial_novelty'],
-                                         day_offset=obj['day_offset'],
-                                         trial_episode_index=obj['trial_episode_index'],
-                                         use_image=obj['use_image'])
-                elif obj['obj_type'] == OBJ_TRAINING:
-                    if 'episodes' not in obj:
-                        errormsgs.append('Could not obtain attribute episodes, '
-                                         'please include json attribute episodes.')
-                    episodes = list()
-                    if len(errormsgs) == 0:
-                        if len(obj['episodes']) > 0:
-                            episodes = get_subobject_list(
-                                casas_object=json.dumps(obj['episodes']),
-                                errormsgs=errormsgs)
-                    if len(errormsgs) == 0:
-                        result = Training(episodes=episodes)
-                elif obj['obj_type'] == OBJ_TRIAL:
-                    if 'episodes' not in obj:
-                        errormsgs.append('Could not obtain attribute episodes, '
-                                         'please include json attribute episodes.')
-                    if 'novelty' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty, '
-                                         'please include json attribute novelty.')
-                    if 'novelty_visibility' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_visibility, '
-                                         'please include json attribute novelty_visibiliy.')
-                    if 'difficulty' not in obj:
-                        errormsgs.append('Could not obtain attribute difficulty, '
-                                         'please include json attribute difficulty.')
-                    episodes = list()
-                    if len(errormsgs) == 0:
-                        if len(obj['episodes']) > 0:
-                            episodes = get_subobject_list(
-                                casas_object=json.dumps(obj['episodes']),
-                                errormsgs=errormsgs)
-                    if len(errormsgs) == 0:
-                        result = Trial(episodes=episodes,
-                                       novelty=obj['novelty'],
-                                       novelty_visibility=obj['novelty_visibility'],
-                                       difficulty=obj['difficulty'])
-                elif obj['obj_type'] == OBJ_NOVELTY_GRP:
-                    if 'trials' not in obj:
-                        errormsgs.append('Could not obtain attribute trials, '
-                                         'please include json attribute trials.')
-                    trials = list()
-                    if len(errormsgs) == 0:
-                        if len(obj['trials']) > 0:
-                            trials = get_subobject_list(
-                                casas_object=json.dumps(obj['trials']),
-                                errormsgs=errormsgs)
-                    if len(errormsgs) == 0:
-                        result = NoveltyGroup(trials=trials)
-                elif obj['obj_type'] == OBJ_EXPERIMENT:
-                    if 'training' not in obj:
-                        errormsgs.append('Could not obtain attribute training, '
-                                         'please include json attribute training.')
-                    if 'novelty_groups' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty_groups, '
-                                         'please include json attribute novelty_groups.')
-                    if 'budget' not in obj:
-                        errormsgs.append('Could not obtain attribute budget, '
-                                         'please include json attribute budget.')
-                    training = None
-                    nov_groups = list()
-                    if len(errormsgs) == 0:
-                        training = get_subobject(
-                            casas_object='[{}]'.format(json.dumps(obj['training'])),
-                            errormsgs=errormsgs)
-                    if len(errormsgs) == 0:
-                        if len(obj['novelty_groups']) > 0:
-                            nov_groups = get_subobject_list(
-                                casas_object=json.dumps(obj['novelty_groups']),
-                                errormsgs=errormsgs)
-                    if len(errormsgs) == 0:
-                        result = Experiment(training=training,
-                                            novelty_groups=nov_groups,
-                                            budget=obj['budget'])
-                elif obj['obj_type'] == REQ_NOVELTY_DESCRIPTION:
-                    if 'domain' not in obj:
-                        errormsgs.append('Could not obtain attribute domain, '
-                                         'please include json attribute domain.')
-                    if 'novelty' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty, '
-                                         'please include json attribute novelty.')
-                    if 'difficulty' not in obj:
-                        errormsgs.append('Could not obtain attribute difficulty, '
-                                         'please include json attribute difficulty.')
-                    if len(errormsgs) == 0:
-                        result = RequestNoveltyDescription(r_domain=obj['domain'],
-                                                           novelty=obj['novelty'],
-                                                           difficulty=obj['difficulty'])
-                elif obj['obj_type'] == OBJ_NOVELTY_DESCRIPTION:
-                    if 'novelty_description' not in obj:
-                        errormsgs.append('Coule not obtain attribute novelty_description, '
-                                         'please include json attribute novelty_description.')
-                    if len(errormsgs) == 0:
-                        result = NoveltyDescription(novelty_description=obj['novelty_description'])
-                elif obj['obj_type'] == GENERATOR_IDLE:
-                    if len(errormsgs) == 0:
-                        result = GeneratorIdle()
-                elif obj['obj_type'] == GENERATOR_RESET:
-                    if len(errormsgs) == 0:
-                        result = GeneratorReset()
-                elif obj['obj_type'] == START_GENERATOR:
-                    if 'domain' not in obj:
-                        errormsgs.append('Could not obtain attribute domain, '
-                                         'please include json attribute domain.')
-                    if 'novelty' not in obj:
-                        errormsgs.append('Could not obtain attribute novelty, '
-                                         'please include json attribute novelty.')
-                    if 'difficulty' not in obj:
-                        errormsgs.append('Could not obtain attribute difficulty, '
-                                         'please include json attribute difficulty.')
-                    if 'seed' not in obj:
-                        errormsgs.append('Could not obtain attribute seed, '
-                                         'please include json attribute seed.')
-                    if 'server_rpc_queue' not in obj:
-                        errormsgs.append('Could not obtain attribute server_rpc_queue, '
-                                         'please include json attribute server_rpc_queue.')
-                    if 'trial_novelty' not in obj:
-                        errormsgs.append('Could not obtain attribute trial_novelty, '
-                                         'please include json attribute trial_novelty.')
-                    if 'epoch' not in obj:
-                        errormsgs.append('Could not obtain attribute epoch, '
-                                         'please include json attribute epoch.')
-                    if 'day_offset' not in obj:
-                        errormsgs.append('Could not obtain attribute day_offset, '
-                                         'please include json attribute day_offset.')
-                    if 'request_timeout' not in obj:
-                        errormsgs.append('Could not obtain attribute request_timeout, '
-                                         'please include json attribute request_timeout.')
-                    if 'use_image' not in obj:
-                        errormsgs.append('Could not obtain attribute use_image, '
-                                         'please include json attribute use_image.')
-                    if len(errormsgs) == 0:
-                        result = StartGenerator(domain=obj['domain'],
-                                                novelty=obj['novelty'],
-                                                difficulty=obj['difficulty'],
-                                                seed=obj['seed'],
-                                                server_rpc_queue=obj['server_rpc_queue'],
-                                                trial_novelty=obj['trial_novelty'],
-                                                epoch=obj['epoch'],
-                                                day_offset=obj['day_offset'],
-                                                request_timeout=obj['request_timeout'],
-                                                use_image=obj['use_image'])
-                elif obj['obj_type'] == GENERATOR_RESPONSE:
-                    if 'generator_rpc_queue' not in obj:
-                        errormsgs.append('Could not obtain attribute generator_rpc_queue, '
-                                         'please include json attribute generator_rpc_queue.')
-                    if len(errormsgs) == 0:
-                        result = GeneratorResponse(generator_rpc_queue=obj['generator_rpc_queue'])
-                elif obj['obj_type'] == ANALYSIS_READY:
-                    if 'model_experiment_id' not in obj:
-                        errormsgs.append('Could not obtain attribute model_experiment_id, '
-                                         'please include json attribute model_experiment_id.')
-                    if len(errormsgs) == 0:
-                        result = AnalysisReady(model_experiment_id=obj['model_experiment_id'])
-                elif obj['obj_type'] == ANALYSIS_PARTIAL:
-                    if 'model_experiment_id' not in obj:
-                        errormsgs.append('Could not obtain attribute model_experiment_id, '
-                                         'please include json attribute model_experiment_id.')
-                    if 'experiment_trial_id' not in obj:
-                        errormsgs.append('Could not obtain attribute experiment_trial_id, '
-                                         'please include json attribute experiment_trial_id.')
-                    if len(errormsgs) == 0:
-                        result = AnalysisPartial(model_experiment_id=obj['model_experiment_id'],
-                                                 experiment_trial_id=obj['experiment_trial_id'])
-                return_objects.append(copy.deepcopy(result))
+                result = None
+                decoder = AIQ_DECODERS.get(obj['obj_type'])
+                if decoder is None:
+                    errormsgs.append('Unknown obj_type {}, please provide a valid '
+                                     'obj_type.'.format(obj['obj_type']))
+                else:
+                    result = decoder.decode(obj=obj, errormsgs=errormsgs)
+                return_objects.append(result)
             elif 'action' not in obj:
                 errormsgs.append("Could not obtain attribute action, "
                                  "please include json attribute action.")
@@ -22,6 +22,8 @@
 # ** Contact: Brian L. Thomas (bthomas1@wsu.edu)
 # ** Contact: Diane J. Cook (djcook@wsu.edu)
 # *****************************************************************************#
+import asyncio
+import concurrent.futures
 import copy
 import datetime
 import json
@@ -35,8 +37,42 @@ import threading
 import time
 import uuid
 
+from pika.adapters.asyncio_connection import AsyncioConnection
+
 from . import objects
 
+# Multipart messages carry the JSON followed by the raw binary parts it references (images),
+# the byte length of each piece is listed in the MULTIPART_LENGTHS header.
+MULTIPART_CONTENT_TYPE = 'application/x-aiq-multipart'
+MULTIPART_LENGTHS = 'aiq-part-lengths'
+# Set on requests by a Connection that can read multipart replies.
+MULTIPART_ACCEPT = 'aiq-accept-multipart'
+
+
+def split_multipart_body(properties, body):
+    """Split a message body into its JSON and binary parts.
+
+    Parameters
+    ----------
+    properties : pika.Spec.BasicProperties
+        properties object.
+    body : bytes
+        The message body.
+
+    Returns
+    -------
+    (bytes, list)
+        The JSON and the binary parts, which is empty for a plain JSON message.
+    """
+    if properties is None or properties.content_type != MULTIPART_CONTENT_TYPE:
+        return body, list()
+    pieces = list()
+    start = 0
+    for length in properties.headers[MULTIPART_LENGTHS]:
+        pieces.append(body[start:start + length])
+        start += length
+    return pieces[0], pieces[1:]
+
 
 class ConsumeCallback(object):
     """This is a helper class for subscribing to RabbitMQ exchanges and queues then using
@@ -48,7 +84,8 @@ class ConsumeCallback(object):
                  is_exchange=False, exchange_name=None, is_queue=False,
                  queue_name=None, limit_to_sensor_types=None, auto_ack=False,
                  callback_full_params=False, translations=None,
-                 timezone=None, manual_ack=False):
+                 timezone=None, manual_ack=False, multipart_reply_queues=None,
+                 ack_batch_size=1, ack_flush_seconds=0.1):
         """Initialize an instance of a ConsumeCallback object.
 
         Parameters
@@ -84,6 +121,16 @@ class ConsumeCallback(object):
             ack.  This variable is overridden to False if auto_ack is True or if
             callback_full_params is False (as you need those to send the ack).  The default value
             is False.
+        multipart_reply_queues : set, optional
+            The Connection's set of reply_to queues that accept multipart replies, requests that
+            carry the MULTIPART_ACCEPT header add their reply_to queue to it.
+        ack_batch_size : int, optional
+            Ack this many messages at once with a single multiple ack instead of one at a time.
+            A multiple ack covers every earlier message on the channel, so only batch when the
+            other subscriptions on the Connection ack their messages as they go.  The default
+            value is 1.
+        ack_flush_seconds : float, optional
+            The most seconds a partial batch waits before being acked anyway.
         """
         self.log = logging.getLogger(__name__).getChild('ConsumeCallback')
         self.casas_events = casas_events
@@ -115,6 +162,13 @@ class ConsumeCallback(object):
         self.manual_ack = manual_ack
         if auto_ack is True:
             self.manual_ack = False
+        self.multipart_reply_queues = multipart_reply_queues
+        self.ack_batch_size = max(1, ack_batch_size)
+        self.ack_flush_seconds = ack_flush_seconds
+        self._ack_channel = None
+        self._ack_timer = None
+        self._unacked = 0
+        self._last_delivery_tag = None
         return
 
     def on_message(self, channel, basic_deliver, properties, body):
@@ -136,12 +190,17 @@ class ConsumeCallback(object):
         body : str|unicode
             The message body.
         """
-        self.log.debug("on_message({})".format(str(body)))
+        self.log.debug('on_message(%s)', body)
+
+        if self.multipart_reply_queues is not None and properties.reply_to is not None \
+                and properties.headers and properties.headers.get(MULTIPART_ACCEPT):
+            self.multipart_reply_queues.add(properties.reply_to)
 
         if self.casas_events:
-            obj = objects.build_objects_from_json(body)
-            self.log.debug("obj = {}".format(str(obj)))
-            self.log.debug("size of obj = {}".format(str(len(obj))))
+            message, binary_parts = split_multipart_body(properties=properties, body=body)
+            obj = objects.build_objects_from_json(message, binary_parts=binary_parts)
+            self.log.debug('obj = %s', obj)
+            self.log.debug('size of obj = %s', len(obj))
             if len(obj) > 0:
                 if self.callback_full_params:
                     self.callback_function(channel, basic_deliver, properties, body, obj[0])
@@ -154,9 +213,84 @@ class ConsumeCallback(object):
                 self.callback_function(body)
 
         if not self.auto_ack and not self.manual_ack:
-            channel.basic_ack(delivery_tag=basic_deliver.delivery_tag)
+            self.ack(channel=channel, delivery_tag=basic_deliver.delivery_tag)
         return
 
+    def ack(self, channel, delivery_tag):
+        """Ack the message, or hold it back to be acked along with the rest of its batch.
+
+        Parameters
+        ----------
+        channel : pika.adapters.blocking_connection.BlockingChannel
+            The channel the message arrived on.
+        delivery_tag : int
+            The delivery tag of the message.
+        """
+        if self.ack_batch_size <= 1:
+            channel.basic_ack(delivery_tag=delivery_tag)
+            return
+
+        if channel is not self._ack_channel:
+            # Delivery tags from an old channel mean nothing on this one, the broker will
+            # redeliver whatever was left unacked there.
+            self._ack_channel = channel
+            self._ack_timer = None
+            self._unacked = 0
+        self._unacked += 1
+        self._last_delivery_tag = delivery_tag
+        if self._unacked >= self.ack_batch_size:
+            self.flush_acks()
+        elif self._ack_timer is None:
+            self._ack_timer = channel.connection.call_later(self.ack_flush_seconds,
+                                                            self.flush_acks)
+        return
+
+    def flush_acks(self):
+        """Ack every message held back so far.
+        """
+        if self._ack_timer is not None:
+            self._ack_channel.connection.remove_timeout(self._ack_timer)
+            self._ack_timer = None
+        if self._unacked > 0 and self._ack_channel.is_open:
+            self._ack_channel.basic_ack(delivery_tag=self._last_delivery_tag, multiple=True)
+        self._unacked = 0
+        return
+
+
+class RequestFuture(concurrent.futures.Future):
+    """The pending response to a request made with Connection.send_request().
+
+    Responses only arrive while the Connection is processing data events, so result() and
+    exception() keep the Connection going until the response is in or the request times out.
+    Call them from the thread that owns the Connection, and not from inside one of its consumer
+    callbacks as pika does not dispatch nested callbacks.
+    """
+
+    def __init__(self, connection, corr_id: str, deadline: float = None):
+        """
+        Parameters
+        ----------
+        connection : Connection
+            The Connection the request was sent on.
+        corr_id : str
+            The correlation ID of the request.
+        deadline : float, optional
+            The time.time() value the request times out at, never if not provided.
+        """
+        concurrent.futures.Future.__init__(self)
+        self.connection = connection
+        self.corr_id = corr_id
+        self.deadline = deadline
+        return
+
+    def result(self, timeout=None):
+        self.connection.wait_for_requests(futures=[self], timeout=timeout)
+        return concurrent.futures.Future.result(self, timeout=0)
+
+    def exception(self, timeout=None):
+        self.connection.wait_for_requests(futures=[self], timeout=timeout)
+        return concurrent.futures.Future.exception(self, timeout=0)
+
 
 class Connection:
     """
@@ -174,7 +308,7 @@ class Connection:
 
     def __init__(self, agent_name, amqp_user, amqp_pass, amqp_host, amqp_port,
                  amqp_vhost='/', amqp_ssl=True, translations=None,
-                 timezone=None, request_timeout=None):
+                 timezone=None, request_timeout=None, multipart=False):
         """
         Create a new instance of the CASAS RammitMQ Connection class.
 
@@ -202,6 +336,10 @@ class Connection:
             Assumes all sites are 'America/Los_Angeles' unless given in dict().
         request_timeout : int,optional
             An integer of the global timeout to use.
+        multipart : bool,optional
+            If True the requests we publish tell the other end that it may reply with a multipart
+            message, so images arrive as raw binary instead of base64 inside the JSON. Replies
+            are sent as multipart whenever the request asked for it, regardless of this value.
         """
         self.name = re.sub('\s', '', str(agent_name))
         self.log = logging.getLogger(__name__).getChild('Connection')
@@ -210,6 +348,7 @@ class Connection:
         self._channel = None
         self._closing = False
         self._has_on_cancel_callback = False
+        self._prefetch_count = 1
 
         # To subscribe to an exchange we need:
         #     - an exclusive queue to bind to the exchange
@@ -229,6 +368,7 @@ class Connection:
         self._on_connection_unblocked_callback = None
         self._on_request_callbacks = dict()
         self._on_request_events = dict()
+        self._pending_requests = dict()
         self._waiting_on_request = False
         self._waiting_on_events = False
         self._is_consuming = False
@@ -236,8 +376,12 @@ class Connection:
         self._model_experiment_id = None
         self._model_experiment_secret = None
         self._server_experiment_rpc_queue = None
+        self._server_step_rpc = False
         self._client_rpc_queue = None
+        self._reply_queue = None
         self._local_epoch_received = time.time()
+        self.multipart = multipart
+        self._multipart_reply_queues = set()
 
         self.amqp_user = amqp_user
         self.amqp_pass = amqp_pass
@@ -351,6 +495,17 @@ class Connection:
         self._on_connection_unblocked_callback = None
         return
 
+    def set_request_timeout(self, request_timeout):
+        """Set the timeout used for the RPC requests made from now on.
+
+        Parameters
+        ----------
+        request_timeout : int
+            The number of seconds to wait on a response.
+        """
+        self._request_timeout = request_timeout
+        return
+
     def get_state(self):
         self.log.debug('get_state()')
 
@@ -575,6 +730,20 @@ class Connection:
                                             queue_name=objects.NOVELTY_DESC_RPC_QUEUE)
         return response
 
+    def request_novelty_description(self, domain: str, novelty: int,
+                                    difficulty: str) -> RequestFuture:
+        """The same as get_novelty_description() without waiting on the response, see
+        send_request().
+        """
+        self.log.debug('request_novelty_description(domain={}, novelty={}, difficulty={})'.format(
+            domain, novelty, difficulty))
+
+        req_nov_desc = objects.RequestNoveltyDescription(r_domain=domain,
+                                                         novelty=novelty,
+                                                         difficulty=difficulty)
+        return self.send_request(casas_object=req_nov_desc,
+                                 queue_name=objects.NOVELTY_DESC_RPC_QUEUE)
+
     def send_generator_data(self, data_request):
         self.log.debug('send_generator_data()')
 
@@ -701,6 +870,59 @@ class Connection:
                                             client_callback_queue=self._client_rpc_queue)
         return response
 
+    def has_step_rpc(self) -> bool:
+        """Returns True if the server we are working with accepts the combined step requests,
+        TestingDataStep for an experiment and BasicDataStep for a generator.  This is announced in
+        the ExperimentResponse or GeneratorResponse, older servers never set it.
+
+        Returns
+        -------
+        bool
+        """
+        return self._server_step_rpc
+
+    def send_testing_step(self, label_prediction: dict, end_early: bool = False):
+        """Send the prediction for the current TestingData and receive the next TestingData in
+        the same round trip, replacing send_testing_predictions() followed by get_testing_data().
+
+        Parameters
+        ----------
+        label_prediction : dict
+            The prediction for the current feature vector.
+        end_early : bool, optional
+            Set to True to end the experiment early.
+
+        Returns
+        -------
+        objects.AiqObject
+            A TestingDataStepAck with the performance and the next feature vector, or the
+            TestingEpisodeEnd when the episode is over.
+
+        Raises
+        ------
+        objects.CasasRabbitMQException
+            If there is no experiment or the server does not accept TestingDataStep.
+        """
+        self.log.debug('send_testing_step()')
+
+        if self._server_experiment_rpc_queue is None:
+            raise objects.CasasRabbitMQException('You have not established an experiment yet!')
+        if not self._server_step_rpc:
+            raise objects.CasasRabbitMQException('The server does not accept TestingDataStep, '
+                                                 'use send_testing_predictions() and '
+                                                 'get_testing_data() instead!')
+
+        testing_step = objects.TestingDataStep(
+            secret=self._model_experiment_secret,
+            label_prediction=label_prediction,
+            end_early=end_early)
+
+        response = self._set_system_request(casas_object=testing_step,
+                                            queue_name=self._server_experiment_rpc_queue,
+                                            declare_server_queue=False,
+                                            client_callback_queue=self._client_rpc_queue)
+        return response
+
     def send_testing_episode_novelty(self, novelty_characterization: dict,
                                      novelty_probability: float = 0.0,
                                      novelty_threshold: float = 0.0, novelty: int = 0):
@@ -740,6 +962,7 @@ class Connection:
         self._model_experiment_id = None
         self._model_experiment_secret = None
         self._server_experiment_rpc_queue = None
+        self._server_step_rpc = False
         return
 
     def _set_system_request(self, casas_object, key=None, secret=None,
@@ -781,72 +1004,242 @@ class Connection:
                 if abs(float(time.time()) - start_time) > max_time_delta:
                     raise objects.AiqExperimentException('Server took too long to respond.')
             corr_id = str(uuid.uuid4())
-            if client_callback_queue is None:
-                callback_queue = 'rpc.system.request.{}'.format(str(uuid.uuid4().hex))
-            else:
-                callback_queue = client_callback_queue
             try:
-                self._on_request_callbacks[corr_id] = dict()
-                self._on_request_callbacks[corr_id]['casas_object'] = casas_object
-                self._on_request_callbacks[corr_id]['queue'] = callback_queue
-                self._on_request_callbacks[corr_id]['corr_id'] = corr_id
-                self._on_request_callbacks[corr_id]['publish_queue'] = queue_name
-                self._on_request_callbacks[corr_id]['keep_queue'] = True
-                if client_callback_queue is None:
-                    self._on_request_callbacks[corr_id]['keep_queue'] = False
-                    # Subscribe to the callback queue.
-                    self.setup_subscribe_to_queue(
-                        queue_name=callback_queue,
-                        queue_exclusive=True,
-                        queue_auto_delete=True,
-                        casas_events=True,
-                        callback_function=self.process_system_request_callback,
-                        callback_full_params=True)
-
                 self._request_response[corr_id] = None
-
-                # Declare the queue we are going to publish to.
-                if declare_server_queue:
-                    self.setup_publish_to_queue(queue_name=queue_name,
-                                                queue_durable=True,
-                                                queue_exclusive=False,
-                                                queue_auto_delete=False)
-
-                if isinstance(casas_object, (objects.TrainingDataPrediction,
-                                             objects.TestingDataPrediction)):
-                    casas_object.utc_remote_epoch_received = self._local_epoch_received
-                # Publish the system request casas_object and then return.
-                self.publish_to_queue(queue_name=queue_name,
-                                      casas_object=casas_object,
-                                      correlation_id=corr_id,
-                                      delivery_mode=1,
+                self._publish_request(casas_object=casas_object,
+                                      corr_id=corr_id,
+                                      queue_name=queue_name,
+                                      declare_server_queue=declare_server_queue,
+                                      client_callback_queue=client_callback_queue,
                                       key=key,
-                                      secret=secret,
-                                      reply_to=callback_queue)
-
-                if disable_timeout:
-                    while self._request_response[corr_id] is None:
-                        self.process_data_events(time_limit=0.02)
-                    response = copy.deepcopy(self._request_response[corr_id])
-                    del self._request_response[corr_id]
-                else:
-                    while self._request_response[corr_id] is None and \
-                            abs(float(time.time()) - start_time) < max_time_delta:
-                        self.process_data_events(time_limit=0.05)
-                    if self._request_response[corr_id] is not None:
-                        response = copy.deepcopy(self._request_response[corr_id])
-                        del self._request_response[corr_id]
+                                      secret=secret)
+
+                deadline = None
+                if not disable_timeout:
+                    deadline = start_time + max_time_delta
+                response = self._wait_for_request_response(corr_id=corr_id, deadline=deadline)
             except pika.exceptions.AMQPError:
                 self.log.error('_set_system_request(): pika.exceptions.AMQPError '
                                'AMQP failed, trying again.')
+                self._request_response.pop(corr_id, None)
+                self._on_request_callbacks.pop(corr_id, None)
                 self.stop()
                 time.sleep(1)
                 self.run(timeout=max_time_delta)
-                if client_callback_queue is None:
-                    self.remove_subscribe_to_queue(callback_queue)
         self._waiting_on_request = False
         return response
 
+    def _publish_request(self, casas_object, corr_id, queue_name, declare_server_queue=True,
+                         client_callback_queue=None, key=None, secret=None):
+        """Register the request corr_id so process_system_request_callback() picks up its
+        response, then publish it.
+
+        Parameters
+        ----------
+        casas_object : objects.CasasObject
+            The request to send.
+        corr_id : str
+            The correlation ID of the request.
+        queue_name : str
+            The name of the queue to send the request to.
+        declare_server_queue : bool, optional
+            Declare queue_name before publishing to it, if this connection has not already.
+        client_callback_queue : str, optional
+            The queue the response should be sent to, the shared reply queue if not provided.
+        key : str, optional
+            The key value that is paired with secret for uploading objects to the database.
+        secret : str, optional
+            The secret value that is paired with key for uploading objects to the database.
+        """
+        callback_queue = client_callback_queue
+        if callback_queue is None:
+            callback_queue = self._get_reply_queue()
+        self._on_request_callbacks[corr_id] = dict()
+        self._on_request_callbacks[corr_id]['casas_object'] = casas_object
+        self._on_request_callbacks[corr_id]['queue'] = callback_queue
+        self._on_request_callbacks[corr_id]['corr_id'] = corr_id
+        self._on_request_callbacks[corr_id]['publish_queue'] = queue_name
+
+        # Declare the queue we are going to publish to, once per connection.
+        if declare_server_queue and \
+                queue_name not in [qu['queue_name'] for qu in self._queues_publish]:
+            self.setup_publish_to_queue(queue_name=queue_name,
+                                        queue_durable=True,
+                                        queue_exclusive=False,
+                                        queue_auto_delete=False)
+
+        if isinstance(casas_object, (objects.TrainingDataPrediction,
+                                     objects.TestingDataPrediction)):
+            casas_object.utc_remote_epoch_received = self._local_epoch_received
+        # Publish the system request casas_object and then return.
+        self.publish_to_queue(queue_name=queue_name,
+                              casas_object=casas_object,
+                              correlation_id=corr_id,
+                              delivery_mode=1,
+                              key=key,
+                              secret=secret,
+                              reply_to=callback_queue)
+        return
+
+    def send_request(self, casas_object, queue_name, declare_server_queue=True,
+                     client_callback_queue=None, key=None, secret=None,
+                     disable_timeout=False) -> RequestFuture:
+        """Send a request without waiting on the response.  Any number of requests can be
+        outstanding on the Connection at once, their responses are told apart by correlation ID.
+        Unlike the blocking request methods this can be used while the Connection is consuming.
+
+        Parameters
+        ----------
+        casas_object : objects.CasasObject
+            The request to send.
+        queue_name : str
+            The name of the queue to send the request to.
+        declare_server_queue : bool, optional
+            Declare queue_name before publishing to it, if this connection has not already.
+        client_callback_queue : str, optional
+            The queue the response should be sent to, the shared reply queue if not provided.
+        key : str, optional
+            The key value that is paired with secret for uploading objects to the database.
+        secret : str, optional
+            The secret value that is paired with key for uploading objects to the database.
+        disable_timeout : bool, optional
+            Wait for as long as it takes instead of the request timeout.
+
+        Returns
+        -------
+        RequestFuture
+            Resolves to the response, or fails with objects.AiqExperimentException if the request
+            timed out or the connection was lost.
+        """
+        corr_id = str(uuid.uuid4())
+        deadline = None
+        if not disable_timeout:
+            deadline = time.time() + self._request_timeout
+        future = RequestFuture(connection=self, corr_id=corr_id, deadline=deadline)
+        self._pending_requests[corr_id] = future
+        try:
+            self._publish_request(casas_object=casas_object,
+                                  corr_id=corr_id,
+                                  queue_name=queue_name,
+                                  declare_server_queue=declare_server_queue,
+                                  client_callback_queue=client_callback_queue,
+                                  key=key,
+                                  secret=secret)
+        except pika.exceptions.AMQPError:
+            self._pending_requests.pop(corr_id, None)
+            self._on_request_callbacks.pop(corr_id, None)
+            raise
+        return future
+
+    def wait_for_requests(self, futures: list, timeout: float = None):
+        """Process data events until every one of the futures is done, their requests time out or
+        timeout seconds have passed.
+
+        Parameters
+        ----------
+        futures : list
+            The RequestFuture objects returned by send_request().
+        timeout : float, optional
+            The most seconds to wait, only the request timeouts apply if not provided.
+        """
+        wait_until = None
+        if timeout is not None:
+            wait_until = time.time() + timeout
+        was_waiting = self._waiting_on_request
+        self._waiting_on_request = True
+        try:
+            while True:
+                now = time.time()
+                pending = list()
+                for future in futures:
+                    if not future.done() and future.deadline is not None \
+                            and now >= future.deadline:
+                        self._expire_request(future=future)
+                    if not future.done():
+                        pending.append(future)
+                if len(pending) == 0 or (wait_until is not None and now >= wait_until):
+                    break
+                limits = [x.deadline for x in pending if x.deadline is not None]
+                if wait_until is not None:
+                    limits.append(wait_until)
+                time_limit = None
+                if len(limits) > 0:
+                    time_limit = min(limits) - now
+                self.process_data_events(time_limit=time_limit)
+        finally:
+            self._waiting_on_request = was_waiting
+        return
+
+    def _expire_request(self, future: RequestFuture):
+        self._pending_requests.pop(future.corr_id, None)
+        self._on_request_callbacks.pop(future.corr_id, None)
+        future.set_exception(objects.AiqExperimentException('Server took too long to respond.'))
+        return
+
+    def _fail_pending_requests(self, error):
+        for future in self._pending_requests.values():
+            self._on_request_callbacks.pop(future.corr_id, None)
+            if not future.done():
+                future.set_exception(error)
+        self._pending_requests = dict()
+        return
+
+    def _get_reply_queue(self):
+        """Returns the exclusive queue that the responses to requests without a client callback
+        queue of their own are sent to.  It is declared on the first request and then shared by
+        all of them for as long as this Connection lives, the responses are told apart by their
+        correlation ID.
+
+        Returns
+        -------
+        str
+            The name of the reply queue.
+        """
+        if self._reply_queue is None:
+            self._reply_queue = 'rpc.system.request.{}'.format(str(uuid.uuid4().hex))
+            self.setup_subscribe_to_queue(
+                queue_name=self._reply_queue,
+                queue_exclusive=True,
+                queue_auto_delete=True,
+                casas_events=True,
+                callback_function=self.process_system_request_callback,
+                callback_full_params=True)
+        return self._reply_queue
+
+    def _wait_for_request_response(self, corr_id, deadline=None):
+        """Block until the response to the request corr_id has been dispatched or the deadline
+        passes.
+
+        process_data_events() returns as soon as pika has dispatched a message, so we wake up as
+        soon as the response arrives instead of on the next polling interval.
+
+        Parameters
+        ----------
+        corr_id : str
+            The correlation ID of the request.
+        deadline : float, optional
+            The time.time() value to give up at, wait forever if not provided.
+
+        Returns
+        -------
+        objects.CasasObject
+            The response, or None if the deadline passed first. Both the response and callback
+            entries of the request are removed either way.
+        """
+        while self._request_response[corr_id] is None:
+            if deadline is None:
+                self.process_data_events(time_limit=None)
+            else:
+                time_limit = deadline - time.time()
+                if time_limit <= 0:
+                    break
+                self.process_data_events(time_limit=time_limit)
+        response = self._request_response.pop(corr_id)
+        if response is None:
+            # Timed out, forget the request so a late reply is dropped instead of kept around.
+            self._on_request_callbacks.pop(corr_id, None)
+        return response
+
     def process_system_request_callback(self, ch, method, props, body, response):
         """This is a callback function for processing the response to the getting or setting of a
         system request type object.
@@ -865,37 +1258,39 @@ class Connection:
             A list of processed casas.objects that have been built from the JSON provided in
             the message body.
         """
-        self.log.info('process_system_request_callback( {} )'.format(body))
+        self.log.info('process_system_request_callback( %s )', body)
         corr_id = props.correlation_id
         if corr_id in self._on_request_callbacks:
-            # Remove our publish to the queue.
-            self.remove_publish_to_queue(self._on_request_callbacks[corr_id]['publish_queue'])
-            if not self._on_request_callbacks[corr_id]['keep_queue']:
-                # Remove our subscription to the callback queue.
-                self.remove_subscribe_to_queue(self._on_request_callbacks[corr_id]['queue'])
-
-            if isinstance(response, (objects.TrainingData, objects.TestingData)):
+            if isinstance(response, (objects.TrainingData, objects.TestingData,
+                                     objects.TestingDataStepAck)):
                 self._local_epoch_received = response.utc_remote_epoch_received
             elif isinstance(response, objects.ExperimentResponse):
                 self._request_timeout = response.experiment_timeout
                 self._model_experiment_id = response.model_experiment_id
                 self._model_experiment_secret = response.experiment_secret
                 self._server_experiment_rpc_queue = response.server_rpc_queue
+                self._server_step_rpc = bool(response.step_rpc)
             elif isinstance(response, objects.GeneratorResponse):
                 self._server_experiment_rpc_queue = response.generator_rpc_queue
+                self._server_step_rpc = bool(response.step_rpc)
             elif isinstance(response, objects.ExperimentEnd):
                 self.remove_subscribe_to_queue(self._client_rpc_queue)
                 self._client_rpc_queue = None
                 self._model_experiment_id = None
                 self._model_experiment_secret = None
                 self._server_experiment_rpc_queue = None
+                self._server_step_rpc = False
 
             # We have finished processing this system request callback, now we remove the
             # entry from our dict().
             del self._on_request_callbacks[corr_id]
-            self._request_response[corr_id] = response
-            self.log.info('_request_response[{}] = {}'.format(corr_id,
-                                                              self._request_response[corr_id]))
+            future = self._pending_requests.pop(corr_id, None)
+            if future is not None:
+                if not future.done():
+                    future.set_result(response)
+            else:
+                self._request_response[corr_id] = response
+            self.log.info('_request_response[%s] = %s', corr_id, response)
         return
 
     def request_dataset(self, site, start_stamp, end_stamp, experiment, dataset, key, secret,
@@ -1146,8 +1541,7 @@ class Connection:
                               secret=secret,
                               reply_to=callback_queue)
 
-        while self._request_response[corr_id] is None:
-            self._connection.process_data_events(time_limit=0.05)
+        self._wait_for_request_response(corr_id=corr_id)
         return
 
     def process_request_events_callback(self, ch, method, props, body, response):
@@ -1364,7 +1758,8 @@ class Connection:
                                              callback_full_params=callback_full_params,
                                              translations=self.translations,
                                              timezone=self.timezone,
-                                             manual_ack=manual_ack)
+                                             manual_ack=manual_ack,
+                                             multipart_reply_queues=self._multipart_reply_queues)
         new_sub['consumer_tag'] = ""
         new_sub['setup_exchange'] = False
         new_sub['setup_queue'] = False
@@ -1443,7 +1838,8 @@ class Connection:
     def setup_subscribe_to_queue(self, queue_name, queue_durable=False, queue_exclusive=False,
                                  queue_auto_delete=False, casas_events=True, callback_function=None,
                                  limit_to_sensor_types=None, auto_ack=False,
-                                 callback_full_params=False, manual_ack=False):
+                                 callback_full_params=False, manual_ack=False,
+                                 prefetch_count=None, ack_batch_size=1):
         """This function sets up a subscription to events from a queue.
 
         Parameters
@@ -1473,6 +1869,12 @@ class Connection:
             ack.  This variable is overridden to False if auto_ack is True or if
             callback_full_params is False (as you need those to send the ack).  The default value
             is False.
+        prefetch_count : int, optional
+            How many unacked messages the broker may send ahead for this subscription, the
+            prefetch_count given to run() if not provided.
+        ack_batch_size : int, optional
+            Ack the messages in batches of this size, see ConsumeCallback.  It is kept to the
+            prefetch window so a batch can always fill up.  The default value is 1.
         """
         if callback_function is None:
             self.log.error("casas.rabbitmq.Connection.setup_subscribe_to_queue(): "
@@ -1493,6 +1895,8 @@ class Connection:
         else:
             new_sub['limit_to_sensor_types'] = list()
         new_sub['auto_ack'] = auto_ack
+        new_sub['prefetch_count'] = prefetch_count
+        new_sub['ack_batch_size'] = ack_batch_size
         new_sub['consume'] = ConsumeCallback(casas_events=casas_events,
                                              callback_function=callback_function,
                                              is_queue=True,
@@ -1502,7 +1906,9 @@ class Connection:
                                              callback_full_params=callback_full_params,
                                              translations=self.translations,
                                              timezone=self.timezone,
-                                             manual_ack=manual_ack)
+                                             manual_ack=manual_ack,
+                                             multipart_reply_queues=self._multipart_reply_queues,
+                                             ack_batch_size=ack_batch_size)
         new_sub['consumer_tag'] = ""
         new_sub['setup_queue'] = False
         self._queues_subscribe.append(new_sub)
@@ -1599,6 +2005,7 @@ class Connection:
         self._connection = pika.BlockingConnection(parameters=pika.URLParameters(self._url))
         self._channel = self._connection.channel()
         self._channel.basic_qos(prefetch_count=prefetch_count)
+        self._prefetch_count = prefetch_count
 
         self._add_on_connection_blocked_callback()
         self._add_on_connection_unblocked_callback()
@@ -1783,11 +2190,23 @@ class Connection:
                                             auto_delete=qu['queue_auto_delete'])
                 qu['setup_queue'] = True
                 if 'consume' in qu:
-                    # self._channel.basic_qos(prefetch_count=0)
+                    # The broker applies the prefetch to consumers started after basic_qos, so
+                    # set this subscription's own window just for its basic_consume.
+                    prefetch_count = self._prefetch_count
+                    if qu['prefetch_count'] is not None:
+                        prefetch_count = qu['prefetch_count']
+                        self._channel.basic_qos(prefetch_count=prefetch_count)
+                    ack_batch_size = qu['ack_batch_size']
+                    if prefetch_count > 0:
+                        # Zero is an unlimited window, anything else caps the batch.
+                        ack_batch_size = min(ack_batch_size, prefetch_count)
+                    qu['consume'].ack_batch_size = max(1, ack_batch_size)
                     qu['consumer_tag'] = self._channel.basic_consume(
                         queue=qu['queue_name'],
                         on_message_callback=qu['consume'].on_message,
                         auto_ack=qu['auto_ack'])
+                    if qu['prefetch_count'] is not None:
+                        self._channel.basic_qos(prefetch_count=self._prefetch_count)
         except pika.exceptions.AMQPChannelError:
             self.log.error("{} {}".format("setup_queue(): pika.exceptions.AMQPChannelError,"
                                           , qu['queue_name']))
@@ -1808,7 +2227,7 @@ class Connection:
             Name of the exchange we are publishing to.
         casas_object : objects.CasasObject
             CASAS object to uploaded, this function handles the standard behaviors for us.
-        body_str : str, optional
+        body_str : str|bytes, optional
             Use if you are publishing a non-CASAS object.  This value will be overwritten if you
             provide a value for casas_object.
         routing_key : str, optional
@@ -1842,24 +2261,20 @@ class Connection:
             correlation_id = str(uuid.uuid4())
 
         if self._channel:
-            if casas_object is not None:
-                body_str = casas_object.get_json(secret=secret, key=key)
-                body_str = "[{}]".format(body_str)
-            debug_msg = "publish_to_exchange(exchange={}, ".format(str(exchange_name))
-            debug_msg += "casas_obj={}, body={}, routing_key={}, ".format(str(casas_object),
-                                                                          str(body_str),
-                                                                          str(routing_key))
-            debug_msg += "corr_id={}, key={}, secret={})".format(str(correlation_id),
-                                                                 str(key),
-                                                                 str(secret))
-            self.log.debug(debug_msg)
+            body = self._get_publish_body(casas_object=casas_object,
+                                          body_str=body_str,
+                                          key=key,
+                                          secret=secret)
+            self.log.debug('publish_to_exchange(exchange=%s, casas_obj=%s, body=%s, '
+                           'routing_key=%s, corr_id=%s, key=%s, secret=%s)', exchange_name,
+                           casas_object, body, routing_key, correlation_id, key, secret)
             self._channel.basic_publish(exchange=exchange_name,
                                         routing_key=routing_key,
                                         properties=pika.BasicProperties(
                                             correlation_id=correlation_id,
                                             delivery_mode=delivery_mode,
                                             reply_to=reply_to),
-                                        body=str(body_str))
+                                        body=body)
         return
 
     def publish_to_queue(self, queue_name, casas_object=None, body_str=None,
@@ -1873,7 +2288,7 @@ class Connection:
             Name of the queue we are publishing to.
         casas_object : objects.CasasObject
             CASAS object to be uploaded, this function handles the standard behaviors for us.
-        body_str : str, optional
+        body_str : str|bytes, optional
             Use if you are publishing a non-CASAS object.  This value will be overwritten if you
             provide a value for casas_object.
         correlation_id : str, optional
@@ -1894,26 +2309,64 @@ class Connection:
             correlation_id = str(uuid.uuid4())
 
         if self._channel:
-            if casas_object is not None:
-                body_str = casas_object.get_json(secret=secret, key=key)
-                body_str = "[{}]".format(body_str)
-            debug_msg = "publish_to_queue(queue={}, ".format(str(queue_name))
-            debug_msg += "casas_obj={}, body={}, corr_id={}, ".format(str(casas_object),
-                                                                      str(body_str),
-                                                                      str(correlation_id))
-            debug_msg += "del_mode={}, key={}, secret={})".format(str(delivery_mode),
-                                                                  str(key),
-                                                                  str(secret))
-            self.log.debug(debug_msg)
+            content_type = None
+            headers = None
+            if self.multipart:
+                headers = dict({MULTIPART_ACCEPT: True})
+            if casas_object is not None and queue_name in self._multipart_reply_queues:
+                # This is the reply to a request that accepts multipart messages.
+                self._multipart_reply_queues.discard(queue_name)
+                body, parts = casas_object.get_json_parts(secret=secret, key=key)
+                if len(parts) > 0:
+                    content_type = MULTIPART_CONTENT_TYPE
+                    if headers is None:
+                        headers = dict()
+                    headers[MULTIPART_LENGTHS] = list([len(body)] + [len(x) for x in parts])
+                    body = b''.join([body] + parts)
+            else:
+                body = self._get_publish_body(casas_object=casas_object,
+                                              body_str=body_str,
+                                              key=key,
+                                              secret=secret)
+            self.log.debug('publish_to_queue(queue=%s, casas_obj=%s, body=%s, corr_id=%s, '
+                           'del_mode=%s, key=%s, secret=%s)', queue_name, casas_object, body,
+                           correlation_id, delivery_mode, key, secret)
             self._channel.basic_publish(exchange='',
                                         routing_key=queue_name,
                                         properties=pika.BasicProperties(
+                                            content_type=content_type,
                                             correlation_id=correlation_id,
                                             delivery_mode=delivery_mode,
-                                            reply_to=reply_to),
-                                        body=str(body_str))
+                                            reply_to=reply_to,
+                                            headers=headers),
+                                        body=body)
         return
 
+    @staticmethod
+    def _get_publish_body(casas_object=None, body_str=None, key=None, secret=None):
+        """Build the message body handed to basic_publish().
+
+        Parameters
+        ----------
+        casas_object : objects.CasasObject, optional
+            CASAS object to publish, it is encoded straight to bytes.
+        body_str : str|bytes, optional
+            Used when casas_object is not provided, bytes are published as they are.
+        key : str, optional
+            The key value that is paired with secret for uploading events.
+        secret : str, optional
+            The secret value that is paired with key for uploading events.
+
+        Returns
+        -------
+        bytes|str
+        """
+        if casas_object is not None:
+            return casas_object.get_json_body(secret=secret, key=key)
+        if isinstance(body_str, bytes):
+            return body_str
+        return str(body_str)
+
     def _add_on_cancel_callback(self):
         """Add a callback that will be invoked if RabbitMQ cancels the consumer
         for some reason. If RabbitMQ does cancel the consumer,
@@ -2135,6 +2588,9 @@ class Connection:
             if self._on_disconnect_callback is not None:
                 self._on_disconnect_callback()
             self._closing = True
+            # The responses to anything still outstanding went away with the reply queue.
+            self._fail_pending_requests(objects.AiqExperimentException(
+                'Lost the connection to the server.'))
             if self._is_consuming:
                 self.stop_consuming()
             self._stop_consuming()
@@ -2201,7 +2657,7 @@ class Connection:
         bool
             The current connection state.
         """
-        return self._connection.is_open
+        return self._connection is not None and self._connection.is_open
 
     @property
     def is_closed(self):
@@ -2224,3 +2680,498 @@ class Connection:
             The current connection state.
         """
         return self._connection.is_closing
+
+
+class AsyncConnection:
+    """
+    An asyncio client for the SAIL-ON experiment RPC calls, built on pika's AsyncioConnection.
+
+    Every request method is a coroutine that resolves with the server response, so a TA2 agent
+    can await TA1 while its own coroutines (model inference, other I/O) keep running on the same
+    event loop.  Responses are matched to requests by correlation ID on a single exclusive reply
+    queue that lives as long as the connection.
+
+    Unlike Connection this class does not reconnect on its own, if the connection is lost any
+    pending requests fail with objects.AiqExperimentException.
+    """
+
+    def __init__(self, agent_name, amqp_user, amqp_pass, amqp_host, amqp_port,
+                 amqp_vhost='/', amqp_ssl=True, request_timeout=None, multipart=False,
+                 loop=None):
+        """
+        Create a new instance of the CASAS RabbitMQ AsyncConnection class.
+
+        Parameters
+        ----------
+        agent_name : str
+            The name of the agent using the RabbitMQ connection, used in logging and debugging.
+        amqp_user : str
+            The RabbitMQ username.
+        amqp_pass : str
+            The RabbitMQ password.
+        amqp_host : str
+            The RabbitMQ hostname.
+        amqp_port : str
+            The RabbitMQ port to use for connecting.
+        amqp_vhost : str,optional
+            The RabbitMQ virtual host to connect to, with a default value of '/'.
+        amqp_ssl : bool,optional
+            Defines if using SSL to make the connection to the RabbitMQ server.
+        request_timeout : int,optional
+            An integer of the global timeout to use.
+        multipart : bool,optional
+            If True the requests we publish tell the other end that it may reply with a multipart
+            message, see Connection.
+        loop : asyncio.AbstractEventLoop,optional
+            The event loop to run on, the loop running run() when not provided.
+        """
+        self.name = re.sub('\s', '', str(agent_name))
+        self.log = logging.getLogger(__name__).getChild('AsyncConnection')
+
+        self._loop = loop
+        self._connection = None
+        self._channel = None
+        self._closing = False
+        self._request_futures = dict()
+        self._model_experiment_id = None
+        self._model_experiment_secret = None
+        self._server_experiment_rpc_queue = None
+        self._server_step_rpc = False
+        self._client_rpc_queue = None
+        self._local_epoch_received = time.time()
+        self.multipart = multipart
+
+        self._request_timeout = objects.GLOBAL_TIMEOUT_SECONDS
+        if request_timeout is not None:
+            self._request_timeout = request_timeout
+
+        amqp_url_start = "amqp://"
+        if amqp_ssl:
+            amqp_url_start = "amqps://"
+        self._url = "{}{}:{}@{}:{}{}".format(str(amqp_url_start),
+                                             str(amqp_user),
+                                             str(amqp_pass),
+                                             str(amqp_host),
+                                             str(amqp_port),
+                                             str(amqp_vhost))
+        return
+
+    def _get_loop(self):
+        # Only called from our coroutines, so there is always a running loop to fall back on.
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    async def _channel_call(self, method, **kwargs):
+        """Call a pika Channel method that reports completion through its callback argument and
+        wait for that callback.
+
+        Parameters
+        ----------
+        method : function
+            The bound pika.channel.Channel method, basic_qos() or queue_declare() for example.
+
+        Returns
+        -------
+        pika.frame.Method
+            The frame the callback was called with.
+        """
+        future = self._get_loop().create_future()
+
+        def on_done(frame):
+            if not future.done():
+                future.set_result(frame)
+            return
+
+        method(callback=on_done, **kwargs)
+        return await future
+
+    async def _connect(self, prefetch_count=1):
+        """Open the connection and channel then start consuming our reply queue.
+
+        Parameters
+        ----------
+        prefetch_count : int
+            Specifies a prefetch window in terms of whole messages, see Connection._connect().
+        """
+        self.log.info('Connecting to %s', self._url)
+        loop = self._get_loop()
+        opened = loop.create_future()
+
+        def on_open(connection):
+            if not opened.done():
+                opened.set_result(connection)
+            return
+
+        def on_open_error(connection, error):
+            if not opened.done():
+                opened.set_exception(pika.exceptions.AMQPConnectionError(error))
+            return
+
+        self._connection = AsyncioConnection(parameters=pika.URLParameters(self._url),
+                                             on_open_callback=on_open,
+                                             on_open_error_callback=on_open_error,
+                                             on_close_callback=self._on_connection_closed,
+                                             custom_ioloop=loop)
+        await opened
+
+        channel_opened = loop.create_future()
+        self._connection.channel(on_open_callback=channel_opened.set_result)
+        self._channel = await channel_opened
+        self._channel.add_on_close_callback(self._on_channel_closed)
+        await self._channel_call(self._channel.basic_qos, prefetch_count=prefetch_count)
+
+        self._client_rpc_queue = objects.CLIENT_RPC_QUEUE + '.{}'.format(str(uuid.uuid4().hex))
+        await self._channel_call(self._channel.queue_declare,
+                                 queue=self._client_rpc_queue,
+                                 exclusive=True,
+                                 auto_delete=True)
+        await self._channel_call(self._channel.basic_consume,
+                                 queue=self._client_rpc_queue,
+                                 on_message_callback=self._on_response,
+                                 auto_ack=True)
+        return
+
+    async def run(self, prefetch_count=1, timeout=None):
+        """Connect to RabbitMQ, trying again until it succeeds or timeout seconds have passed.
+
+        Parameters
+        ----------
+        prefetch_count : int, optional
+            Specifies a prefetch window in terms of whole messages.
+        timeout : float, optional
+            Give up after this many seconds, keep trying forever if not provided.
+        """
+        self.log.debug('run(prefetch_count=%s)', prefetch_count)
+        self._closing = False
+        start_time = float(time.time())
+        while True:
+            try:
+                await self._connect(prefetch_count=prefetch_count)
+                break
+            except (pika.exceptions.AMQPError, socket.timeout, socket.gaierror) as err:
+                self.log.error('run() connection failed, trying again... %s', err)
+                if timeout is not None and abs(float(time.time()) - start_time) > timeout:
+                    raise
+                await asyncio.sleep(2)
+        return
+
+    async def stop(self):
+        """Close the channel and connection, any requests still waiting for a response fail.
+        """
+        self.log.debug('stop()')
+        if not self._closing:
+            self.log.info('Stopping')
+            self._closing = True
+            if self._connection is not None and self._connection.is_open:
+                closed = self._get_loop().create_future()
+                self._connection.add_on_close_callback(
+                    lambda connection, reason: closed.done() or closed.set_result(reason))
+                self._connection.close()
+                await closed
+            self._channel = None
+            self._connection = None
+            self.log.info('Stopped')
+        return
+
+    def _on_channel_closed(self, channel, reason):
+        self.log.warning('Channel %s was closed: %s', channel, reason)
+        self._channel = None
+        if self._connection is not None and self._connection.is_open:
+            self._connection.close()
+        return
+
+    def _on_connection_closed(self, connection, reason):
+        if not self._closing:
+            self.log.error('Connection closed unexpectedly: %s', reason)
+        self._channel = None
+        self._fail_pending_requests(objects.AiqExperimentException(
+            'Lost the connection to the server: {}'.format(reason)))
+        return
+
+    def _fail_pending_requests(self, error):
+        for future in self._request_futures.values():
+            if not future.done():
+                future.set_exception(error)
+        return
+
+    def _on_response(self, channel, basic_deliver, properties, body):
+        """Invoked by pika for every message on our reply queue, resolves the matching request.
+
+        Parameters
+        ----------
+        channel : pika.channel.Channel
+            The channel object.
+        basic_deliver : pika.Spec.Basic.Deliver
+            basic_deliver method.
+        properties : pika.Spec.BasicProperties
+            properties object.
+        body : bytes
+            The message body.
+        """
+        self.log.debug('_on_response( %s )', body)
+        future = self._request_futures.pop(properties.correlation_id, None)
+        if future is None or future.done():
+            self.log.warning('Dropping response for unknown correlation_id %s',
+                             properties.correlation_id)
+            return
+        try:
+            message, binary_parts = split_multipart_body(properties=properties, body=body)
+            response = objects.build_objects_from_json(message, binary_parts=binary_parts)
+        except Exception as e:
+            # Either TA1 sent an ExperimentException or we could not decode the reply, hand it
+            # to whoever is waiting instead of leaving them to time out.
+            if not isinstance(e, objects.AiqExperimentException):
+                self.log.exception('Failed to decode the response for correlation_id %s',
+                                   properties.correlation_id)
+            future.set_exception(e)
+            return
+        response = response[0] if len(response) > 0 else None
+        self._update_experiment_state(response=response)
+        future.set_result(response)
+        return
+
+    def _update_experiment_state(self, response):
+        """Track the experiment the same way Connection.process_system_request_callback() does.
+
+        Parameters
+        ----------
+        response : objects.CasasObject
+            The response we just received.
+        """
+        if isinstance(response, (objects.TrainingData, objects.TestingData,
+                                 objects.TestingDataStepAck)):
+            self._local_epoch_received = response.utc_remote_epoch_received
+        elif isinstance(response, objects.ExperimentResponse):
+            self._request_timeout = response.experiment_timeout
+            self._model_experiment_id = response.model_experiment_id
+            self._model_experiment_secret = response.experiment_secret
+            self._server_experiment_rpc_queue = response.server_rpc_queue
+            self._server_step_rpc = bool(response.step_rpc)
+        elif isinstance(response, objects.ExperimentEnd):
+            self._model_experiment_id = None
+            self._model_experiment_secret = None
+            self._server_experiment_rpc_queue = None
+            self._server_step_rpc = False
+        return
+
+    async def _request(self, casas_object, queue_name, disable_timeout=False):
+        """Publish casas_object to queue_name and wait for the response.
+
+        Parameters
+        ----------
+        casas_object : objects.CasasObject
+            The request to send.
+        queue_name : str
+            The name of the queue to send the request to.
+        disable_timeout : bool, optional
+            Wait for as long as it takes instead of the request timeout.
+
+        Returns
+        -------
+        objects.CasasObject
+            The response.
+
+        Raises
+        ------
+        objects.CasasRabbitMQException
+            If the connection is not open.
+        objects.AiqExperimentException
+            If the server took too long to respond or the connection was lost.
+        """
+        if self._channel is None or not self._channel.is_open:
+            raise objects.CasasRabbitMQException('The connection is not open, await run() '
+                                                 'first!')
+        corr_id = str(uuid.uuid4())
+        future = self._get_loop().create_future()
+        self._request_futures[corr_id] = future
+
+        if isinstance(casas_object, (objects.TrainingDataPrediction,
+                                     objects.TestingDataPrediction)):
+            casas_object.utc_remote_epoch_received = self._local_epoch_received
+        headers = None
+        if self.multipart:
+            headers = dict({MULTIPART_ACCEPT: True})
+        body = casas_object.get_json_body()
+        self.log.debug('_request(queue=%s, corr_id=%s, body=%s)', queue_name, corr_id, body)
+        try:
+            self._channel.basic_publish(exchange='',
+                                        routing_key=queue_name,
+                                        properties=pika.BasicProperties(
+                                            correlation_id=corr_id,
+                                            delivery_mode=1,
+                                            reply_to=self._client_rpc_queue,
+                                            headers=headers),
+                                        body=body)
+            timeout = None
+            if not disable_timeout:
+                timeout = self._request_timeout
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise objects.AiqExperimentException('Server took too long to respond.')
+        finally:
+            self._request_futures.pop(corr_id, None)
+
+    def _check_experiment(self):
+        if self._server_experiment_rpc_queue is None:
+            raise objects.CasasRabbitMQException('You have not established an experiment yet!')
+        return
+
+    def has_step_rpc(self) -> bool:
+        """Returns True if the server accepts TestingDataStep, see Connection.has_step_rpc().
+
+        Returns
+        -------
+        bool
+        """
+        return self._server_step_rpc
+
+    async def start_sail_on_experiment(self, model: objects.Model, domain: str,
+                                       no_testing: bool, seed: int = None,
+                                       description: str = None):
+        self.log.debug('start_sail_on_experiment()')
+
+        if domain not in objects.VALID_DOMAINS:
+            raise objects.AiqDataException('{} is not a VALID domain choice.'.format(domain))
+
+        experiment_request = objects.RequestExperiment(
+            model=model,
+            novelty=0,
+            novelty_visibility=0,
+            client_rpc_queue=self._client_rpc_queue,
+            git_version=objects.__version__,
+            experiment_type=objects.TYPE_EXPERIMENT_SAIL_ON,
+            seed=seed,
+            domain_dict=dict({domain: True}),
+            no_testing=no_testing,
+            description=description)
+
+        return await self._request(casas_object=experiment_request,
+                                   queue_name=objects.SERVER_EXPERIMENT_QUEUE,
+                                   disable_timeout=True)
+
+    async def start_work_on_experiment_trials(self, model: objects.Model, experiment_secret: str,
+                                              just_one_trial: bool, domain: str):
+        self.log.debug('start_work_on_experiment_trials()')
+
+        experiment_request = objects.RequestExperimentTrials(
+            model=model,
+            experiment_secret=experiment_secret,
+            client_rpc_queue=self._client_rpc_queue,
+            just_one_trial=just_one_trial,
+            domain_dict=dict({domain: True}))
+
+        return await self._request(casas_object=experiment_request,
+                                   queue_name=objects.SERVER_EXPERIMENT_QUEUE,
+                                   disable_timeout=True)
+
+    async def get_state(self):
+        self.log.debug('get_state()')
+        self._check_experiment()
+        return await self._request(casas_object=objects.RequestState(),
+                                   queue_name=self._server_experiment_rpc_queue)
+
+    async def send_benchmark_data(self, benchmark_data: dict):
+        self.log.debug('send_benchmark_data()')
+        self._check_experiment()
+        return await self._request(
+            casas_object=objects.BenchmarkData(benchmark_data=benchmark_data),
+            queue_name=self._server_experiment_rpc_queue)
+
+    async def get_training_data(self):
+        self.log.debug('get_training_data()')
+        self._check_experiment()
+        return await self._request(
+            casas_object=objects.RequestTrainingData(
+                model_experiment_id=self._model_experiment_id,
+                secret=self._model_experiment_secret),
+            queue_name=self._server_experiment_rpc_queue)
+
+    async def send_training_predictions(self, label_prediction: dict, end_early: bool = False):
+        self.log.debug('send_training_predictions()')
+        self._check_experiment()
+        return await self._request(
+            casas_object=objects.TrainingDataPrediction(
+                secret=self._model_experiment_secret,
+                label_prediction=label_prediction,
+                end_early=end_early),
+            queue_name=self._server_experiment_rpc_queue)
+
+    async def send_training_episode_novelty(self, novelty_characterization: dict,
+                                            novelty_probability: float = 0.0,
+                                            novelty_threshold: float = 0.0, novelty: int = 0):
+        self.log.debug('send_training_episode_novelty()')
+        self._check_experiment()
+        return await self._request(
+            casas_object=objects.TrainingEpisodeNovelty(
+                novelty_probability=novelty_probability,
+                novelty_threshold=novelty_threshold,
+                novelty=novelty,
+                novelty_characterization=novelty_characterization),
+            queue_name=self._server_experiment_rpc_queue)
+
+    async def end_training_early(self):
+        self.log.debug('end_training_early()')
+        self._check_experiment()
+        return await self._request(casas_object=objects.TrainingEndEarly(),
+                                   queue_name=self._server_experiment_rpc_queue)
+
+    async def get_testing_data(self):
+        self.log.debug('get_testing_data()')
+        self._check_experiment()
+        return await self._request(
+            casas_object=objects.RequestTestingData(
+                model_experiment_id=self._model_experiment_id,
+                secret=self._model_experiment_secret),
+            queue_name=self._server_experiment_rpc_queue)
+
+    async def send_testing_predictions(self, label_prediction: dict, end_early: bool = False):
+        self.log.debug('send_testing_predictions()')
+        self._check_experiment()
+        return await self._request(
+            casas_object=objects.TestingDataPrediction(
+                secret=self._model_experiment_secret,
+                label_prediction=label_prediction,
+                end_early=end_early),
+            queue_name=self._server_experiment_rpc_queue)
+
+    async def send_testing_step(self, label_prediction: dict, end_early: bool = False):
+        self.log.debug('send_testing_step()')
+        self._check_experiment()
+        if not self._server_step_rpc:
+            raise objects.CasasRabbitMQException('The server does not accept TestingDataStep, '
+                                                 'use send_testing_predictions() and '
+                                                 'get_testing_data() instead!')
+        return await self._request(
+            casas_object=objects.TestingDataStep(
+                secret=self._model_experiment_secret,
+                label_prediction=label_prediction,
+                end_early=end_early),
+            queue_name=self._server_experiment_rpc_queue)
+
+    async def send_testing_episode_novelty(self, novelty_characterization: dict,
+                                           novelty_probability: float = 0.0,
+                                           novelty_threshold: float = 0.0, novelty: int = 0):
+        self.log.debug('send_testing_episode_novelty()')
+        self._check_experiment()
+        return await self._request(
+            casas_object=objects.TestingEpisodeNovelty(
+                novelty_probability=novelty_probability,
+                novelty_threshold=novelty_threshold,
+                novelty=novelty,
+                novelty_characterization=novelty_characterization),
+            queue_name=self._server_experiment_rpc_queue)
+
+    async def end_experiment(self):
+        self.log.debug('end_experiment()')
+        self._check_experiment()
+        await self._request(
+            casas_object=objects.EndExperiment(
+                model_experiment_id=self._model_experiment_id,
+                secret=self._model_experiment_secret),
+            queue_name=self._server_experiment_rpc_queue)
+        self._model_experiment_id = None
+        self._model_experiment_secret = None
+        self._server_experiment_rpc_queue = None
+        self._server_step_rpc = False
+        return
@@ -0,0 +1,129 @@
+# Measure the p50/p99 round trip of a blocking RPC, the path every get_testing_data() and
+# send_testing_predictions() call takes. Run it next to the rabbit container with the generator
+# config, from the directory holding the objects package:
+#     python3 -m objects.rpc_benchmark --config=generator.config
+#
+# A responder thread answers RequestTestingData on a private queue with a vizdoom sized
+# TestingData after --work-ms, and the client times --requests calls one after the other.
+import configparser
+import logging
+import optparse
+import threading
+import time
+import uuid
+
+from . import objects
+from . import rabbitmq
+from .message_benchmark import build_vizdoom_feature_vector
+
+
+def build_connection(config: configparser.ConfigParser, name: str) -> rabbitmq.Connection:
+    return rabbitmq.Connection(agent_name=name,
+                               amqp_user=config.get("amqp", "user"),
+                               amqp_pass=config.get("amqp", "pass"),
+                               amqp_host=config.get("amqp", "host"),
+                               amqp_port=config.getint("amqp", "port"),
+                               amqp_vhost=config.get("amqp", "vhost"),
+                               amqp_ssl=config.getboolean("amqp", "ssl"))
+
+
+class Responder(threading.Thread):
+    def __init__(self, config: configparser.ConfigParser, queue_name: str, work_seconds: float):
+        threading.Thread.__init__(self)
+        self.name = 'Responder'
+        self.daemon = True
+        self.work_seconds = work_seconds
+        self.response = objects.TestingData(secret='secret',
+                                            feature_vector=build_vizdoom_feature_vector(),
+                                            novelty_indicator=None)
+        self.ready = threading.Event()
+
+        self.amqp = build_connection(config=config, name=self.name)
+        # Called once the queue is declared and we are subscribed to it.
+        self.amqp.set_on_connect_callback(self.ready.set)
+        self.amqp.setup_subscribe_to_queue(queue_name=queue_name,
+                                           queue_durable=False,
+                                           queue_exclusive=False,
+                                           queue_auto_delete=True,
+                                           casas_events=True,
+                                           callback_function=self.on_request,
+                                           callback_full_params=True)
+        return
+
+    def on_request(self, ch, method, props, body, request):
+        if self.work_seconds > 0:
+            time.sleep(self.work_seconds)
+        self.amqp.publish_to_queue(queue_name=props.reply_to,
+                                   casas_object=self.response,
+                                   correlation_id=props.correlation_id)
+        return
+
+    def run(self):
+        self.amqp.run()
+        self.amqp.start_consuming()
+        self.amqp.stop()
+        return
+
+    def stop(self):
+        self.amqp.call_later_threadsafe(self.amqp.stop_consuming)
+        return
+
+
+def measure(config: configparser.ConfigParser, queue_name: str, nb_requests: int) -> list:
+    amqp = build_connection(config=config, name='RpcBenchmarkClient')
+    amqp.run()
+
+    request = objects.RequestTestingData(model_experiment_id=0, secret='secret')
+    latencies = list()
+    for i in range(nb_requests):
+        start = time.perf_counter()
+        amqp._set_system_request(casas_object=request,
+                                 queue_name=queue_name,
+                                 declare_server_queue=False)
+        latencies.append(time.perf_counter() - start)
+
+    amqp.stop()
+    return sorted(latencies)
+
+
+if __name__ == "__main__":
+    parser = optparse.OptionParser(usage="usage: %prog [options]")
+    parser.add_option("--config",
+                      dest="config",
+                      help="Config file with the [amqp] section to use.",
+                      default="generator.config")
+    parser.add_option("--requests",
+                      dest="requests",
+                      type="int",
+                      help="Number of requests to time.",
+                      default=1000)
+    parser.add_option("--work-ms",
+                      dest="work_ms",
+                      type="float",
+                      help="Milliseconds the responder spends on a request.",
+                      default=1.0)
+    (options, args) = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    config = configparser.ConfigParser()
+    config.read(options.config)
+
+    queue_name = 'rpc.benchmark.{}'.format(str(uuid.uuid4().hex))
+    responder = Responder(config=config,
+                          queue_name=queue_name,
+                          work_seconds=options.work_ms / 1000.0)
+    responder.start()
+    responder.ready.wait()
+
+    latencies = measure(config=config,
+                        queue_name=queue_name,
+                        nb_requests=options.requests)
+
+    responder.stop()
+    responder.join()
+
+    print('{} requests, responder work {:.1f}ms'.format(len(latencies), options.work_ms))
+    print('p50 {:.2f}ms  p99 {:.2f}ms  max {:.2f}ms'.format(
+        latencies[len(latencies) // 2] * 1000.0,
+        latencies[int(len(latencies) * 0.99)] * 1000.0,
+        latencies[-1] * 1000.0))
@@ -0,0 +1,216 @@
+import itertools
+import json
+import math
+
+import pytest
+
+from objects import objects
+
+BACKENDS = [objects.JSON_BACKEND_STDLIB, objects.JSON_BACKEND_UJSON, objects.JSON_BACKEND_ORJSON]
+
+FEATURE_VECTOR = dict({'cart': dict({'x_position': 1.5, 'y_position': -0.25}),
+                       'blocks': [dict({'id': 1, 'x_position': 0.1}), dict({'id': 2})],
+                       'label': 'café ✓',
+                       'image': None})
+
+# Sample value for a required JSON attribute, by attribute name.
+ATTRIBUTE_VALUES = dict({'feature_vector': FEATURE_VECTOR,
+                         'feature_label': dict({'action': 'left'}),
+                         'label_prediction': dict({'action': 'right'}),
+                         'feedback': dict({'class_label': [1, 2]}),
+                         'performance': 0.5,
+                         'novelty_probability': 0.25,
+                         'novelty_threshold': 0.5,
+                         'novelty': objects.NOVELTY_200,
+                         'novelty_characterization': dict({'source': 'unknown'}),
+                         'novelty_description': dict({'description': 'none'}),
+                         'novelty_indicator': None,
+                         'end_early': False,
+                         'utc_remote_epoch_received': 1600000000.25,
+                         'utc_remote_epoch_sent': 1600000001.5,
+                         'episode_number': 3,
+                         'total_episodes': 10,
+                         'trial_number': 1,
+                         'total_trials': 2,
+                         'model_experiment_id': 7,
+                         'experiment_trial_id': 8,
+                         'experiment_timeout': 300})
+
+
+def build_episode(index=0):
+    return objects.Episode(novelty=objects.NOVELTY_200,
+                           difficulty=objects.DIFFICULTY_EASY,
+                           seed=123,
+                           domain=objects.DOMAIN_CARTPOLE,
+                           data_type=objects.DTYPE_TEST,
+                           episode_index=index,
+                           episode_id=index,
+                           trial_novelty=objects.NOVELTY_200,
+                           day_offset=0,
+                           trial_episode_index=index,
+                           use_image=False)
+
+
+def build_trial():
+    return objects.Trial(episodes=[build_episode(0), build_episode(1)],
+                         novelty=objects.NOVELTY_200,
+                         novelty_visibility=0,
+                         difficulty=objects.DIFFICULTY_EASY)
+
+
+def build_sample(obj_type):
+    model = objects.Model(aiq_username='user', aiq_secret='secret', model_name='model',
+                          organization='org', description='description')
+    if obj_type == objects.REQ_EXPERIMENT:
+        return objects.RequestExperiment(model=model,
+                                         novelty=objects.NOVELTY_200,
+                                         novelty_visibility=0,
+                                         client_rpc_queue='client.queue',
+                                         git_version='1.0',
+                                         experiment_type=objects.TYPE_EXPERIMENT_SAIL_ON,
+                                         seed=123,
+                                         domain_dict=dict({objects.DOMAIN_CARTPOLE: True}),
+                                         epoch=1600000000.0,
+                                         no_testing=False,
+                                         description='description')
+    if obj_type == objects.REQ_EXP_TRIALS:
+        return objects.RequestExperimentTrials(model=model,
+                                               experiment_secret='secret',
+                                               client_rpc_queue='client.queue',
+                                               just_one_trial=True,
+                                               domain_dict=dict({objects.DOMAIN_CARTPOLE: True}),
+                                               epoch=1600000000.0)
+    if obj_type == objects.OBJ_EPISODE:
+        return build_episode()
+    if obj_type == objects.OBJ_TRAINING:
+        return objects.Training(episodes=[build_episode(0), build_episode(1)])
+    if obj_type == objects.OBJ_TRIAL:
+        return build_trial()
+    if obj_type == objects.OBJ_NOVELTY_GRP:
+        return objects.NoveltyGroup(trials=[build_trial()])
+    if obj_type == objects.OBJ_EXPERIMENT:
+        return objects.Experiment(training=objects.Training(episodes=[build_episode()]),
+                                  novelty_groups=[objects.NoveltyGroup(trials=[build_trial()])],
+                                  budget=0.5)
+    if obj_type == objects.REQ_NOVELTY_DESCRIPTION:
+        return objects.RequestNoveltyDescription(r_domain=objects.DOMAIN_CARTPOLE,
+                                                 novelty=objects.NOVELTY_200,
+                                                 difficulty=objects.DIFFICULTY_EASY)
+    if obj_type == objects.START_GENERATOR:
+        return objects.StartGenerator(domain=objects.DOMAIN_CARTPOLE,
+                                      novelty=objects.NOVELTY_200,
+                                      difficulty=objects.DIFFICULTY_EASY,
+                                      seed=123,
+                                      server_rpc_queue='server.queue',
+                                      trial_novelty=objects.NOVELTY_200,
+                                      epoch=1600000000.0,
+                                      day_offset=0,
+                                      request_timeout=5,
+                                      use_image=False)
+    decoder = objects.AIQ_DECODERS[obj_type]
+    kwargs = dict()
+    for attribute in decoder.required:
+        kwargs[attribute] = ATTRIBUTE_VALUES.get(attribute, '{} value'.format(attribute))
+    return decoder.obj_class(**kwargs)
+
+
+def comparable(value):
+    # The JSON an object produces, with the nested JSON strings (RequestExperiment.model)
+    # expanded and the send time, which is stamped on every encode, left out.
+    if isinstance(value, dict):
+        return {key: comparable(item) for key, item in value.items()
+                if key != 'utc_remote_epoch_sent'}
+    if isinstance(value, list):
+        return [comparable(item) for item in value]
+    if isinstance(value, str) and value.startswith('{"obj_type"'):
+        return comparable(json.loads(value))
+    return value
+
+
+def available(backend):
+    if backend not in objects._JSON_BACKENDS:
+        pytest.skip('The {} JSON backend is not installed.'.format(backend))
+    return backend
+
+
+@pytest.fixture(autouse=True)
+def restore_backend():
+    backend = objects.JSON_BACKEND
+    yield
+    objects.set_json_backend(backend)
+
+
+ROUND_TRIP_TYPES = sorted(obj_type for obj_type in objects.AIQ_DECODERS
+                          if obj_type != objects.EXPERIMENT_EXCEPTION)
+BACKEND_PAIRS = list(itertools.product(BACKENDS, BACKENDS))
+
+
+@pytest.mark.parametrize('encode_backend,decode_backend', BACKEND_PAIRS)
+@pytest.mark.parametrize('obj_type', ROUND_TRIP_TYPES)
+def test_round_trip(obj_type, encode_backend, decode_backend):
+    sample = build_sample(obj_type)
+    objects.set_json_backend(available(encode_backend))
+    body = sample.get_json_body()
+    objects.set_json_backend(available(decode_backend))
+    decoded = objects.build_objects_from_json(body)
+
+    assert len(decoded) == 1
+    assert type(decoded[0]) is type(sample)
+    assert comparable(decoded[0].get_json_obj()) == comparable(sample.get_json_obj())
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('obj_type', ROUND_TRIP_TYPES)
+def test_decode_str_body(obj_type, backend):
+    # Bodies published as '[{}]'.format(json.dumps(...)) before the JSON layer existed.
+    sample = build_sample(obj_type)
+    objects.set_json_backend(available(backend))
+    decoded = objects.build_objects_from_json('[{}]'.format(json.dumps(sample.get_json_obj())))
+
+    assert type(decoded[0]) is type(sample)
+    assert comparable(decoded[0].get_json_obj()) == comparable(sample.get_json_obj())
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_experiment_exception(backend):
+    objects.set_json_backend(available(backend))
+    body = objects.ExperimentException(message='generator crashed').get_json_body()
+    with pytest.raises(objects.AiqExperimentException) as error:
+        objects.build_objects_from_json(body)
+    assert error.value.value == 'generator crashed'
+
+
+@pytest.mark.parametrize('encode_backend,decode_backend', BACKEND_PAIRS)
+def test_non_finite_floats(encode_backend, decode_backend):
+    # Every backend has to send NaN and Infinity the way the stdlib does, not as null.
+    value = dict({'nan': math.nan, 'inf': math.inf, 'none': None,
+                  'nested': [dict({'x': -math.inf}), 1.5]})
+    objects.set_json_backend(available(encode_backend))
+    body = objects.json_dumps_bytes(value)
+    objects.set_json_backend(available(decode_backend))
+    decoded = objects.json_loads(body)
+
+    assert math.isnan(decoded['nan'])
+    assert decoded['inf'] == math.inf
+    assert decoded['none'] is None
+    assert decoded['nested'] == [dict({'x': -math.inf}), 1.5]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_non_finite_floats_in_message(backend):
+    sample = objects.TestingDataAck(secret='secret', performance=math.nan,
+                                    feedback=dict({'reward': -math.inf}))
+    objects.set_json_backend(available(backend))
+    decoded = objects.build_objects_from_json(sample.get_json_body())[0]
+
+    assert math.isnan(decoded.performance)
+    assert decoded.feedback == dict({'reward': -math.inf})
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_numpy_values_rejected(backend):
+    # No backend gets to accept a message the others would refuse.
+    numpy = pytest.importorskip('numpy')
+    objects.set_json_backend(available(backend))
+    with pytest.raises(TypeError):
+        objects.json_dumps_bytes(dict({'array': numpy.zeros(3)}))